@@ -0,0 +1,194 @@
+"""
+A small benchmark harness
+
+Benchmarks are registered with the @benchmark decorator. Each one is a setup
+function that takes a problem size and returns a zero-argument function to
+time. The harness warms each case up, picks a loop count so a single timing
+isn't dominated by clock resolution, repeats the timing, and records summary
+statistics. Results are saved as JSON so two runs can be compared later.
+"""
+import json
+import math
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes):
+    """register a setup function as the benchmark called name, run at each of sizes"""
+    def decorator(setup):
+        if name in BENCHMARKS:
+            raise ValueError("Duplicate benchmark name: {}".format(name))
+        BENCHMARKS[name] = (setup, list(sizes))
+        return setup
+    return decorator
+
+
+def calibrate(fn, min_time=0.02, timer=time.perf_counter):
+    """find a number of loops such that one timing of fn takes at least min_time"""
+    loops = 1
+    while True:
+        start = timer()
+        for _ in range(loops):
+            fn()
+        elapsed = timer() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            return loops
+        # aim a bit past min_time so we don't creep up by doubling
+        loops = max(loops * 2, int(loops * 1.2 * min_time / max(elapsed, 1e-9)))
+
+
+def measure(fn, warmup=1, repeat=5, min_time=0.02, timer=time.perf_counter):
+    """
+    time fn, returning a dict of per-call statistics in seconds:
+    min, median, mean, stdev, plus the repeat and loop counts used.
+    """
+    for _ in range(warmup):
+        fn()
+
+    loops = calibrate(fn, min_time, timer)
+    times = []
+    for _ in range(repeat):
+        start = timer()
+        for _ in range(loops):
+            fn()
+        times.append((timer() - start) / loops)
+
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'repeat': repeat,
+        'loops': loops,
+    }
+
+
+def run(pattern=None, max_size=None, warmup=1, repeat=5, min_time=0.02, seed=0, report=None):
+    """
+    run all registered benchmarks whose name matches the regex pattern,
+    skipping sizes larger than max_size. Returns a results dict suitable
+    for save().
+
+    The random module is reseeded from seed, name and size before each
+    setup, so a case gets the same inputs no matter which others run.
+
+    A benchmark whose setup raises ImportError is recorded as skipped, so
+    a missing optional dependency doesn't abort the whole run.
+    """
+    results = []
+    for name, (setup, sizes) in sorted(BENCHMARKS.items()):
+        if pattern and not re.search(pattern, name):
+            continue
+        for size in sizes:
+            if max_size is not None and size > max_size:
+                continue
+            random.seed('{}:{}:{}'.format(seed, name, size))
+            try:
+                fn = setup(size)
+            except ImportError as e:
+                result = {'name': name, 'size': size, 'skipped': str(e)}
+            else:
+                result = {'name': name, 'size': size}
+                result.update(measure(fn, warmup, repeat, min_time))
+            results.append(result)
+            if report:
+                report(result)
+    return {'meta': metadata(seed), 'results': results}
+
+
+def metadata(seed=None):
+    return {
+        'seed': seed,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10, stat='median'):
+    """
+    compare two result sets case by case. Returns a list of dicts with the
+    baseline and current values of stat, their ratio and a status: 'slower'
+    if current is worse than baseline by more than threshold (as a
+    fraction), 'faster' if it's better by more than threshold, otherwise
+    'same'. Cases present in only one run get status 'added' or 'removed'.
+    """
+    def index(results):
+        return {(r['name'], r['size']): r for r in results['results'] if 'skipped' not in r}
+
+    old, new = index(baseline), index(current)
+    rows = []
+    for key in sorted(set(old) | set(new)):
+        name, size = key
+        row = {'name': name, 'size': size,
+               'baseline': old[key][stat] if key in old else None,
+               'current': new[key][stat] if key in new else None,
+               'ratio': None}
+        if key not in old:
+            row['status'] = 'added'
+        elif key not in new:
+            row['status'] = 'removed'
+        else:
+            row['ratio'] = row['current'] / row['baseline'] if row['baseline'] else math.inf
+            if row['ratio'] > 1 + threshold:
+                row['status'] = 'slower'
+            elif row['ratio'] < 1 / (1 + threshold):
+                row['status'] = 'faster'
+            else:
+                row['status'] = 'same'
+        rows.append(row)
+    return rows
+
+
+def regressions(rows):
+    return [row for row in rows if row['status'] == 'slower']
+
+
+def format_seconds(t):
+    if t is None:
+        return '-'
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if t >= scale:
+            return '{:.3f} {}'.format(t / scale, unit)
+    return '{:.1f} ns'.format(t / 1e-9)
+
+
+def format_result(result):
+    if 'skipped' in result:
+        return '{:<40} {:>8}   skipped: {}'.format(result['name'], result['size'], result['skipped'])
+    return '{:<40} {:>8} {:>12} {:>12} +/- {:<10}'.format(
+        result['name'], result['size'],
+        format_seconds(result['min']), format_seconds(result['median']),
+        format_seconds(result['stdev']))
+
+
+def format_comparison(rows):
+    lines = ['{:<40} {:>8} {:>12} {:>12} {:>7}  {}'.format(
+        'benchmark', 'size', 'baseline', 'current', 'ratio', 'status')]
+    for row in rows:
+        lines.append('{:<40} {:>8} {:>12} {:>12} {:>7}  {}'.format(
+            row['name'], row['size'],
+            format_seconds(row['baseline']), format_seconds(row['current']),
+            '{:.2f}'.format(row['ratio']) if row['ratio'] is not None else '-',
+            row['status']))
+    return '\n'.join(lines)
@@ -0,0 +1,266 @@
+"""
+Reference implementations of algorithms that only exist in the notebooks
+
+Notebooks can't be imported, so to benchmark k-means, PageRank, naive Bayes,
+trigram generation and LDA the code is copied here from the chapter 19, 21,
+13 and 20 notebooks, changed only as needed to run outside the notebook.
+"""
+import math
+import random
+import re
+from collections import Counter, defaultdict
+
+from vector import squared_distance, vector_mean
+
+
+# ------------------------------------------------------------
+# k-means, from chapter_19/clustering.ipynb
+# ------------------------------------------------------------
+
+class KMeans:
+    """performs k-means clustering"""
+
+    def __init__(self, k):
+        self.k = k
+        self.means = None
+
+    def classify(self, input):
+        """return the index of the cluster closest to the input"""
+        return min(range(self.k),
+                   key=lambda i: squared_distance(input, self.means[i]))
+
+    def train(self, inputs):
+        # choose k random points as the initial means
+        self.means = random.sample(inputs, self.k)
+        assignments = None
+
+        while True:
+            # Find new assignments
+            new_assignments = [self.classify(i) for i in inputs]
+
+            # If no assignments have changed, we're done.
+            if assignments == new_assignments:
+                return
+
+            # Otherwise keep the new assignments,
+            assignments = new_assignments
+
+            # And compute new means based on the new assignments
+            for i in range(self.k):
+                # find all the points assigned to cluster i
+                i_points = [p for p, a in zip(inputs, assignments) if a == i]
+
+                # make sure i_points is not empty so don't divide by 0
+                if i_points:
+                    self.means[i] = vector_mean(i_points)
+
+
+# ------------------------------------------------------------
+# PageRank, from chapter_21/network_analysis.ipynb
+# ------------------------------------------------------------
+
+def page_rank(users, damping = 0.85, num_iters = 100):
+
+    # initially distribute PageRank evenly
+    num_users = len(users)
+    pr = { user["id"] : 1 / num_users for user in users }
+
+    # this is the small fraction of PageRank
+    # that each node gets each iteration
+    base_pr = (1 - damping) / num_users
+
+    for __ in range(num_iters):
+        next_pr = { user["id"] : base_pr for user in users }
+        for user in users:
+            # distribute PageRank to outgoing links
+            links_pr = pr[user["id"]] * damping
+            for endorsee in user["endorses"]:
+                next_pr[endorsee["id"]] += links_pr / len(user["endorses"])
+        pr = next_pr
+
+    return pr
+
+
+# ------------------------------------------------------------
+# naive Bayes, from chapter_13/naive-bayes.ipynb
+# ------------------------------------------------------------
+
+def tokenize(message):
+    message = message.lower()
+    all_words = re.findall("[a-z0-9']+", message)
+    return set(all_words)
+
+def count_words(training_set):
+    """
+    training set consists of pairs (message, is_spam)
+    """
+    counts = defaultdict(lambda: [0, 0])
+    for message, is_spam in training_set:
+        for word in tokenize(message):
+            counts[word][0 if is_spam else 1] += 1
+    return counts
+
+def word_probabilities(counts, total_spams, total_non_spams, k=0.5):
+    """
+    turn the word_counts into a list of triplets
+    w, p(w | spam) and p(w | ~spam)
+    """
+    return [(w,
+             (spam + k) / (total_spams + 2 * k),
+             (non_spam + k) / (total_non_spams + 2 * k))
+            for w, (spam, non_spam) in counts.items()]
+
+def spam_probability(word_probs, message):
+    message_words = tokenize(message)
+    log_prob_if_spam = log_prob_if_not_spam = 0.0
+
+    for word, prob_if_spam, prob_if_not_spam in word_probs:
+
+        # for each word in the message,
+        # add the log probability of seeing it
+        if word in message_words:
+            log_prob_if_spam += math.log(prob_if_spam)
+            log_prob_if_not_spam += math.log(prob_if_not_spam)
+
+        # for each word that's not in the message
+        # add the log probability of _not_ seeing it
+        else:
+            log_prob_if_spam += math.log(1.0 - prob_if_spam)
+            log_prob_if_not_spam += math.log(1.0 - prob_if_not_spam)
+
+    prob_if_spam = math.exp(log_prob_if_spam)
+    prob_if_not_spam = math.exp(log_prob_if_not_spam)
+    return prob_if_spam / (prob_if_spam + prob_if_not_spam)
+
+class NaiveBayesClassifier:
+
+    def __init__(self, k=0.5):
+        self.k = k
+        self.word_probs = []
+
+    def train(self, training_set):
+
+        # count spam and non-spam messages
+        num_spams = sum(is_spam for message,is_spam in training_set)
+        num_non_spams = len(training_set) - num_spams
+
+        # run training data through our "pipeline"
+        word_counts = count_words(training_set)
+        self.word_probs = word_probabilities(word_counts,
+                                             num_spams,
+                                             num_non_spams,
+                                             self.k)
+
+    def classify(self, message):
+        return spam_probability(self.word_probs, message)
+
+
+# ------------------------------------------------------------
+# trigrams, from chapter_20/nlp.ipynb
+# ------------------------------------------------------------
+
+# the notebook kept starts and trigram_transitions in globals
+
+def trigram_transitions(document):
+    trigrams = zip(document, document[1:], document[2:])
+    trigram_transitions = defaultdict(list)
+    starts = []
+
+    for a, b, c in trigrams:
+        if a == ".":
+            starts.append(b)
+        trigram_transitions[(a, b)].append(c)
+    return starts, trigram_transitions
+
+def generate_using_trigrams(starts, trigram_transitions):
+    current = random.choice(starts)
+    prev = "."
+    result = [current]
+
+    # choose a random starting word
+    # and precede it with a '.'
+    while True:
+        next_word_candidates = trigram_transitions[(prev, current)]
+        next_word = random.choice(next_word_candidates)
+        prev, current = current, next_word
+        result.append(current)
+
+        if current == ".":
+            return " ".join(result)
+
+
+# ------------------------------------------------------------
+# LDA, from chapter_20/nlp.ipynb
+# ------------------------------------------------------------
+
+def sample_from(weights):
+    """returns i with probability weights[i] / sum(weights)"""
+    total = sum(weights)
+    rnd = total * random.random()
+    for i, w in enumerate(weights):
+        rnd -= w
+        if rnd <= 0: return i
+
+# the notebook kept the counts in globals and ran 1000 iterations
+
+def lda(documents, K, iterations):
+    document_topic_counts = [Counter() for _ in documents]
+    topic_word_counts = [Counter() for _ in range(K)]
+    topic_counts = [0 for _ in range(K)]
+    document_lengths = list(map(len, documents))
+    distinct_words = set(word for document in documents for word in document)
+    W = len(distinct_words)
+    D = len(documents)
+
+    def p_topic_given_document(topic, d, alpha=0.1):
+        """the fraction of words in document _d_
+        that are assigned to _topic_ (plus some smoothing)"""
+        return ((document_topic_counts[d][topic] + alpha) /
+                (document_lengths[d] + K * alpha))
+
+    def p_word_given_topic(word, topic, beta=0.1):
+        """the fraction of words assigned to _topic_
+        that equal _word_ (plus some smoothing)"""
+        return ((topic_word_counts[topic][word] + beta) /
+                (topic_counts[topic] + W * beta))
+
+    def topic_weight(d, word, k):
+        """given a document and a word in that document,
+        return the weight for the kth topic"""
+        return p_word_given_topic(word, k) * p_topic_given_document(k, d)
+
+    def choose_new_topic(d, word):
+        return sample_from([topic_weight(d, word, k)
+            for k in range(K)])
+
+    document_topics = [[random.randrange(K) for word in document]
+        for document in documents]
+
+    for d in range(D):
+        for word, topic in zip(documents[d], document_topics[d]):
+            document_topic_counts[d][topic] += 1
+            topic_word_counts[topic][word] += 1
+            topic_counts[topic] += 1
+
+    for iter in range(iterations):
+        for d in range(D):
+            for i, (word, topic) in enumerate(zip(documents[d],
+                                                  document_topics[d])):
+
+                # remove this word / topic from the counts
+                # so that it doesn't influence the weights
+                document_topic_counts[d][topic] -= 1
+                topic_word_counts[topic][word] -= 1
+                topic_counts[topic] -= 1
+                document_lengths[d] -= 1
+
+                # choose a new topic based on the weights
+                new_topic = choose_new_topic(d, word)
+                document_topics[d][i] = new_topic
+
+                # and now add it back to the counts
+                document_topic_counts[d][new_topic] += 1
+                topic_word_counts[new_topic][word] += 1
+                topic_counts[new_topic] += 1
+                document_lengths[d] += 1
+    return document_topics
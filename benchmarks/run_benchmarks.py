@@ -0,0 +1,622 @@
+"""
+Benchmarks for the code in this repo
+
+Run all benchmarks and save the results:
+
+    python benchmarks/run_benchmarks.py run -o before.json
+
+Run a subset, skipping the biggest problem sizes:
+
+    python benchmarks/run_benchmarks.py run -k 'vector|matrix' --max-size 1000
+
+Compare two runs, exiting with status 1 if anything got slower by more
+than the threshold:
+
+    python benchmarks/run_benchmarks.py compare before.json after.json --threshold 0.1
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+book_dir = Path(__file__).resolve().parent.parent
+sys.path.extend(os.path.join(book_dir, 'chapter_{:02d}'.format(i)) for i in [4, 5, 6, 7, 8, 12, 13, 16, 17, 18, 19, 20])
+
+import harness
+from harness import benchmark
+
+
+def random_vectors(num_vectors, vector_len):
+    return [[random.random() for _ in range(vector_len)] for _ in range(num_vectors)]
+
+
+# ------------------------------------------------------------
+# vectors, chapter 4
+# ------------------------------------------------------------
+
+@benchmark('vector.dot', sizes=[10, 100, 1000])
+def bench_dot(n):
+    from vector import dot
+    v, w = random_vectors(2, n)
+    return lambda: dot(v, w)
+
+@benchmark('vector.squared_distance', sizes=[10, 100, 1000])
+def bench_squared_distance(n):
+    from vector import squared_distance
+    v, w = random_vectors(2, n)
+    return lambda: squared_distance(v, w)
+
+# The book's reduce-based vector_sum, the zip version and the current
+# blocked version, summing n vectors of length 100. The old hand-timed
+# comparison found zip faster for few vectors but slower for many, and
+# zip's columns do lose their speed at 10000 vectors. Summing them in
+# blocks of vectors keeps it.
+
+@benchmark('vector.vector_sum', sizes=[10, 100, 1000, 10000])
+def bench_vector_sum(n):
+    from vector import vector_sum
+    vectors = random_vectors(n, 100)
+    return lambda: vector_sum(vectors)
+
+@benchmark('vector.vector_sum_by_reduce', sizes=[10, 100, 1000, 10000])
+def bench_vector_sum_by_reduce(n):
+    from vector import vector_sum_by_reduce
+    vectors = random_vectors(n, 100)
+    return lambda: vector_sum_by_reduce(vectors)
+
+@benchmark('vector.vector_sum_by_zip', sizes=[10, 100, 1000, 10000])
+def bench_vector_sum_by_zip(n):
+    from vector import vector_sum_by_zip
+    vectors = random_vectors(n, 100)
+    return lambda: vector_sum_by_zip(vectors)
+
+@benchmark('vector.batch_squared_distance', sizes=[100, 1000, 10000])
+def bench_batch_squared_distance(n):
+    from vector import batch_squared_distance
+    vectors = random_vectors(n, 10)
+    w = random_vectors(1, 10)[0]
+    return lambda: batch_squared_distance(vectors, w)
+
+
+# ------------------------------------------------------------
+# matrices, chapter 4
+# ------------------------------------------------------------
+
+@benchmark('matrix.matrix_multiply.lists', sizes=[10, 50, 100])
+def bench_matrix_multiply_lists(n):
+    from matrix import matrix_multiply
+    A, B = random_vectors(n, n), random_vectors(n, n)
+    return lambda: matrix_multiply(A, B)
+
+@benchmark('matrix.matrix_multiply.python', sizes=[10, 50, 100])
+def bench_matrix_multiply_python(n):
+    from matrix import Matrix, matrix_multiply
+    A, B = Matrix(random_vectors(n, n)), Matrix(random_vectors(n, n))
+    return lambda: matrix_multiply(A, B, backend='python')
+
+@benchmark('matrix.matrix_multiply.numpy', sizes=[10, 50, 100, 500])
+def bench_matrix_multiply_numpy(n):
+    import numpy
+    from matrix import Matrix, matrix_multiply
+    A, B = Matrix(random_vectors(n, n)), Matrix(random_vectors(n, n))
+    return lambda: matrix_multiply(A, B, backend='numpy')
+
+
+# ------------------------------------------------------------
+# statistics, chapter 5
+# ------------------------------------------------------------
+
+@benchmark('stats.variance', sizes=[1000, 10000, 100000])
+def bench_variance(n):
+    from stats import variance
+    xs = [random.random() for _ in range(n)]
+    return lambda: variance(xs)
+
+@benchmark('stats.correlation', sizes=[1000, 10000, 100000])
+def bench_correlation(n):
+    from stats import correlation
+    xs = [random.random() for _ in range(n)]
+    ys = [x + random.random() for x in xs]
+    return lambda: correlation(xs, ys)
+
+@benchmark('stats.median', sizes=[1000, 10000, 100000])
+def bench_median(n):
+    from stats import median
+    xs = [random.random() for _ in range(n)]
+    return lambda: median(xs)
+
+@benchmark('stats.interquartile_range', sizes=[1000, 10000, 100000])
+def bench_interquartile_range(n):
+    from stats import interquartile_range
+    xs = [random.random() for _ in range(n)]
+    return lambda: interquartile_range(xs)
+
+@benchmark('stats.hist', sizes=[10, 100, 1000])
+def bench_hist(num_breaks):
+    from stats import hist
+    xs = [random.random() for _ in range(10000)]
+    breaks = [i / num_breaks for i in range(1, num_breaks)]
+    return lambda: hist(xs, breaks)
+
+@benchmark('stats.hist.uneven', sizes=[10, 100, 1000])
+def bench_hist_uneven(num_breaks):
+    from stats import hist
+    xs = [random.random() for _ in range(10000)]
+    breaks = sorted(random.random() for _ in range(num_breaks - 1))
+    return lambda: hist(xs, breaks)
+
+
+# ------------------------------------------------------------
+# normal distribution, chapter 6
+# ------------------------------------------------------------
+
+@benchmark('normal.inverse_normal_cdf', sizes=[100, 1000])
+def bench_inverse_normal_cdf(n):
+    from normal import inverse_normal_cdf
+    ps = [random.random() for _ in range(n)]
+    return lambda: [inverse_normal_cdf(p) for p in ps]
+
+
+# ------------------------------------------------------------
+# hypothesis testing, chapter 7
+# ------------------------------------------------------------
+
+@benchmark('monte_carlo.binomial_counts', sizes=[100, 1000, 10000])
+def bench_binomial_counts(n):
+    from monte_carlo import binomial_counts
+    return lambda: binomial_counts(n, 0.5, 1000)
+
+
+# ------------------------------------------------------------
+# gradient descent, chapter 8
+# ------------------------------------------------------------
+
+@benchmark('gradient_descent.minimize_batch', sizes=[2, 5, 10])
+def bench_minimize_batch(d):
+    from gradient_descent import minimize_batch, sum_of_squares, est_gradient_sum_of_squares
+    theta_0 = [random.uniform(-10, 10) for _ in range(d)]
+    return lambda: minimize_batch(sum_of_squares, est_gradient_sum_of_squares, theta_0)
+
+@benchmark('gradient_descent.minimize_batch.armijo', sizes=[2, 5, 10])
+def bench_minimize_batch_armijo(d):
+    from gradient_descent import minimize_batch, sum_of_squares, est_gradient_sum_of_squares
+    theta_0 = [random.uniform(-10, 10) for _ in range(d)]
+    return lambda: minimize_batch(sum_of_squares, est_gradient_sum_of_squares, theta_0,
+                                  line_search='armijo')
+
+@benchmark('gradient_descent.minimize_stochastic', sizes=[100, 1000])
+def bench_minimize_stochastic(n):
+    from gradient_descent import minimize_stochastic
+    x = [[1, random.random(), random.random()] for _ in range(n)]
+    y = [1 + 2 * x_i[1] - 3 * x_i[2] + random.gauss(0, 0.1) for x_i in x]
+
+    def squared_error(x_i, y_i, beta):
+        return (y_i - sum(a * b for a, b in zip(x_i, beta))) ** 2
+
+    def squared_error_gradient(x_i, y_i, beta):
+        error = y_i - sum(a * b for a, b in zip(x_i, beta))
+        return [-2 * x_ij * error for x_ij in x_i]
+
+    def run():
+        random.seed(0)
+        return minimize_stochastic(squared_error, squared_error_gradient,
+                                   x, y, [0.0, 0.0, 0.0], 0.01)
+    return run
+
+@benchmark('gradient_descent.minimize_minibatch', sizes=[100, 1000])
+def bench_minimize_minibatch(n):
+    from gradient_descent import minimize_minibatch
+    x = [[1, random.random(), random.random()] for _ in range(n)]
+    y = [1 + 2 * x_i[1] - 3 * x_i[2] + random.gauss(0, 0.1) for x_i in x]
+
+    def squared_error(x_i, y_i, beta):
+        return (y_i - sum(a * b for a, b in zip(x_i, beta))) ** 2
+
+    def squared_error_gradient(x_i, y_i, beta):
+        error = y_i - sum(a * b for a, b in zip(x_i, beta))
+        return [-2 * x_ij * error for x_ij in x_i]
+
+    return lambda: minimize_minibatch(squared_error, squared_error_gradient,
+                                      x, y, [0.0, 0.0, 0.0], 0.05, method='adam', seed=0)
+
+
+# ------------------------------------------------------------
+# nearest neighbors, chapter 12
+# ------------------------------------------------------------
+
+# 100 queries for the 5 nearest of 2000 uniform random points, by dimension.
+# The trees win in low dimensions, and as the dimension grows distances
+# bunch up until pruning stops paying for itself and the 'scan' backend
+# wins.
+
+def bench_spatial(backend, dim):
+    from spatial import make_index
+    index = make_index(random_vectors(2000, dim), backend)
+    queries = random_vectors(100, dim)
+    return lambda: [index.query(q, 5) for q in queries]
+
+@benchmark('spatial.scan', sizes=[2, 8, 32, 128])
+def bench_spatial_scan(dim):
+    return bench_spatial('scan', dim)
+
+@benchmark('spatial.brute', sizes=[2, 8, 32, 128])
+def bench_spatial_brute(dim):
+    return bench_spatial('brute', dim)
+
+@benchmark('spatial.kd', sizes=[2, 8, 32, 128])
+def bench_spatial_kd(dim):
+    return bench_spatial('kd', dim)
+
+@benchmark('spatial.ball', sizes=[2, 8, 32, 128])
+def bench_spatial_ball(dim):
+    return bench_spatial('ball', dim)
+
+
+# ------------------------------------------------------------
+# naive Bayes, chapter 13
+# ------------------------------------------------------------
+
+# The same problems as notebook.naive_bayes, for comparison. The
+# random_messages helper is with the notebook benchmarks below.
+
+@benchmark('naive_bayes.train', sizes=[1000, 10000])
+def bench_naive_bayes_partial_fit(n):
+    from naive_bayes import NaiveBayesClassifier
+    messages = random_messages(n)
+    return lambda: NaiveBayesClassifier().train(messages).model()
+
+@benchmark('naive_bayes.classify', sizes=[100, 1000, 10000])
+def bench_naive_bayes_classify_many(n):
+    from naive_bayes import NaiveBayesClassifier
+    classifier = NaiveBayesClassifier().train(random_messages(5000))
+    messages = [message for message, _ in random_messages(n)]
+    return lambda: classifier.classify_many(messages)
+
+
+# ------------------------------------------------------------
+# logistic regression, chapter 16
+# ------------------------------------------------------------
+
+@benchmark('logistic_regression.rescale', sizes=[1000, 10000])
+def bench_rescale(n):
+    from logistic_regression import rescale
+    data = random_vectors(n, 20)
+    return lambda: rescale(data)
+
+
+# Scoring n rows of 10 features, in batches and a row at a time. Divide n
+# by the time for rows per second.
+
+def logistic_data(n, d=10):
+    x = [[1.0] + [random.gauss(0, 1) for _ in range(d - 1)] for _ in range(n)]
+    y = [random.randint(0, 1) for _ in range(n)]
+    beta = [random.gauss(0, 1) for _ in range(d)]
+    return x, y, beta
+
+@benchmark('logistic_regression.predict_proba_many', sizes=[1000, 10000, 100000])
+def bench_predict_proba_many(n):
+    from logistic_regression import predict_proba_many
+    x, _, beta = logistic_data(n)
+    return lambda: predict_proba_many(x, beta)
+
+@benchmark('logistic_regression.predict_proba_rows', sizes=[1000, 10000, 100000])
+def bench_predict_proba_rows(n):
+    from logistic_regression import logistic
+    from vector import dot
+    x, _, beta = logistic_data(n)
+    return lambda: [logistic(dot(x_i, beta)) for x_i in x]
+
+@benchmark('logistic_regression.log_likelihood_many', sizes=[1000, 10000, 100000])
+def bench_log_likelihood_many(n):
+    from logistic_regression import logistic_log_likelihood_many
+    x, y, beta = logistic_data(n)
+    return lambda: logistic_log_likelihood_many(x, y, beta)
+
+@benchmark('logistic_regression.log_likelihood_rows', sizes=[1000, 10000, 100000])
+def bench_log_likelihood_rows(n):
+    from logistic_regression import logistic_log_likelihood
+    x, y, beta = logistic_data(n)
+    return lambda: logistic_log_likelihood(x, y, beta)
+
+@benchmark('logistic_regression.log_gradient_many', sizes=[1000, 10000, 100000])
+def bench_log_gradient_many(n):
+    from logistic_regression import logistic_log_gradient_many
+    x, y, beta = logistic_data(n)
+    return lambda: logistic_log_gradient_many(x, y, beta)
+
+@benchmark('logistic_regression.log_gradient_rows', sizes=[1000, 10000])
+def bench_log_gradient_rows(n):
+    from logistic_regression import logistic_log_gradient
+    x, y, beta = logistic_data(n)
+    return lambda: logistic_log_gradient(x, y, beta)
+
+
+# ------------------------------------------------------------
+# decision trees, chapter 17
+# ------------------------------------------------------------
+
+def random_categorical(n, num_attributes=10):
+    rows = []
+    for _ in range(n):
+        x = {'a{}'.format(j): random.choice('abcde') for j in range(num_attributes)}
+        rows.append((x, (x['a0'] in 'ab') != (x['a1'] == 'c') or random.random() < 0.1))
+    return rows
+
+@benchmark('decision_trees.build_tree_id3', sizes=[100, 1000, 10000])
+def bench_build_tree_id3(n):
+    from decision_trees import build_tree_id3
+    inputs = random_categorical(n)
+    return lambda: build_tree_id3(inputs)
+
+@benchmark('decision_trees.forest_classify_many', sizes=[100, 1000, 10000])
+def bench_forest_classify_many(n):
+    from decision_trees import build_forest, compile_forest, forest_classify_many
+    forest = compile_forest(build_forest(random_categorical(1000), n=10))
+    inputs = [x for x, _ in random_categorical(n)]
+    return lambda: forest_classify_many(forest, inputs)
+
+@benchmark('decision_trees.forest_classify', sizes=[100, 1000, 10000])
+def bench_forest_classify(n):
+    from decision_trees import build_forest, forest_classify
+    trees = build_forest(random_categorical(1000), n=10)
+    inputs = [x for x, _ in random_categorical(n)]
+    return lambda: [forest_classify(trees, x) for x in inputs]
+
+
+# ------------------------------------------------------------
+# neural networks, chapter 18
+# ------------------------------------------------------------
+
+# 100 epochs of the digit example, by batch size. A batch size of 1 is
+# the notebook's backpropagate.
+
+@benchmark('neural_network.train', sizes=[1, 5, 10])
+def bench_neural_network_train(batch_size):
+    from digits import inputs, targets
+    from neural_network import NeuralNetwork
+    weights = NeuralNetwork.random([25, 5, 10]).to_weights()
+    return lambda: NeuralNetwork.from_weights(weights).train(inputs, targets, 100,
+                                                             batch_size=batch_size)
+
+
+# ------------------------------------------------------------
+# clustering, chapter 19
+# ------------------------------------------------------------
+
+# The same problems as notebook.kmeans, for comparison.
+
+@benchmark('kmeans.train', sizes=[100, 1000, 10000])
+def bench_kmeans_train(n):
+    from kmeans import KMeans
+    inputs = clustered_points(n)
+    return lambda: KMeans(5).train(inputs, rng=random.Random(0))
+
+@benchmark('kmeans.train_minibatch', sizes=[100, 1000, 10000])
+def bench_kmeans_train_minibatch(n):
+    from kmeans import KMeans
+    inputs = clustered_points(n)
+    return lambda: KMeans(5).train_minibatch(inputs, rng=random.Random(0))
+
+@benchmark('hierarchical.linkage', sizes=[100, 1000])
+def bench_linkage(n):
+    from hierarchical import linkage
+    inputs = clustered_points(n)
+    return lambda: linkage(inputs, 'average')
+
+
+# ------------------------------------------------------------
+# n-grams, chapter 20
+# ------------------------------------------------------------
+
+# Trigram models of random documents of n tokens, the same problems as
+# notebook.trigrams. The random_document helper is with the notebook
+# benchmarks below.
+
+@benchmark('ngrams.fit', sizes=[10000, 100000])
+def bench_ngrams_fit(n):
+    from ngrams import NgramModel
+    document = random_document(n)
+    return lambda: NgramModel(3).partial_fit(document)
+
+@benchmark('ngrams.generate', sizes=[10000, 100000])
+def bench_ngrams_generate(n):
+    from ngrams import NgramModel
+    model = NgramModel(3).partial_fit(random_document(n))
+    rng = random.Random(0)
+    return lambda: [model.generate(rng) for _ in range(100)]
+
+@benchmark('ngrams.load', sizes=[10000, 100000])
+def bench_ngrams_load(n):
+    from ngrams import NgramModel
+    path = os.path.join(tempfile.mkdtemp(), 'model.ngrams')
+    NgramModel(3).partial_fit(random_document(n)).save(path)
+    return lambda: NgramModel.load(path)
+
+
+# ------------------------------------------------------------
+# LDA, chapter 20
+# ------------------------------------------------------------
+
+# One Gibbs sweep over 200 documents of 50 words, by number of topics. The
+# documents mix a few of many underlying topics, so once the sampler has
+# settled each word and document has a few topics and the sparse sampler
+# only looks at those. notebook.lda is the same problem. The
+# topical_documents helper is with the notebook benchmarks below.
+
+def bench_lda(K, sampler):
+    from lda import LDA, SAMPLERS
+    documents = topical_documents(200)
+    model = LDA(K).fit(documents, 20, sampler='sparse', rng=random.Random(0))
+    sweep, rng = SAMPLERS[sampler], random.Random(0)
+    return lambda: sweep(model.documents, model.topics, model.doc_topic, model.word_topic,
+                         model.topic_counts, model.params, 1, rng)
+
+@benchmark('lda.dense', sizes=[4, 16, 64, 256])
+def bench_lda_dense(K):
+    return bench_lda(K, 'dense')
+
+@benchmark('lda.sparse', sizes=[4, 16, 64, 256])
+def bench_lda_sparse(K):
+    return bench_lda(K, 'sparse')
+
+# Ten sweeps over four times the documents, in four shards.
+
+@benchmark('lda.fit_parallel', sizes=[1, 2, 4])
+def bench_lda_fit_parallel(processes):
+    from lda import LDA
+    documents = topical_documents(800)
+    return lambda: LDA(64).fit_parallel(documents, 10, num_shards=4, processes=processes,
+                                        sampler='sparse')
+
+
+# ------------------------------------------------------------
+# notebook algorithms
+# ------------------------------------------------------------
+
+def clustered_points(n, dim=2, k=5):
+    centers = [[random.uniform(-50, 50) for _ in range(dim)] for _ in range(k)]
+    return [[c + random.gauss(0, 5) for c in random.choice(centers)] for _ in range(n)]
+
+@benchmark('notebook.kmeans', sizes=[100, 1000])
+def bench_kmeans(n):
+    from reference import KMeans
+    inputs = clustered_points(n)
+
+    def run():
+        random.seed(0)
+        KMeans(5).train(inputs)
+    return run
+
+def random_endorsements(num_users, num_endorsements):
+    users = [{'id': i, 'endorses': []} for i in range(num_users)]
+    for _ in range(num_endorsements):
+        source, target = random.sample(users, 2)
+        source['endorses'].append(target)
+    return users
+
+@benchmark('notebook.page_rank', sizes=[100, 1000])
+def bench_page_rank(n):
+    from reference import page_rank
+    users = random_endorsements(n, 5 * n)
+    return lambda: page_rank(users, num_iters=20)
+
+def random_messages(n, vocabulary_size=2000, words_per_message=12):
+    vocabulary = ['w{}'.format(i) for i in range(vocabulary_size)]
+    spam_words = vocabulary[:vocabulary_size // 10]
+    messages = []
+    for _ in range(n):
+        is_spam = random.random() < 0.2
+        source = spam_words if is_spam and random.random() < 0.5 else vocabulary
+        messages.append((' '.join(random.choice(source) for _ in range(words_per_message)), is_spam))
+    return messages
+
+@benchmark('notebook.naive_bayes.train', sizes=[1000, 10000])
+def bench_naive_bayes_train(n):
+    from reference import NaiveBayesClassifier
+    messages = random_messages(n)
+    return lambda: NaiveBayesClassifier().train(messages)
+
+@benchmark('notebook.naive_bayes.classify', sizes=[100, 1000])
+def bench_naive_bayes_classify(n):
+    from reference import NaiveBayesClassifier
+    classifier = NaiveBayesClassifier()
+    classifier.train(random_messages(5000))
+    messages = [message for message, _ in random_messages(n)]
+    return lambda: [classifier.classify(message) for message in messages]
+
+def random_document(n, vocabulary_size=5000, sentence_length=15):
+    """n tokens of sentences of words drawn with Zipf-like frequencies"""
+    vocabulary = ['w{}'.format(i) for i in range(vocabulary_size)]
+    weights = [1 / (i + 1) for i in range(vocabulary_size)]
+    document = random.choices(vocabulary, weights, k=n)
+    for i in range(0, n, sentence_length):
+        document[i] = '.'
+    document[-1] = '.'
+    return document
+
+@benchmark('notebook.trigrams.fit', sizes=[10000, 100000])
+def bench_trigrams_fit(n):
+    from reference import trigram_transitions
+    document = random_document(n)
+    return lambda: trigram_transitions(document)
+
+@benchmark('notebook.trigrams.generate', sizes=[10000, 100000])
+def bench_trigrams_generate(n):
+    from reference import trigram_transitions, generate_using_trigrams
+    starts, transitions = trigram_transitions(random_document(n))
+    return lambda: [generate_using_trigrams(starts, transitions) for _ in range(100)]
+
+def topical_documents(num_documents, length=50, num_topics=50, words_per_topic=40):
+    """documents drawing words from 3 of num_topics topics, each its own words"""
+    documents = []
+    for _ in range(num_documents):
+        topics = random.sample(range(num_topics), 3)
+        documents.append(['w{}'.format(random.choice(topics) * words_per_topic +
+                                       random.randrange(words_per_topic))
+                          for _ in range(length)])
+    return documents
+
+@benchmark('notebook.lda', sizes=[4, 16, 64])
+def bench_notebook_lda(K):
+    from reference import lda
+    documents = topical_documents(200)
+    # one sweep, plus the setup, which is small next to it
+    return lambda: lda(documents, K, 1)
+
+
+# ------------------------------------------------------------
+# command line
+# ------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run or compare benchmarks.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run benchmarks')
+    run_parser.add_argument('-k', '--pattern', help='only run benchmarks whose name matches this regex')
+    run_parser.add_argument('-o', '--output', help='save results to this JSON file')
+    run_parser.add_argument('--max-size', type=int, help='skip problem sizes larger than this')
+    run_parser.add_argument('--warmup', type=int, default=1, help='untimed calls before timing')
+    run_parser.add_argument('--repeat', type=int, default=5, help='number of timings per case')
+    run_parser.add_argument('--min-time', type=float, default=0.02,
+                            help='minimum seconds per timing, loops are added to reach it')
+    run_parser.add_argument('--seed', type=int, default=0, help='random seed for generating inputs')
+
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='fractional slowdown that counts as a regression')
+    compare_parser.add_argument('--stat', default='median', choices=['min', 'median', 'mean'])
+
+    subparsers.add_parser('list', help='list benchmarks')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name, (_, sizes) in sorted(harness.BENCHMARKS.items()):
+            print('{:<40} {}'.format(name, sizes))
+        return 0
+
+    if args.command == 'run':
+        results = harness.run(args.pattern, args.max_size, args.warmup, args.repeat,
+                              args.min_time, args.seed,
+                              report=lambda r: print(harness.format_result(r)))
+        if args.output:
+            harness.save(results, args.output)
+        return 0
+
+    rows = harness.compare(harness.load(args.baseline), harness.load(args.current),
+                           args.threshold, args.stat)
+    print(harness.format_comparison(rows))
+    slower = harness.regressions(rows)
+    if slower:
+        print('\n{} regression(s) beyond {:.0%}'.format(len(slower), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
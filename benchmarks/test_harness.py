@@ -0,0 +1,62 @@
+"""
+Tests for the benchmark harness
+"""
+import json
+import harness
+from harness import *
+
+
+def results(**medians):
+    return {'meta': {}, 'results': [
+        {'name': name, 'size': 10, 'min': t, 'median': t, 'mean': t}
+        for name, t in medians.items()]}
+
+
+def test_measure():
+    calls = []
+    stats = measure(lambda: calls.append(1), warmup=2, repeat=3, min_time=0.001)
+    assert stats['repeat'] == 3
+    assert stats['loops'] >= 1
+    assert 0 < stats['min'] <= stats['median'] <= max(stats['mean'], stats['median'])
+    assert len(calls) >= 2 + 3 * stats['loops']
+
+
+def test_compare():
+    baseline = results(a=1.0, b=1.0, c=1.0, gone=1.0)
+    current = results(a=1.05, b=1.5, c=0.5, new=1.0)
+    rows = {row['name']: row for row in compare(baseline, current, threshold=0.1)}
+    assert rows['a']['status'] == 'same'
+    assert rows['b']['status'] == 'slower'
+    assert rows['b']['ratio'] == 1.5
+    assert rows['c']['status'] == 'faster'
+    assert rows['gone']['status'] == 'removed'
+    assert rows['new']['status'] == 'added'
+    assert [row['name'] for row in regressions(compare(baseline, current))] == ['b']
+
+
+def test_skipped_results_are_not_compared():
+    baseline = results(a=1.0)
+    current = {'meta': {}, 'results': [{'name': 'a', 'size': 10, 'skipped': 'no numpy'}]}
+    assert compare(baseline, current)[0]['status'] == 'removed'
+
+
+def test_run_and_save(tmp_path, monkeypatch):
+    # register into an empty registry of the test's own
+    monkeypatch.setattr(harness, 'BENCHMARKS', {})
+
+    @benchmark('test.sum', sizes=[10, 1000])
+    def bench_sum(n):
+        xs = list(range(n))
+        return lambda: sum(xs)
+
+    @benchmark('test.missing', sizes=[1])
+    def bench_missing(n):
+        import no_such_module
+
+    out = run(max_size=100, repeat=2, min_time=0.001)
+    assert [(r['name'], r['size']) for r in out['results']] == [('test.missing', 1), ('test.sum', 10)]
+    assert 'skipped' in out['results'][0]
+
+    path = tmp_path / 'results.json'
+    save(out, path)
+    assert load(path) == json.loads(json.dumps(out))
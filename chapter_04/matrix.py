@@ -4,8 +4,124 @@ Matrix
 Code from Chapter 4 of Data Science from Scratch
 """
 import math
+from array import array
+from operator import mul
 from vector import dot
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Joel represents matrices as lists of lists, which is how the helpers below
+# still treat them. The Matrix class packs the same numbers into one
+# contiguous row-major buffer of doubles. Rows and columns of a Matrix are
+# handed out as memoryviews over that buffer, so they're views, not copies.
+
+class Matrix:
+    """
+    a dense matrix of floats stored in a contiguous row-major array('d')
+    """
+    __slots__ = ('data', 'shape')
+
+    def __init__(self, rows=(), shape=None, data=None):
+        if data is not None:
+            if shape is None or len(data) != shape[0] * shape[1]:
+                raise ValueError("data doesn't match shape {}".format(shape))
+            self.data = data if isinstance(data, array) else array('d', data)
+            self.shape = tuple(shape)
+        else:
+            rows = [list(row) for row in rows]
+            num_cols = len(rows[0]) if rows else 0
+            if any(len(row) != num_cols for row in rows):
+                raise ValueError("rows must all be the same length")
+            self.data = array('d', (x for row in rows for x in row))
+            self.shape = (len(rows), num_cols)
+
+    @classmethod
+    def zeros(cls, num_rows, num_cols):
+        return cls(shape=(num_rows, num_cols),
+                   data=array('d', bytes(8 * num_rows * num_cols)))
+
+    @classmethod
+    def from_function(cls, num_rows, num_cols, fn):
+        """the Matrix whose (i,j)th entry is fn(i, j)"""
+        return cls(shape=(num_rows, num_cols),
+                   data=array('d', (fn(i, j) for i in range(num_rows)
+                                             for j in range(num_cols))))
+
+    @classmethod
+    def identity(cls, n):
+        m = cls.zeros(n, n)
+        m.data[::n + 1] = array('d', [1.0]) * n
+        return m
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            i, j = index
+            return self.data[i * self.shape[1] + j]
+        return self.row(index)
+
+    def __setitem__(self, index, value):
+        i, j = index
+        self.data[i * self.shape[1] + j] = value
+
+    def __iter__(self):
+        return (self.row(i) for i in range(self.shape[0]))
+
+    def __eq__(self, other):
+        if isinstance(other, Matrix):
+            return self.shape == other.shape and self.data == other.data
+        return self.tolist() == [list(row) for row in other]
+
+    def __repr__(self):
+        return 'Matrix({})'.format(self.tolist())
+
+    def row(self, i):
+        """a view of the ith row"""
+        num_rows, num_cols = self.shape
+        if not -num_rows <= i < num_rows:
+            raise IndexError("row index out of range")
+        start = (i % num_rows) * num_cols
+        return memoryview(self.data)[start:start + num_cols]
+
+    def column(self, j):
+        """a strided view of the jth column"""
+        num_rows, num_cols = self.shape
+        if not -num_cols <= j < num_cols:
+            raise IndexError("column index out of range")
+        return memoryview(self.data)[j % num_cols::num_cols]
+
+    def transpose(self):
+        num_rows, num_cols = self.shape
+        data = array('d', bytes(8 * num_rows * num_cols))
+        for j in range(num_cols):
+            data[j * num_rows:(j + 1) * num_rows] = self.data[j::num_cols]
+        return Matrix(shape=(num_cols, num_rows), data=data)
+
+    def tolist(self):
+        num_cols = self.shape[1]
+        return [self.data[i:i + num_cols].tolist()
+                for i in range(0, len(self.data), num_cols)]
+
+    def as_numpy(self):
+        """a numpy array sharing this matrix's buffer"""
+        return np.frombuffer(self.data, dtype=float).reshape(self.shape)
+
+
+def as_matrix(A):
+    """adapt a list of lists (or a numpy array) to a Matrix"""
+    if isinstance(A, Matrix):
+        return A
+    if np is not None and isinstance(A, np.ndarray):
+        A = np.ascontiguousarray(A, dtype=float)
+        return Matrix(shape=A.shape, data=array('d', A.tobytes()))
+    return Matrix(A)
+
 
 def rows(A):
     return len(A)
@@ -14,12 +130,16 @@ def cols(A):
     return A.shape[1] if hasattr(A, 'shape') else (len(A[0]) if A else 0)
 
 def shape(A):
+    if isinstance(A, Matrix):
+        return A.shape
     return rows(A), cols(A)
 
 def get_row(A, i):
     return A[i]
 
 def get_column(A, j):
+    if isinstance(A, Matrix):
+        return A.column(j)
     return [A_i[j] for A_i in A]
 
 def make_matrix(num_rows, num_cols, fn):
@@ -36,10 +156,102 @@ def is_diagonal(i, j):
 def identity(n):
     return make_matrix(n, n, is_diagonal)
 
-def matrix_multiply(A, B):
+
+# Matrix multiplication
+#
+# The book's version computed [[dot(row, col) for col in zip(*B)] for row in A],
+# which rebuilds the transpose of B once for every row of A. The list path
+# below transposes once. The Matrix path transposes B once into a contiguous
+# buffer and reads both buffers out as lists of floats, so each number is
+# boxed once rather than on every multiply, then dots every row of A with
+# every row of the transpose. Backends are pluggable: 'numpy' hands the
+# buffers to BLAS without copying, and is used by default when it's installed.
+
+def _python_multiply(A, B):
+    n, k = A.shape
+    m = B.shape[1]
+    a = A.data.tolist()
+    bt = B.transpose().data.tolist()
+    b_cols = [bt[j * k:(j + 1) * k] for j in range(m)]
+    c = array('d')
+    for i in range(n):
+        a_row = a[i * k:(i + 1) * k]
+        c.extend([sum(map(mul, a_row, b_col)) for b_col in b_cols])
+    return Matrix(shape=(n, m), data=c)
+
+def _numpy_multiply(A, B):
+    C = Matrix.zeros(A.shape[0], B.shape[1])
+    np.matmul(A.as_numpy(), B.as_numpy(), out=C.as_numpy())
+    return C
+
+BACKENDS = {'python': _python_multiply}
+if np is not None:
+    BACKENDS['numpy'] = _numpy_multiply
+
+default_backend = 'numpy' if np is not None else 'python'
+
+def set_backend(name):
+    """choose the backend used to multiply Matrix objects"""
+    global default_backend
+    if name not in BACKENDS:
+        raise ValueError("Unknown backend {}, choose from {}".format(
+            name, ', '.join(sorted(BACKENDS))))
+    default_backend = name
+
+def matrix_multiply(A, B, backend=None):
     if cols(A) != rows(B):
         raise RuntimeError("Can't multiply matrices with dimensions {} and {}".format(
             shape(A), shape(B)))
 
-    return [[dot(row,col) for col in zip(*B)] for row in A]
+    # lists of lists in, lists of lists out
+    if not isinstance(A, Matrix) and not isinstance(B, Matrix) and backend is None:
+        B_columns = list(zip(*B))
+        return [[dot(row, col) for col in B_columns] for row in A]
+
+    multiply = BACKENDS[backend or default_backend]
+    return multiply(as_matrix(A), as_matrix(B))
+
+
+# Solving linear systems
+#
+# A symmetric positive definite matrix A, like the X^T X of least squares,
+# factors as L L^T with L lower triangular. Solving A x = b is then a
+# forward substitution with L followed by a back substitution with L^T.
+# These work on lists of lists, or anything with rows that index like them.
+
+def cholesky(A):
+    """
+    the lower triangular L with L L^T == A, for symmetric positive
+    definite A. Raises ValueError if A isn't positive definite.
+    """
+    n = rows(A)
+    L = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        L_i = L[i]
+        for j in range(i + 1):
+            L_j = L[j]
+            s = A[i][j] - sum(map(mul, L_i[:j], L_j[:j]))
+            if i == j:
+                if s <= 0:
+                    raise ValueError("Matrix is not positive definite")
+                L_i[i] = math.sqrt(s)
+            else:
+                L_i[j] = s / L_j[j]
+    return L
+
+def cholesky_solve(L, b):
+    """solve L L^T x = b given the Cholesky factor L"""
+    n = len(L)
+    # forward substitution, L z = b
+    z = [0.0] * n
+    for i in range(n):
+        z[i] = (b[i] - sum(map(mul, L[i][:i], z[:i]))) / L[i][i]
+    # back substitution, L^T x = z
+    x = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (z[i] - sum(L[k][i] * x[k] for k in range(i + 1, n))) / L[i][i]
+    return x
 
+def solve_spd(A, b):
+    """solve A x = b for symmetric positive definite A"""
+    return cholesky_solve(cholesky(A), b)
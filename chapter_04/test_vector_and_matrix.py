@@ -2,7 +2,7 @@
 Test vector and matrix operations
 """
 from matrix import *
-from vector import dot
+from vector import *
 
 
 def test_matrix_multiple():
@@ -19,43 +19,122 @@ def test_matrix_multiple():
     assert matrix_multiply(A, B) == [[83, 63, 37, 75]]
 
 
-# worrying about performance here is silly, but...
-def _compare_vector_sum_implementations(vector_len, num_of_vectors, number=100):
-    import timeit
-
-    lots_of_vectors = [[random.random() for i in range(vector_len)] for _ in range(num_of_vectors)]
-    return (timeit.timeit(lambda : vector_sum(lots_of_vectors), number=number) / number,
-            timeit.timeit(lambda : vector_sum_by_zip(lots_of_vectors), number=number) / number)
-
-def _test_perf_vector_sum():
-    # Outputs:
-
-    #   vector_len    num_of_vectors    reduce      zip
-    # ------------  ----------------  --------  -------
-    #           10                10   0.00001  0.00000
-    #           10               100   0.00015  0.00002
-    #           10              1000   0.00183  0.00029
-    #           10              5000   0.00913  0.00266
-    #           10             10000   0.01617  0.00869
-    #          100                10   0.00009  0.00005
-    #          100               100   0.00093  0.00021
-    #          100              1000   0.00984  0.00400
-    #          100              5000   0.06485  0.09937
-    #          100             10000   0.14297  0.23023
-    #         1000                10   0.00132  0.00056
-    #         1000               100   0.01388  0.00429
-    #         1000              1000   0.13434  0.11415
-    #         1000              5000   0.66533  1.35771
-    #         1000             10000   1.42573  3.34425
-
-    # What do we learn from this?
-
-    # The zip implementation starts out faster, but looses out as the size and
-    # number of vectors increases. This might have something to do with loss of
-    # locality due to iterating over vectors in the inner loop.
-    import tabulate
-
-    perf = [(vector_len, num_of_vectors)+_compare_vector_sum_implementations(vector_len, num_of_vectors, number=100)
-            for vector_len in (10, 100, 1000)
-            for num_of_vectors in (10, 100, 1000, 5000, 10000)]
-    print(tabulate(perf, headers='vector_len, num_of_vectors, reduce, zip'.split(', '), floatfmt=".5f"))
+def test_matrix_multiply_matrix_objects():
+    A = Matrix([[1, 2, 3], [4, 5, 6]])
+    B = Matrix([[7, 8], [9, 10], [11, 12]])
+    for name in BACKENDS:
+        C = matrix_multiply(A, B, backend=name)
+        assert isinstance(C, Matrix)
+        assert C == [[58, 64], [139, 154]]
+
+    # mixing a Matrix with a list of lists gives a Matrix
+    assert matrix_multiply(A, [[7, 8], [9, 10], [11, 12]]) == [[58, 64], [139, 154]]
+
+
+def test_blocked_multiply_matches_list_multiply():
+    import random
+    random.seed(0)
+    A = [[random.random() for _ in range(7)] for _ in range(5)]
+    B = [[random.random() for _ in range(9)] for _ in range(7)]
+    expected = matrix_multiply(A, B)
+    C = matrix_multiply(Matrix(A), Matrix(B), backend='python')
+    assert all(abs(c - e) < 1e-12
+               for c_row, e_row in zip(C.tolist(), expected)
+               for c, e in zip(c_row, e_row))
+
+
+def test_matrix_views():
+    A = Matrix([[1, 2, 3], [4, 5, 6]])
+    assert shape(A) == (2, 3)
+    assert list(get_row(A, 1)) == [4, 5, 6]
+    assert list(get_column(A, 2)) == [3, 6]
+    assert A[1][2] == A[1, 2] == 6
+
+    # views share the buffer
+    column = get_column(A, 0)
+    A[1, 0] = 40
+    assert list(column) == [1, 40]
+    get_row(A, 0)[1] = 20
+    assert A.tolist() == [[1, 20, 3], [40, 5, 6]]
+
+    assert A.transpose() == [[1, 40], [20, 5], [3, 6]]
+    assert Matrix.identity(3) == identity(3)
+    assert Matrix.from_function(2, 2, lambda i, j: i * 2 + j) == [[0, 1], [2, 3]]
+
+
+def test_vector_add_keeps_container_type():
+    assert vector_add([1, 2, 3], [10, 20, 30]) == [11, 22, 33]
+    assert vector_subtract([1, 2, 3], [10, 20, 30]) == [-9, -18, -27]
+
+    v = vector_add(Vector([1, 2, 3]), [10, 20, 30])
+    assert isinstance(v, Vector)
+    assert v.tolist() == [11.0, 22.0, 33.0]
+
+
+def test_as_vector():
+    v = as_vector([1, 2, 3])
+    assert isinstance(v, Vector)
+    assert as_vector(v) is v
+    assert Vector.zeros(3).tolist() == [0.0, 0.0, 0.0]
+
+
+def test_dot_and_distance():
+    assert dot([1, 2, 3], [4, 5, 6]) == 32
+    assert dot(Vector([1, 2, 3]), Vector([4, 5, 6])) == 32.0
+    assert squared_distance([0, 0], [3, 4]) == 25
+    assert squared_distance([0, 0], [1, 1]) == 2
+    assert distance(Vector([0, 0]), Vector([3, 4])) == 5.0
+
+
+def test_vector_sum():
+    vectors = [[1, 2], [3, 4], [5, 6]]
+    assert vector_sum(vectors) == [9, 12]
+    assert vector_sum(iter(vectors)) == [9, 12]
+    assert vector_sum(vectors) == vector_sum_by_reduce(vectors) == vector_sum_by_zip(vectors)
+    assert vector_sum([Vector(v) for v in vectors]).tolist() == [9.0, 12.0]
+    many = [[i, 2 * i, -i] for i in range(1000)]
+    assert vector_sum(many) == vector_sum(iter(many)) == vector_sum_by_reduce(many)
+    assert vector_mean(vectors) == [3.0, 4.0]
+
+    # vector_sum must not alias its first argument
+    first = [1, 2]
+    vector_sum([first, [3, 4]])
+    assert first == [1, 2]
+
+
+def test_in_place():
+    v = [1, 2, 3]
+    assert iadd(v, [1, 1, 1]) is v
+    assert v == [2, 3, 4]
+    isub(v, [2, 2, 2])
+    assert v == [0, 1, 2]
+    iscale(2, v)
+    assert v == [0, 2, 4]
+
+    y = Vector([1, 1, 1])
+    assert axpy(2, [1, 2, 3], y) is y
+    assert y.tolist() == [3.0, 5.0, 7.0]
+
+
+def test_batched():
+    vectors = [[1, 0], [0, 1], [3, 4]]
+    assert batch_dot(vectors, [2, 3]) == [2, 3, 18]
+    assert batch_squared_distance(vectors, [0, 0]) == [1, 1, 25]
+    assert batch_add(vectors, [1, 1]) == [[2, 1], [1, 2], [4, 5]]
+
+
+
+def test_cholesky_solve():
+    A = [[4, 12, -16], [12, 37, -43], [-16, -43, 98]]
+    L = cholesky(A)
+    assert L == [[2, 0, 0], [6, 1, 0], [-8, 5, 3]]
+    x = solve_spd(A, [1, 2, 3])
+    Ax = [row[0] for row in matrix_multiply(A, [[x_i] for x_i in x])]
+    assert all(abs(a - b) < 1e-9 for a, b in zip(Ax, [1, 2, 3]))
+    assert solve_spd(Matrix(A), [1, 2, 3]) == x
+
+    try:
+        cholesky([[1, 2], [2, 1]])
+        assert False, "should have raised ValueError"
+    except ValueError:
+        pass
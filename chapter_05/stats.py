@@ -4,8 +4,21 @@ Stats
 Code from Chapter 5 of Data Science from Scratch
 """
 import math
+import random
+from array import array
+from bisect import bisect_right
 from collections import Counter
-from vector import dot
+from functools import partial
+from itertools import islice, repeat
+from operator import lt, mul
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _is_ndarray(x):
+    return np is not None and isinstance(x, np.ndarray)
 
 def find_bin(x, breaks):
     """
@@ -20,18 +33,92 @@ def find_bin(x, breaks):
     For examples, breaks=[10, 20] creates three buckets: numbers less than 10,
     numbers in [10, 20) and numbers >= 20.
     """
-    i = len(breaks)
-    while i > 0 and x < breaks[i-1]:
-        i -= 1
-    return i
+    return bisect_right(breaks, x)
+
+
+# Binning
+#
+# find_bin is a binary search, so binning costs O(log k) per value for k
+# breaks instead of walking the breaks. When the breaks are evenly spaced,
+# make_binner computes the bucket arithmetically and then corrects the
+# guess by at most one bucket against the actual breaks, so floating point
+# rounding can't put a value in the wrong bucket. bisect is implemented in
+# C, so the arithmetic only wins once there are many thousands of breaks.
+
+HIST_CHUNK_SIZE = 65536
+ARITHMETIC_BINNING_MIN_BREAKS = 10000
+
+def _uniform_width(breaks, rel_tol=1e-9):
+    """the common width of evenly spaced breaks, or None"""
+    if len(breaks) < 3:
+        return None
+    width = (breaks[-1] - breaks[0]) / (len(breaks) - 1)
+    if not width > 0:
+        return None
+    tol = width * rel_tol
+    if all(abs(b - a - width) <= tol for a, b in zip(breaks, breaks[1:])):
+        return width
+    return None
+
+
+def make_binner(breaks):
+    """
+    return a function equivalent to lambda x: find_bin(x, breaks), using
+    arithmetic rather than search when the breaks are evenly spaced
+    """
+    breaks = list(breaks)
+    width = None
+    if len(breaks) >= ARITHMETIC_BINNING_MIN_BREAKS:
+        width = _uniform_width(breaks)
+    if width is None:
+        return partial(bisect_right, breaks)
+
+    first, last, top = breaks[0], breaks[-1], len(breaks)
+    scale = 1 / width
+
+    def binner(x):
+        if x < first:
+            return 0
+        if not x < last:
+            # also catches nan, which find_bin puts in the top bucket
+            return top
+        i = int((x - first) * scale) + 1
+        if i >= top:
+            i = top - 1
+        if x < breaks[i - 1]:
+            return i - 1
+        if x >= breaks[i]:
+            return i + 1
+        return i
+
+    return binner
 
 
 def bin(xs, breaks):
-    return [find_bin(x, breaks) for x in xs]
+    if _is_ndarray(xs):
+        return np.searchsorted(breaks, xs, side='right')
+    return list(map(make_binner(breaks), xs))
+
 
+def hist(xs, breaks, chunk_size=HIST_CHUNK_SIZE):
+    """
+    count the values of xs falling in each bucket defined by breaks. Returns
+    an array of len(breaks) + 1 counts indexed by bucket. xs can be an
+    iterator, it's consumed in chunks.
+    """
+    breaks = list(breaks)
+    if np is not None:
+        counts = np.zeros(len(breaks) + 1, dtype=np.int64)
+        chunks = [xs] if _is_ndarray(xs) else _chunks(xs, chunk_size)
+        for chunk in chunks:
+            indices = np.searchsorted(breaks, np.asarray(chunk, dtype=float), side='right')
+            counts += np.bincount(indices, minlength=len(counts))
+        return array('q', counts.tolist())
 
-def hist(xs, breaks):
-    return Counter(bin(xs, breaks))
+    counts = array('q', bytes(8 * (len(breaks) + 1)))
+    for i, count in Counter(map(make_binner(breaks), xs)).items():
+        counts[i] += count
+    return counts
 
 
 def mean(x):
@@ -40,26 +127,118 @@ def mean(x):
 
 def median(v):
     """finds the 'middle-most' value of v"""
-    sorted_v = sorted(v)
+    v = _as_sequence(v)
     n = len(v)
     midpoint = n // 2
 
     if n % 2 == 1:
         # if odd, return the middle value
-        return sorted_v[midpoint]
+        return select(v, midpoint)
     else:
         # if even, return the average of the middle values
-        lo = midpoint - 1
-        hi = midpoint
-        return (sorted_v[lo] + sorted_v[hi]) / 2
+        lo, hi = select_many(v, [midpoint - 1, midpoint])
+        return (lo + hi) / 2
 
 def quantile(x, p):
     """returns the pth-percentile value in x"""
-    p_index = int(p * len(x))
-    return sorted(x)[p_index]
+    x = _as_sequence(x)
+    return select(x, _quantile_index(p, len(x)))
+
+def quantiles(x, ps, epsilon=None):
+    """
+    returns the pth-percentile value in x for each p in ps, using a single
+    partition or sort for all of them.
+
+    If epsilon is given, x is streamed through a QuantileSketch instead, so
+    x can be an iterator over more data than fits in memory. The answers are
+    then approximate: each is within epsilon * len(x) ranks of the exact one.
+    """
+    if epsilon is not None:
+        return QuantileSketch(epsilon, x).quantiles(ps)
+    x = _as_sequence(x)
+    n = len(x)
+    return select_many(x, [_quantile_index(p, n) for p in ps])
 
 def interquartile_range(x):
-    return quantile(x, 0.75) - quantile(x, 0.25)
+    q1, q3 = quantiles(x, [0.25, 0.75])
+    return q3 - q1
+
+
+# Selection
+#
+# median and quantile used to sort the whole input to pick out one or two
+# values. select() finds the kth smallest value in expected O(n) time with
+# Floyd and Rivest's algorithm: sort a small random sample, take two values
+# from it that almost certainly bracket the kth smallest, and keep only the
+# values between them. Each round is one pass of simple comparisons, and the
+# survivors of a round are a tiny fraction of the input. Numpy arrays are
+# handed to numpy.partition. The samples come from a generator of the
+# module's own, so selecting doesn't move the caller's random state.
+
+SMALL_SELECTION = 5000
+_rng = random.Random()
+
+def _as_sequence(x):
+    if hasattr(x, '__len__') and hasattr(x, '__getitem__'):
+        return x
+    return list(x)
+
+def _quantile_index(p, n):
+    if n == 0:
+        raise ValueError("quantile of empty data")
+    # int(p * n) is the book's definition; p=1 gives the largest value
+    return min(int(p * n), n - 1)
+
+def select(xs, k):
+    """returns the kth smallest value of xs, counting from 0"""
+    n = len(xs)
+    if k < 0:
+        k += n
+    if not 0 <= k < n:
+        raise IndexError("select index out of range")
+
+    if _is_ndarray(xs):
+        return xs[k] if xs.ndim == 0 else np.partition(xs, k)[k]
+
+    while n > SMALL_SELECTION:
+        s = int(n ** (2 / 3))
+        sample = sorted(_rng.sample(xs, s))
+        i = k * s // n
+        gap = int(math.sqrt(s))
+        lo = sample[max(i - gap, 0)]
+        hi = sample[min(i + gap, s - 1)]
+
+        num_below = sum(map(lt, xs, repeat(lo, n)))
+        between = [x for x in xs if lo <= x <= hi]
+
+        if k < num_below:
+            xs = [x for x in xs if x < lo]
+        elif k < num_below + len(between):
+            if lo == hi:
+                return lo
+            if len(between) == n:
+                # few distinct values, sampling isn't narrowing it down
+                break
+            xs, k = between, k - num_below
+        else:
+            k -= num_below + len(between)
+            xs = [x for x in xs if x > hi]
+        n = len(xs)
+
+    return sorted(xs)[k]
+
+def select_many(xs, ks):
+    """
+    returns the kth smallest value of xs for each k in ks. A few ks are
+    found by selection, many by a single sort.
+    """
+    if _is_ndarray(xs):
+        partitioned = np.partition(xs, sorted(set(ks)))
+        return [partitioned[k] for k in ks]
+    if len(set(ks)) <= 2 and len(xs) > SMALL_SELECTION:
+        return [select(xs, k) for k in ks]
+    sorted_xs = sorted(xs)
+    return [sorted_xs[k] for k in ks]
 
 def mode(x):
     """returns a list, might be more than one mode"""
@@ -73,21 +252,296 @@ def de_mean(xs):
     return ((x-mu) for x in xs)
 
 def variance(xs):
-    mu = mean(xs)
-    n = len(xs)
-    return sum((x-mu)**2 for x in xs) / (n-1)
+    return RunningMoments(xs).variance
 
 def standard_deviation(xs):
-    return math.sqrt(variance(xs))
+    return RunningMoments(xs).standard_deviation
 
 def covariance(x, y):
-    n = len(x)
-    return dot(de_mean(x), de_mean(y)) / (n-1)
+    return RunningCovariance(x, y).covariance
 
 def correlation(x, y):
-    stdev_x = standard_deviation(x)
-    stdev_y = standard_deviation(y)
-    if stdev_x > 0 and stdev_y > 0:
-        return covariance(x, y) / stdev_x / stdev_y
-    else:
-        return 0 # if no variation, correlation is zero
+    return RunningCovariance(x, y).correlation
+
+
+# Streaming moments
+#
+# The accumulators below compute mean, variance and covariance in a single
+# pass over their input, so the input can be an iterator over data that
+# doesn't fit in memory. Input is consumed in chunks; the moments of each
+# chunk are computed with a quick two-pass sum over that chunk and folded into
+# the running totals with the pairwise update of Chan, Golub and LeVeque.
+# The same update merges two accumulators, so columns can be split across
+# chunks or processes and the partial results combined. push() adds a single
+# value with Welford's update.
+
+CHUNK_SIZE = 4096
+
+def _chunks(xs, size=CHUNK_SIZE):
+    if isinstance(xs, (list, tuple)) and len(xs) <= size:
+        if xs:
+            yield xs
+        return
+    it = iter(xs)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _paired_chunks(xs, ys, size=CHUNK_SIZE):
+    if isinstance(xs, (list, tuple)) and isinstance(ys, (list, tuple)):
+        n = min(len(xs), len(ys))
+        for i in range(0, n, size):
+            yield xs[i:min(i + size, n)], ys[i:min(i + size, n)]
+        return
+    for chunk in _chunks(zip(xs, ys), size):
+        yield tuple(zip(*chunk))
+
+
+class RunningMoments:
+    """
+    one-pass, mergeable count, mean and variance of a stream of numbers
+    """
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, xs=()):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0       # sum of squared deviations from the mean
+        self.update(xs)
+
+    def push(self, x):
+        """add one value"""
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        return self
+
+    def update(self, xs):
+        """add every value from the iterable xs"""
+        for chunk in _chunks(xs):
+            n = len(chunk)
+            mu = sum(chunk) / n
+            deviations = [x - mu for x in chunk]
+            self._combine(n, mu, sum(map(mul, deviations, deviations)))
+        return self
+
+    def merge(self, other):
+        """fold the values seen by another RunningMoments into this one"""
+        if other.n:
+            self._combine(other.n, other.mean, other.m2)
+        return self
+
+    def __add__(self, other):
+        return RunningMoments().merge(self).merge(other)
+
+    def _combine(self, n_b, mean_b, m2_b):
+        n_a = self.n
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * n_a * n_b / n
+        self.n = n
+
+    @property
+    def variance(self):
+        """sample variance, with a denominator of n-1"""
+        if self.n < 2:
+            raise ZeroDivisionError("variance needs at least two values")
+        return self.m2 / (self.n - 1)
+
+    @property
+    def standard_deviation(self):
+        return math.sqrt(self.variance)
+
+    def __getstate__(self):
+        return (self.n, self.mean, self.m2)
+
+    def __setstate__(self, state):
+        self.n, self.mean, self.m2 = state
+
+    def __repr__(self):
+        return 'RunningMoments(n={}, mean={}, m2={})'.format(self.n, self.mean, self.m2)
+
+
+class RunningCovariance:
+    """
+    one-pass, mergeable means, variances, covariance and correlation of
+    a stream of (x, y) pairs
+    """
+    __slots__ = ('n', 'mean_x', 'mean_y', 'm2_x', 'm2_y', 'c_xy')
+
+    def __init__(self, xs=(), ys=()):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = 0.0
+        self.c_xy = 0.0     # sum of products of deviations from the means
+        self.update(xs, ys)
+
+    def push(self, x, y):
+        """add one (x, y) pair"""
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        dy = y - self.mean_y
+        self.mean_y += dy / self.n
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c_xy += dx * (y - self.mean_y)
+        return self
+
+    def update(self, xs, ys):
+        """add the pairs from zipping the iterables xs and ys"""
+        for chunk_x, chunk_y in _paired_chunks(xs, ys):
+            n = len(chunk_x)
+            mu_x = sum(chunk_x) / n
+            mu_y = sum(chunk_y) / n
+            dx = [x - mu_x for x in chunk_x]
+            dy = [y - mu_y for y in chunk_y]
+            self._combine(n, mu_x, mu_y,
+                          sum(map(mul, dx, dx)),
+                          sum(map(mul, dy, dy)),
+                          sum(map(mul, dx, dy)))
+        return self
+
+    def merge(self, other):
+        """fold the pairs seen by another RunningCovariance into this one"""
+        if other.n:
+            self._combine(other.n, other.mean_x, other.mean_y,
+                          other.m2_x, other.m2_y, other.c_xy)
+        return self
+
+    def __add__(self, other):
+        return RunningCovariance().merge(self).merge(other)
+
+    def _combine(self, n_b, mean_x_b, mean_y_b, m2_x_b, m2_y_b, c_xy_b):
+        n_a = self.n
+        n = n_a + n_b
+        dx = mean_x_b - self.mean_x
+        dy = mean_y_b - self.mean_y
+        weight = n_a * n_b / n
+        self.mean_x += dx * n_b / n
+        self.mean_y += dy * n_b / n
+        self.m2_x += m2_x_b + dx * dx * weight
+        self.m2_y += m2_y_b + dy * dy * weight
+        self.c_xy += c_xy_b + dx * dy * weight
+        self.n = n
+
+    @property
+    def covariance(self):
+        if self.n < 2:
+            raise ZeroDivisionError("covariance needs at least two pairs")
+        return self.c_xy / (self.n - 1)
+
+    @property
+    def variance_x(self):
+        if self.n < 2:
+            raise ZeroDivisionError("variance needs at least two values")
+        return self.m2_x / (self.n - 1)
+
+    @property
+    def variance_y(self):
+        if self.n < 2:
+            raise ZeroDivisionError("variance needs at least two values")
+        return self.m2_y / (self.n - 1)
+
+    @property
+    def correlation(self):
+        if self.m2_x > 0 and self.m2_y > 0:
+            return self.c_xy / math.sqrt(self.m2_x * self.m2_y)
+        else:
+            return 0 # if no variation, correlation is zero
+
+    def __getstate__(self):
+        return (self.n, self.mean_x, self.mean_y, self.m2_x, self.m2_y, self.c_xy)
+
+    def __setstate__(self, state):
+        self.n, self.mean_x, self.mean_y, self.m2_x, self.m2_y, self.c_xy = state
+
+    def __repr__(self):
+        return 'RunningCovariance(n={}, mean_x={}, mean_y={}, covariance={})'.format(
+            self.n, self.mean_x, self.mean_y, self.c_xy / (self.n - 1) if self.n > 1 else None)
+
+
+# Streaming quantiles
+#
+# For a stream too big to hold, QuantileSketch keeps the summary of Greenwald
+# and Khanna ("Space-efficient online computation of quantile summaries",
+# SIGMOD 2001). It holds a sorted list of sampled values, each with bounds
+# on its rank, and periodically merges neighbours whose combined rank
+# uncertainty stays under 2 * epsilon * n. Memory grows like
+# (1 / epsilon) * log(epsilon * n) rather than n, and any quantile is
+# answered to within epsilon * n ranks.
+
+class QuantileSketch:
+    """
+    approximate quantiles of a stream in bounded memory, accurate to within
+    epsilon * n ranks
+    """
+
+    def __init__(self, epsilon=0.001, xs=()):
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be between 0 and 1")
+        self.epsilon = epsilon
+        self.n = 0
+        self.values = []    # sampled values, in sorted order
+        self.g = []         # rank of each value minus rank of the one before
+        self.delta = []     # uncertainty in the rank of each value
+        self._compress_every = max(int(1 / (2 * epsilon)), 1)
+        self.update(xs)
+
+    def __len__(self):
+        return self.n
+
+    def push(self, x):
+        """add one value"""
+        i = bisect_right(self.values, x)
+        if i == 0 or i == len(self.values):
+            delta = 0
+        else:
+            delta = int(2 * self.epsilon * self.n)
+        self.values.insert(i, x)
+        self.g.insert(i, 1)
+        self.delta.insert(i, delta)
+        self.n += 1
+        if self.n % self._compress_every == 0:
+            self._compress()
+        return self
+
+    def update(self, xs):
+        """add every value from the iterable xs"""
+        for x in xs:
+            self.push(x)
+        return self
+
+    def _compress(self):
+        threshold = int(2 * self.epsilon * self.n)
+        values, g, delta = self.values, self.g, self.delta
+        # merge right to left, always keeping the smallest and largest values
+        i = len(values) - 2
+        while i >= 1:
+            if g[i] + g[i + 1] + delta[i + 1] < threshold:
+                g[i + 1] += g[i]
+                del values[i], g[i], delta[i]
+            i -= 1
+
+    def quantile(self, p):
+        """returns a value whose rank is within epsilon * n of p * n"""
+        rank = _quantile_index(p, self.n) + 1
+        error = self.epsilon * self.n
+        min_rank = 0
+        for value, g, delta in zip(self.values, self.g, self.delta):
+            min_rank += g
+            max_rank = min_rank + delta
+            if max_rank - error <= rank <= min_rank + error:
+                return value
+        return self.values[-1]
+
+    def quantiles(self, ps):
+        return [self.quantile(p) for p in ps]
+
+    def __repr__(self):
+        return 'QuantileSketch(epsilon={}, n={}, size={})'.format(
+            self.epsilon, self.n, len(self.values))
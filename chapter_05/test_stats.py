@@ -57,3 +57,115 @@ def test_sd():
     assert approx(
         standard_deviation([random.gauss(0,1) for _ in range(1000)]), 1.0,
         epsilon=0.3)
+
+
+def test_covariance_and_correlation():
+    xs = [1, 2, 3, 4, 5]
+    ys = [2, 4, 6, 8, 10]
+    assert approx(covariance(xs, ys), 5.0)
+    assert approx(correlation(xs, ys), 1.0)
+    assert approx(correlation(xs, [10, 8, 6, 4, 2]), -1.0)
+    assert correlation(xs, [3, 3, 3, 3, 3]) == 0
+
+
+def test_running_moments_streams_and_merges():
+    random.seed(0)
+    xs = [random.gauss(10, 3) for _ in range(10000)]
+
+    # a generator can only be read once
+    streamed = RunningMoments(x for x in xs)
+    assert streamed.n == 10000
+    assert approx(streamed.variance, variance(xs))
+
+    pushed = RunningMoments()
+    for x in xs:
+        pushed.push(x)
+    assert approx(pushed.mean, streamed.mean)
+    assert approx(pushed.variance, streamed.variance)
+
+    merged = RunningMoments(xs[:1234]) + RunningMoments(xs[1234:])
+    assert merged.n == 10000
+    assert approx(merged.mean, mean(xs))
+    assert approx(merged.standard_deviation, standard_deviation(xs))
+
+
+def test_running_moments_is_stable():
+    # a big offset wrecks the naive sum of squares formula
+    xs = [1e9 + x for x in [4, 7, 13, 16]]
+    assert approx(variance(xs), 30.0)
+
+
+def test_running_covariance_streams_and_merges():
+    random.seed(0)
+    xs = [random.random() for _ in range(10000)]
+    ys = [x + random.random() for x in xs]
+
+    streamed = RunningCovariance(iter(xs), iter(ys))
+    merged = RunningCovariance(xs[:5000], ys[:5000]).merge(
+        RunningCovariance(xs[5000:], ys[5000:]))
+    pushed = RunningCovariance()
+    for x, y in zip(xs, ys):
+        pushed.push(x, y)
+
+    for acc in (merged, pushed):
+        assert acc.n == streamed.n == 10000
+        assert approx(acc.covariance, streamed.covariance)
+        assert approx(acc.correlation, streamed.correlation)
+    assert approx(streamed.variance_x, variance(xs))
+    assert approx(streamed.correlation, correlation(xs, ys))
+
+
+def test_select_matches_sorting():
+    random.seed(0)
+    for xs in ([random.random() for _ in range(20001)],
+               [random.randint(0, 2) for _ in range(20001)]):
+        s = sorted(xs)
+        for k in [0, 1, 5000, 10000, 19999, 20000]:
+            assert select(xs, k) == s[k]
+        assert median(xs) == s[10000]
+        assert quantiles(xs, [0.1, 0.5, 0.9]) == [s[2000], s[10000], s[18000]]
+
+
+def test_select_leaves_random_state_alone():
+    xs = [random.random() for _ in range(20001)]
+    state = random.getstate()
+    median(xs)
+    quantiles(xs, [0.25, 0.75])
+    assert random.getstate() == state
+
+
+def test_quantile_sketch_rank_error():
+    random.seed(0)
+    xs = [random.random() for _ in range(20000)]
+    s = sorted(xs)
+    sketch = QuantileSketch(0.01, iter(xs))
+    assert len(sketch) == 20000
+    for p in [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]:
+        rank = s.index(sketch.quantile(p))
+        assert abs(rank - min(int(p * 20000), 19999)) <= 0.01 * 20000
+    assert quantiles(xs, [0.25, 0.75], epsilon=0.01) == sketch.quantiles([0.25, 0.75])
+
+
+def test_binning_agrees_with_find_bin():
+    random.seed(0)
+    xs = [random.uniform(-0.2, 1.2) for _ in range(5000)] + [0.1, 0.3, 0.7, 1.0, math.nan]
+    even = [i / 10 for i in range(11)]
+    uneven = sorted(random.random() for _ in range(20))
+    for breaks in (even, uneven, [0.5], []):
+        binner = make_binner(breaks)
+        expected = [sum(1 for b in breaks if b <= x) if x == x else len(breaks) for x in xs]
+        assert [binner(x) for x in xs] == expected
+        assert [find_bin(x, breaks) for x in xs] == expected
+        assert bin(xs, breaks) == expected
+
+        counts = hist(iter(xs), breaks, chunk_size=1000)
+        assert len(counts) == len(breaks) + 1
+        assert list(counts) == [expected.count(i) for i in range(len(breaks) + 1)]
+
+
+def test_binning_many_even_breaks():
+    random.seed(0)
+    xs = [random.uniform(-1, 2) for _ in range(5000)] + [0.0, 0.5, 1.0, math.inf, -math.inf]
+    breaks = [i / 20000 for i in range(20001)]
+    binner = make_binner(breaks)
+    assert [binner(x) for x in xs] == [find_bin(x, breaks) for x in xs]
@@ -0,0 +1,30 @@
+"""
+Tests for normal distribution functions
+"""
+import math
+import random
+from normal import *
+
+
+def approx(a, b, epsilon=1e-12):
+    return abs(a-b) <= epsilon * max(1, abs(a), abs(b))
+
+
+def test_inverse_normal_cdf_known_values():
+    assert inverse_normal_cdf(0.5) == 0.0
+    assert approx(inverse_normal_cdf(0.975), 1.959963984540054)
+    assert approx(inverse_normal_cdf(0.025), -1.959963984540054)
+    assert approx(inverse_normal_cdf(0.9), 1.2815515655446004)
+    assert approx(inverse_normal_cdf(0.25, mu=10, sigma=2), 10 - 2 * 0.6744897501960817)
+    assert inverse_normal_cdf(0) == -math.inf
+    assert inverse_normal_cdf(1) == math.inf
+
+    # old calls passing a tolerance still work
+    assert approx(inverse_normal_cdf(0.975, tolerance=0.00001), 1.959963984540054)
+
+
+def test_inverse_normal_cdf_round_trips():
+    random.seed(0)
+    ps = [random.random() for _ in range(1000)] + [1e-300, 1e-20, 1e-10, 0.02425, 1 - 1e-10]
+    for p in ps:
+        assert approx(normal_cdf(inverse_normal_cdf(p)), p, 1e-13)
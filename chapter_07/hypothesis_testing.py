@@ -4,7 +4,7 @@ Hypothesis Testing
 Code from Chapter 7 of Data Science from Scratch
 """
 from normal import normal_cdf, inverse_normal_cdf
-from central_limit_theorem import binomial
+from monte_carlo import binomial_counts, fraction_between, run_grid
 import math, random
 import matplotlib.pyplot as plt
 
@@ -59,7 +59,7 @@ def normal_two_sided_bounds(probability, mu=0, sigma=1):
     return lower_bound, upper_bound
 
 
-def plot_detect_biased_coin(m=1000):
+def plot_detect_biased_coin(m=1000, seed=0, processes=None):
     """
     Empirically test how often a test at a p-value of 0.05 would
     call a coin fair at varying levels of bias for each of 4
@@ -68,17 +68,21 @@ def plot_detect_biased_coin(m=1000):
     m = number of experiments
     n = sample size, number of trials in each experiment
     p = probability of successful trial
+
+    The (n, p) grid is simulated by run_grid, split across worker
+    processes if processes > 1, with the same results for a given seed.
     """
-    for n,marker in zip([100,500,1000,5000],['-','--',':','-.']):
-        ps = [0.4 + i/300  for i in range(60)]
-        looks_fair_percent = []
+    ns = [100,500,1000,5000]
+    ps = [0.4 + i/300  for i in range(60)]
+    cells = []
+    for n in ns:
         mu_0, sigma_0 = normal_approximation_to_binomial(n, 0.5)
         lo, hi = normal_two_sided_bounds(0.95, mu_0, sigma_0)
-        for p in ps:
-            data = [binomial(n,p) for _ in range(m)]
-            looks_fair_percent.append(sum(d>lo and d<hi for d in data)/m)
+        cells.extend((n, p, m, lo, hi) for p in ps)
+    looks_fair_percent = run_grid(fraction_between, cells, seed, processes)
 
-        plt.plot(ps, looks_fair_percent, marker, label='n={}'.format(n))
+    for i, (n,marker) in enumerate(zip(ns,['-','--',':','-.'])):
+        plt.plot(ps, looks_fair_percent[i*len(ps):(i+1)*len(ps)], marker, label='n={}'.format(n))
 
     plt.legend(loc=2)
     plt.title('How much bias can we detect?')
@@ -122,7 +126,7 @@ def two_sided_p_value(x, mu=0, sigma=1):
         return 2 * normal_probability_below(x, mu, sigma)
 
 
-def count_extreme_values(n, p, lo, hi, m=10000):
+def count_extreme_values(n, p, lo, hi, m=10000, rng=random):
     """
     Perform m batches of n trials where the probability of success in a trial is p.
     Return the number of batches that produce an 'extreme' value of successes as
@@ -140,15 +144,11 @@ def count_extreme_values(n, p, lo, hi, m=10000):
         Out[69]: 0.0521
 
     """
-    extreme_value_count = 0
-    for _ in range(m):
-        num_heads = sum(1 if random.random() < p else 0 for _ in range(n))
-        if num_heads >= hi or num_heads <= lo:
-            extreme_value_count += 1
-    return extreme_value_count
+    return sum(num_heads >= hi or num_heads <= lo
+               for num_heads in binomial_counts(n, p, m, rng))
 
 
-def confidence_interval(n, m, p=0.5, confidence=0.95):
+def confidence_interval(n, m, p=0.5, confidence=0.95, rng=random):
     """
     How often does "fair" (0.5) lie within the confidence interval?
 
@@ -157,12 +157,13 @@ def confidence_interval(n, m, p=0.5, confidence=0.95):
     p = true probability of success
     confidence = size of confidence interval
     """
+    # the bounds are p_hat -/+ z * sigma_hat, so find z once
+    _, z = normal_two_sided_bounds(confidence)
     fair = 0
-    for _ in range(m):
-        p_hat = binomial(n, p) / n
+    for num_heads in binomial_counts(n, p, m, rng):
+        p_hat = num_heads / n
         sigma_hat = math.sqrt(p_hat * (1 - p_hat) / (n-1))
-        lo, hi = normal_two_sided_bounds(confidence, mu=p_hat, sigma=sigma_hat)
-        fair += 1 if lo <= 0.5 <= hi else 0
+        fair += 1 if p_hat - z * sigma_hat <= 0.5 <= p_hat + z * sigma_hat else 0
     return fair / m
 
 
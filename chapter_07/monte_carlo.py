@@ -0,0 +1,127 @@
+"""
+Monte Carlo simulation of coin flipping experiments
+
+Supports the simulations in Chapter 7 of Data Science from Scratch
+"""
+import math
+import random
+from multiprocessing import Pool
+
+
+# Sampling binomial counts
+#
+# The book counts heads by flipping n coins one at a time. Here the count is
+# drawn directly. When the expected number of the rarer outcome is small,
+# the geometric method skips from one success to the next, which takes about
+# n * p steps. Otherwise Hormann's BTRS transformed rejection sampler takes a
+# couple of uniforms per draw on average, whatever n is. Python 3.12's
+# random.binomialvariate uses the same pair of methods, but it isn't
+# available before 3.12 and its stream needn't match across versions, so we
+# keep our own.
+
+def binomial(n, p, rng=random):
+    """the number of successes in n trials each succeeding with probability p"""
+    if n < 0:
+        raise ValueError("n must be non-negative, got {}".format(n))
+    if not 0 < p < 1:
+        if p == 0:
+            return 0
+        if p == 1:
+            return n
+        raise ValueError("p must be in [0, 1], got {}".format(p))
+    if p > 0.5:
+        return n - binomial(n, 1 - p, rng)
+    if n * p < 10:
+        return _binomial_geometric(n, p, rng.random)
+    return _binomial_btrs(n, p, rng.random)
+
+
+def _binomial_geometric(n, p, uniform):
+    log_q = math.log1p(-p)
+    successes = trials = 0
+    while True:
+        # trials up to and including the next success
+        trials += math.floor(math.log(1 - uniform()) / log_q) + 1
+        if trials > n:
+            return successes
+        successes += 1
+
+
+def _binomial_btrs(n, p, uniform):
+    spq = math.sqrt(n * p * (1 - p))
+    b = 1.15 + 2.53 * spq
+    a = -0.0873 + 0.0248 * b + 0.01 * p
+    c = n * p + 0.5
+    v_r = 0.92 - 4.2 / b
+    alpha = None
+
+    while True:
+        u = uniform() - 0.5
+        us = 0.5 - abs(u)
+        k = math.floor((2 * a / us + b) * u + c)
+        if k < 0 or k > n:
+            continue
+        v = uniform()
+        if us >= 0.07 and v <= v_r:
+            return k
+
+        # the squeeze failed, set up the exact test the first time we need it
+        if alpha is None:
+            alpha = (2.83 + 5.1 / b) * spq
+            lpq = math.log(p / (1 - p))
+            m = math.floor((n + 1) * p)
+            h = math.lgamma(m + 1) + math.lgamma(n - m + 1)
+        v *= alpha / (a / (us * us) + b)
+        if math.log(v) <= h - math.lgamma(k + 1) - math.lgamma(n - k + 1) + (k - m) * lpq:
+            return k
+
+
+def binomial_counts(n, p, m, rng=random):
+    """
+    the numbers of successes in m experiments of n trials each. rng can be
+    a random.Random or a numpy Generator, which draws them all at once.
+    """
+    if hasattr(rng, 'binomial'):
+        return rng.binomial(n, p, size=m).tolist()
+    return [binomial(n, p, rng) for _ in range(m)]
+
+
+# Grids of experiments
+#
+# Sweeps like plot_detect_biased_coin run the same experiment for every cell
+# of a grid of parameters. Each cell gets its own random number generator
+# seeded from the overall seed and the cell, so a cell's result doesn't
+# depend on which other cells are run, in what order, or in which process.
+# That makes it safe to farm cells out to a pool of worker processes.
+
+def cell_rng(seed, cell):
+    """the random number generator for one cell of a grid"""
+    return random.Random('{}:{!r}'.format(seed, cell))
+
+
+def _run_cell(experiment, seed, cell):
+    return experiment(cell, cell_rng(seed, cell))
+
+
+def run_grid(experiment, cells, seed=0, processes=None):
+    """
+    return [experiment(cell, rng) for cell in cells], where rng is the
+    cell's own generator. With processes > 1 the cells are split across a
+    pool of worker processes, in which case experiment must be picklable, a
+    function defined at the top level of a module for instance.
+    """
+    cells = list(cells)
+    if not processes or processes < 2 or len(cells) < 2:
+        return [_run_cell(experiment, seed, cell) for cell in cells]
+    with Pool(processes) as pool:
+        return pool.starmap(_run_cell, [(experiment, seed, cell) for cell in cells])
+
+
+def fraction_between(cell, rng):
+    """
+    an experiment for run_grid: cell is (n, p, m, lo, hi), returns the
+    fraction of m experiments of n trials with a count strictly between lo
+    and hi
+    """
+    n, p, m, lo, hi = cell
+    return sum(lo < k < hi for k in binomial_counts(n, p, m, rng)) / m
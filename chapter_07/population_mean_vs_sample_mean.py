@@ -1,6 +1,7 @@
 """
 Compare population mean with sample mean
 """
+import os
 import random
 import numpy as np
 import matplotlib.pyplot as plt
@@ -8,30 +9,33 @@ import seaborn as sns
 
 from stats import *
 from normal import normal_pdf
+from sampling import sample_statistics
 
-# a population of 1 million
-pop = [random.random() for _ in range(1000000)]
 
-population_mean = sum(pop)/len(pop)
-print('population mean = ', population_mean)
+if __name__ == '__main__':
+    # a population of 1 million
+    pop = [random.random() for _ in range(1000000)]
 
-n = 100
-sample_means = np.fromiter((sum(random.sample(pop, k=n))/n for _ in range(1000)), float)
+    population_mean = sum(pop)/len(pop)
+    print('population mean = ', population_mean)
 
-# make a pretty picture
-sns.kdeplot(sample_means, shade=True, color='skyblue',
-    label='probability density of sampling distribution')
+    n = 100
+    sample_means = np.array(sample_statistics(mean, pop, 1000, n, processes=os.cpu_count()))
 
-# estimate the standard deviation of the sampling distribution
-sd = standard_deviation(pop)/math.sqrt(n)
-xs = [x/500 + 0.4 for x in range(100)]
-plt.plot(xs,
-    [normal_pdf(x, mu=population_mean, sigma=sd) for x in xs],
-    '--',
-    color='#30336699',
-    label=f'normal mu={population_mean:0.3} sigma={sd:0.3}')
+    # make a pretty picture
+    sns.kdeplot(sample_means, shade=True, color='skyblue',
+        label='probability density of sampling distribution')
 
-plt.axvline(x=population_mean)
-plt.title('Probability density of sample means vs. population mean')
-plt.legend(loc=2)
-plt.show()
+    # estimate the standard deviation of the sampling distribution
+    sd = standard_deviation(pop)/math.sqrt(n)
+    xs = [x/500 + 0.4 for x in range(100)]
+    plt.plot(xs,
+        [normal_pdf(x, mu=population_mean, sigma=sd) for x in xs],
+        '--',
+        color='#30336699',
+        label=f'normal mu={population_mean:0.3} sigma={sd:0.3}')
+
+    plt.axvline(x=population_mean)
+    plt.title('Probability density of sample means vs. population mean')
+    plt.legend(loc=2)
+    plt.show()
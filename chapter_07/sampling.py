@@ -0,0 +1,117 @@
+"""
+Sampling distributions by simulation
+
+Draws many samples from a population and computes a statistic of each one,
+optionally across a pool of worker processes. Supports the sampling studies
+in Chapter 7 of Data Science from Scratch.
+"""
+import random
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# The samples are drawn in fixed size chunks and each chunk gets its own
+# random number generator, seeded from the overall seed and the chunk's
+# index. Chunks are the unit of work handed to workers, so the samples
+# drawn don't depend on how many processes there are or which one runs
+# which chunk.
+#
+# The population is copied once into a block of shared memory holding
+# doubles. Workers attach to it when they start rather than having the
+# population pickled along with every task.
+
+CHUNK_SIZE = 100
+
+
+def as_doubles(population):
+    """the population as an array('d')"""
+    if isinstance(population, array) and population.typecode == 'd':
+        return population
+    if np is not None and isinstance(population, np.ndarray):
+        return array('d', np.ascontiguousarray(population, dtype=float).tobytes())
+    return array('d', population)
+
+
+def chunk_rng(seed, chunk):
+    return random.Random('{}:{}'.format(seed, chunk))
+
+
+def _draw(population, rng, sample_size, replace):
+    indices = range(len(population))
+    if replace:
+        picks = rng.choices(indices, k=sample_size)
+    else:
+        picks = rng.sample(indices, k=sample_size)
+    return list(map(population.__getitem__, picks))
+
+
+def _sample_chunk(population, statistic, seed, chunk, num_samples, sample_size, replace):
+    rng = chunk_rng(seed, chunk)
+    return [statistic(_draw(population, rng, sample_size, replace))
+            for _ in range(num_samples)]
+
+
+def _chunks(num_samples, chunk_size):
+    """(index, size) of each chunk"""
+    for chunk, start in enumerate(range(0, num_samples, chunk_size)):
+        yield chunk, min(chunk_size, num_samples - start)
+
+
+# state of a worker process, set up by _attach
+_shared = None
+_population = None
+
+def _attach(name, length):
+    global _shared, _population
+    _shared = SharedMemory(name=name)
+    _population = _shared.buf[:8 * length].cast('d')
+
+def _worker_chunk(args):
+    chunk = args[2]
+    return chunk, _sample_chunk(_population, *args)
+
+
+def imap_sample_statistics(statistic, population, num_samples, sample_size,
+                           seed=0, processes=None, chunk_size=CHUNK_SIZE, replace=False):
+    """
+    draw num_samples samples of sample_size from population and yield
+    (chunk index, [statistic(sample) for each sample in the chunk]) as each
+    chunk is finished. With several processes chunks can finish out of
+    order. statistic must be picklable to run in worker processes.
+    """
+    population = as_doubles(population)
+    tasks = [(statistic, seed, chunk, size, sample_size, replace)
+             for chunk, size in _chunks(num_samples, chunk_size)]
+
+    if not processes or processes < 2 or len(tasks) < 2:
+        for task in tasks:
+            yield task[2], _sample_chunk(population, *task)
+        return
+
+    shared = SharedMemory(create=True, size=max(8 * len(population), 1))
+    try:
+        shared.buf[:8 * len(population)] = memoryview(population).cast('B')
+        with Pool(processes, initializer=_attach,
+                  initargs=(shared.name, len(population))) as pool:
+            yield from pool.imap_unordered(_worker_chunk, tasks)
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def sample_statistics(statistic, population, num_samples, sample_size,
+                      seed=0, processes=None, chunk_size=CHUNK_SIZE, replace=False):
+    """
+    the list of statistic(sample) for num_samples samples drawn from
+    population, in the same order for a given seed however many
+    processes are used
+    """
+    results = dict(imap_sample_statistics(statistic, population, num_samples, sample_size,
+                                          seed, processes, chunk_size, replace))
+    return [x for chunk in sorted(results) for x in results[chunk]]
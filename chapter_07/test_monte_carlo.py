@@ -0,0 +1,41 @@
+"""
+Tests for Monte Carlo simulation
+"""
+import math
+import random
+from monte_carlo import *
+
+
+def test_binomial_edge_cases():
+    assert binomial(0, 0.5) == 0
+    assert binomial(10, 0) == 0
+    assert binomial(10, 1) == 10
+    for _ in range(100):
+        assert 0 <= binomial(20, 0.3) <= 20
+        assert 0 <= binomial(1000, 0.9) <= 1000
+
+
+def test_binomial_mean_and_variance():
+    rng = random.Random(0)
+    m = 20000
+    for n, p in [(10, 0.3), (100, 0.05), (1000, 0.5), (5000, 0.9)]:
+        ks = binomial_counts(n, p, m, rng)
+        mean = sum(ks) / m
+        variance = sum((k - mean) ** 2 for k in ks) / (m - 1)
+        # within 5 standard errors
+        assert abs(mean - n * p) < 5 * math.sqrt(n * p * (1 - p) / m)
+        assert abs(variance / (n * p * (1 - p)) - 1) < 5 * math.sqrt(2 / m)
+
+
+def test_binomial_is_reproducible():
+    assert (binomial_counts(1000, 0.4, 100, random.Random(42)) ==
+            binomial_counts(1000, 0.4, 100, random.Random(42)))
+
+
+def test_run_grid_is_order_independent():
+    cells = [(100, p, 200, 40, 60) for p in (0.4, 0.5, 0.6)]
+    forward = run_grid(fraction_between, cells, seed=1)
+    backward = run_grid(fraction_between, cells[::-1], seed=1)
+    assert forward == backward[::-1]
+    assert run_grid(fraction_between, cells, seed=1, processes=2) == forward
+    assert forward[1] > forward[0] and forward[1] > forward[2]
@@ -0,0 +1,37 @@
+"""
+Tests for the sampling runner
+"""
+import random
+from sampling import *
+
+
+def sample_mean(xs):
+    return sum(xs) / len(xs)
+
+
+def test_sample_statistics_is_seed_stable():
+    random.seed(0)
+    pop = [random.random() for _ in range(10000)]
+    serial = sample_statistics(sample_mean, pop, 250, 50, seed=3, chunk_size=40)
+    assert len(serial) == 250
+    assert serial == sample_statistics(sample_mean, pop, 250, 50, seed=3, chunk_size=40)
+    assert serial != sample_statistics(sample_mean, pop, 250, 50, seed=4, chunk_size=40)
+    for processes in (2, 3):
+        assert serial == sample_statistics(sample_mean, pop, 250, 50, seed=3,
+                                           processes=processes, chunk_size=40)
+
+
+def test_samples_come_from_the_population():
+    pop = list(range(100))
+    samples = sample_statistics(sorted, pop, 20, 100)
+    assert all(sample == pop for sample in samples)
+
+    with_replacement = sample_statistics(len, pop, 20, 500, replace=True)
+    assert with_replacement == [500] * 20
+
+
+def test_imap_streams_every_chunk():
+    pop = [float(i) for i in range(1000)]
+    chunks = dict(imap_sample_statistics(max, pop, 95, 10, processes=2, chunk_size=10))
+    assert sorted(chunks) == list(range(10))
+    assert sum(len(results) for results in chunks.values()) == 95
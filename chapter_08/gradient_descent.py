@@ -1,6 +1,6 @@
 import math
-import numpy as np
 import random
+from operator import add
 
 
 def sum_of_squares(v):
@@ -15,8 +15,33 @@ def partial_difference_quotient(f, v, i, epsilon=0.00001):
     v1 = [(v_j+epsilon) if j==i else v_j for j, v_j in enumerate(v)]
     return (f(v1) - f(v0)) / (2*epsilon)
 
-def estimate_gradient(f, v, epsilon=0.00001):
-    return [partial_difference_quotient(f, v, i, epsilon) for i, _ in enumerate(v)]
+def estimate_gradient(f, v, epsilon=0.00001, method='central'):
+    """
+    estimate the gradient of f at v by finite differences. 'central'
+    differences take 2*d evaluations of f, 'forward' differences d + 1 and
+    are less accurate. Unlike partial_difference_quotient this copies v
+    once and nudges one coordinate at a time, so f mustn't hold on to its
+    argument.
+    """
+    w = list(v)
+    gradient = []
+    if method == 'central':
+        for i, v_i in enumerate(v):
+            w[i] = v_i + epsilon
+            f1 = f(w)
+            w[i] = v_i - epsilon
+            f0 = f(w)
+            w[i] = v_i
+            gradient.append((f1 - f0) / (2*epsilon))
+    elif method == 'forward':
+        f0 = f(w)
+        for i, v_i in enumerate(v):
+            w[i] = v_i + epsilon
+            gradient.append((f(w) - f0) / epsilon)
+            w[i] = v_i
+    else:
+        raise ValueError("Unknown method {}, choose central or forward".format(method))
+    return gradient
 
 def step(v, direction, step_size):
     """
@@ -39,34 +64,107 @@ def safe(f):
             return float('inf')
     return safe_f
 
-def minimize_batch(target_fn, gradient_fn, theta_0, tolerance=0.000001):
-    """use gradient descent to find theta that minimizes target function"""
-    
+def safe_value_and_gradient(f):
+    """safe for a function returning (value, gradient)"""
+    def safe_f(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except:
+            return float('inf'), None
+    return safe_f
+
+def _ladder_search(evaluate, theta, gradient, step_sizes):
+    """
+    try each step size and take the best. Returns (theta, value, result),
+    result being whatever evaluate returned for the chosen theta.
+    """
+    best = None
+    for step_size in step_sizes:
+        next_theta = step(theta, gradient, -step_size)
+        next_value, result = evaluate(next_theta)
+        if best is None or next_value < best[1]:
+            best = next_theta, next_value, result
+    return best
+
+def _armijo_search(evaluate, theta, value, gradient, step_size,
+                   shrink=0.5, c=0.0001, min_step_size=1e-12):
+    """
+    backtrack from step_size until the value decreases by at least c times
+    what the slope promises (the Armijo condition). Returns (theta, value,
+    result, step_size), or theta unchanged if no step decreases the value.
+    """
+    slope = sum(g_i * g_i for g_i in gradient)
+    while step_size >= min_step_size:
+        next_theta = step(theta, gradient, -step_size)
+        next_value, result = evaluate(next_theta)
+        if next_value <= value - c * step_size * slope:
+            return next_theta, next_value, result, step_size
+        step_size *= shrink
+    return theta, value, None, step_size
+
+def minimize_batch(target_fn, gradient_fn, theta_0, tolerance=0.000001,
+                   line_search='ladder', value_and_gradient=False, step_size=1.0):
+    """
+    use gradient descent to find theta that minimizes target function
+
+    line_search is 'ladder', trying each of a fixed set of step sizes and
+    taking the best, or 'armijo', backtracking from step_size until the
+    value drops enough. Each candidate theta is evaluated once.
+
+    With value_and_gradient=True, target_fn(theta) returns the value and
+    the gradient together and gradient_fn is ignored. The gradient at the
+    chosen candidate is then already known, which saves a call per step
+    when the two share most of their work.
+
+    Candidates where target_fn raises count as infinitely bad. If every
+    candidate of a step raises, or target_fn raises at theta_0 with
+    value_and_gradient=True, it stops and returns the theta it got to.
+    """
     step_sizes = [100, 10, 1, 0.1, 0.01, 0.001, 0.0001, 0.00001]
-    theta = theta_0
-    target_fn = safe(target_fn)
-    value = target_fn(theta)
-    values = []
-    
+
     # set theta to initial value
-    # safe version of target_fn
+    theta = theta_0
+
+    # safe version of target_fn, evaluate(theta) returns (value, gradient or None)
+    if value_and_gradient:
+        evaluate = safe_value_and_gradient(target_fn)
+    else:
+        safe_target_fn = safe(target_fn)
+        evaluate = lambda theta: (safe_target_fn(theta), None)
+
     # value we're minimizing
+    value, gradient = evaluate(theta)
+    values = []
+
     while True:
         values.append(value)
-        gradient = gradient_fn(theta)
-        next_thetas = [step(theta, gradient, -step_size)
-                       for step_size in step_sizes]
+        if gradient is None:
+            if value_and_gradient:
+                # target_fn failed at theta, so there's no gradient to follow
+                break
+            gradient = gradient_fn(theta)
+
+        if line_search == 'ladder':
+            next_theta, next_value, next_gradient = _ladder_search(
+                evaluate, theta, gradient, step_sizes)
+        elif line_search == 'armijo':
+            next_theta, next_value, next_gradient, used_step_size = _armijo_search(
+                evaluate, theta, value, gradient, step_size)
+            # start the next search a little beyond the step that worked
+            step_size = used_step_size * 2
+        else:
+            raise ValueError("Unknown line search {}, choose ladder or armijo".format(line_search))
 
-        # choose the one that minimizes the error function
-        next_theta = min(next_thetas, key=target_fn)
-        next_value = target_fn(next_theta)
+        # stop if every step failed, keeping theta
+        if next_value == float('inf'):
+            break
 
         # stop if we're "converging"
         if abs(value - next_value) < tolerance:
             values.append(next_value)
             break
         else:
-            theta, value = next_theta, next_value
+            theta, value, gradient = next_theta, next_value, next_gradient
 
     return theta, values
 
@@ -126,6 +224,144 @@ def minimize_stochastic(target_fn, gradient_fn, x, y, theta_0, alpha_0=0.01):
 
     return min_theta
 
+# Mini-batch gradient descent
+#
+# minimize_stochastic takes a step for each example and then sums the loss
+# over the whole data set to decide whether it's improving. minimize_minibatch
+# averages the gradient over a batch of examples per step and updates theta
+# in place. Whether it's improving is judged once an epoch, either from the
+# losses of the batches seen during the epoch, each computed just before its
+# step, or from the loss on a holdout set. It stops after patience epochs
+# without improvement or after max_epochs.
+
+def _sgd(theta, gradient, alpha, state, beta_1, beta_2, epsilon):
+    for j, g_j in enumerate(gradient):
+        theta[j] -= alpha * g_j
+
+def _momentum(theta, gradient, alpha, state, beta_1, beta_2, epsilon):
+    velocity = state.setdefault('velocity', [0.0] * len(theta))
+    for j, g_j in enumerate(gradient):
+        velocity[j] = beta_1 * velocity[j] + g_j
+        theta[j] -= alpha * velocity[j]
+
+def _adam(theta, gradient, alpha, state, beta_1, beta_2, epsilon):
+    m = state.setdefault('m', [0.0] * len(theta))
+    v = state.setdefault('v', [0.0] * len(theta))
+    t = state['t'] = state.get('t', 0) + 1
+    alpha_t = alpha * math.sqrt(1 - beta_2 ** t) / (1 - beta_1 ** t)
+    for j, g_j in enumerate(gradient):
+        m[j] = beta_1 * m[j] + (1 - beta_1) * g_j
+        v[j] = beta_2 * v[j] + (1 - beta_2) * g_j * g_j
+        theta[j] -= alpha_t * m[j] / (math.sqrt(v[j]) + epsilon)
+
+UPDATES = {'sgd': _sgd, 'momentum': _momentum, 'adam': _adam}
+
+def _minimize_epochs(target_fn, gradient_fn, epoch, n, theta_0, alpha_0, method,
+                     holdout, patience, tolerance, max_epochs, beta_1, beta_2, epsilon):
+    """
+    the loop shared by minimize_minibatch and minimize_sharded. epoch() yields
+    the batches for one pass over the n examples, each a list of (x_i, y_i).
+    """
+    if method not in UPDATES:
+        raise ValueError("Unknown method {}, choose from {}".format(
+            method, ', '.join(sorted(UPDATES))))
+    update = UPDATES[method]
+
+    theta = list(theta_0)
+    gradient = [0.0] * len(theta)
+    state = {}
+    alpha = alpha_0
+    min_theta, min_value = list(theta), float("inf")
+    epochs_with_no_improvement = 0
+
+    for _ in range(max_epochs):
+        # without a holdout the running loss is collected while theta moves
+        # through the epoch, so like minimize_stochastic it is kept as the
+        # score of the theta the epoch started from
+        start_theta = list(theta)
+        running_loss = 0.0
+        for batch in epoch():
+            gradient[:] = [0.0] * len(theta)
+            for x_i, y_i in batch:
+                if holdout is None:
+                    running_loss += target_fn(x_i, y_i, theta)
+                gradient[:] = map(add, gradient, gradient_fn(x_i, y_i, theta))
+            update(theta, [g_j / len(batch) for g_j in gradient],
+                   alpha, state, beta_1, beta_2, epsilon)
+
+        if holdout is None:
+            scored_theta, value = start_theta, running_loss / n
+        else:
+            x_holdout, y_holdout = holdout
+            scored_theta = list(theta)
+            value = sum(map(lambda x_i, y_i: target_fn(x_i, y_i, theta),
+                            x_holdout, y_holdout)) / len(x_holdout)
+
+        if value < min_value - tolerance:
+            min_theta, min_value = scored_theta, value
+            epochs_with_no_improvement = 0
+        else:
+            epochs_with_no_improvement += 1
+            if epochs_with_no_improvement >= patience:
+                break
+            alpha *= 0.9
+
+    return min_theta
+
+def minimize_minibatch(target_fn, gradient_fn, x, y, theta_0, alpha_0=0.01,
+                       batch_size=32, method='sgd', holdout=None, patience=10,
+                       tolerance=0.000001, max_epochs=1000, seed=None,
+                       beta_1=0.9, beta_2=0.999, epsilon=1e-8):
+    """
+    minimize the sum of target_fn(x_i, y_i, theta) by mini-batch gradient
+    descent, returning the best theta found
+
+    method is 'sgd', 'momentum' or 'adam'. holdout is an optional pair
+    (x_holdout, y_holdout) to judge improvement by; without it the running
+    loss over each epoch is used, as the score of the theta it started from. An epoch improves if its mean loss beats
+    the best so far by more than tolerance; otherwise alpha is shrunk as in
+    minimize_stochastic. seed makes the order of examples reproducible.
+    """
+    rng = random.Random(seed) if seed is not None else random
+    n = len(x)
+    batch_size = max(1, min(batch_size, n))
+    indexes = list(range(n))
+
+    def epoch():
+        rng.shuffle(indexes)
+        for start in range(0, n, batch_size):
+            yield [(x[i], y[i]) for i in indexes[start:start + batch_size]]
+
+    return _minimize_epochs(target_fn, gradient_fn, epoch, n, theta_0, alpha_0, method,
+                            holdout, patience, tolerance, max_epochs, beta_1, beta_2, epsilon)
+
+def minimize_sharded(target_fn, gradient_fn, shards, theta_0, alpha_0=0.01,
+                     batch_size=32, method='sgd', holdout=None, patience=10,
+                     tolerance=0.000001, max_epochs=1000, seed=None,
+                     beta_1=0.9, beta_2=0.999, epsilon=1e-8):
+    """
+    minimize_minibatch for data too big for memory. shards is a ShardedFile
+    or InMemoryShards (see shards.py). Each epoch visits the shards in a
+    random order and the examples within each shard in a random order, so
+    only one shard is loaded at a time. For a given seed the result depends
+    only on the data and the shard size, not on where the shards live.
+    """
+    rng = random.Random(seed) if seed is not None else random
+    shard_order = list(range(shards.num_shards))
+
+    def epoch():
+        rng.shuffle(shard_order)
+        for s in shard_order:
+            x, y = shards.shard(s)
+            indexes = list(range(len(x)))
+            rng.shuffle(indexes)
+            for start in range(0, len(x), batch_size):
+                yield [(x[i], y[i]) for i in indexes[start:start + batch_size]]
+
+    return _minimize_epochs(target_fn, gradient_fn, epoch, len(shards), theta_0, alpha_0,
+                            method, holdout, patience, tolerance, max_epochs,
+                            beta_1, beta_2, epsilon)
+
 def negate(f):
     """return a function that for any input x returns -f(x)"""
     return lambda *args, **kwargs: -f(*args, **kwargs)
@@ -134,13 +370,38 @@ def negate_all(f):
     """the same when f returns a list of numbers"""
     return lambda *args, **kwargs: [-y for y in f(*args, **kwargs)]
 
-def maximize_batch(target_fn, gradient_fn, theta_0, tolerance=0.000001):
-    return minimize_batch(negate(target_fn),
-                          negate_all(gradient_fn),
+def negate_value_and_gradient(f):
+    """the same when f returns a value and a gradient"""
+    def negated(*args, **kwargs):
+        value, gradient = f(*args, **kwargs)
+        return -value, [-g for g in gradient]
+    return negated
+
+def maximize_batch(target_fn, gradient_fn, theta_0, tolerance=0.000001,
+                   line_search='ladder', value_and_gradient=False, step_size=1.0):
+    if value_and_gradient:
+        target_fn, gradient_fn = negate_value_and_gradient(target_fn), None
+    else:
+        target_fn, gradient_fn = negate(target_fn), negate_all(gradient_fn)
+    return minimize_batch(target_fn,
+                          gradient_fn,
                           theta_0,
-                          tolerance)
+                          tolerance,
+                          line_search,
+                          value_and_gradient,
+                          step_size)
 
 def maximize_stochastic(target_fn, gradient_fn, x, y, theta_0, alpha_0=0.01):
     return minimize_stochastic(negate(target_fn),
                                negate_all(gradient_fn),
                                x, y, theta_0, alpha_0)
+
+def maximize_minibatch(target_fn, gradient_fn, x, y, theta_0, alpha_0=0.01, **kwargs):
+    return minimize_minibatch(negate(target_fn),
+                              negate_all(gradient_fn),
+                              x, y, theta_0, alpha_0, **kwargs)
+
+def maximize_sharded(target_fn, gradient_fn, shards, theta_0, alpha_0=0.01, **kwargs):
+    return minimize_sharded(negate(target_fn),
+                            negate_all(gradient_fn),
+                            shards, theta_0, alpha_0, **kwargs)
@@ -0,0 +1,124 @@
+"""
+Sharded data sets for training on data that doesn't fit in memory
+
+A shard file holds the examples (x_i, y_i) as rows of doubles, x_i followed
+by y_i, after a small header. Consecutive runs of shard_size rows make up
+the shards. The file is memory mapped, and shard(i) copies just that shard
+out into lists, so training touches one shard at a time and the operating
+system pages the rest in and out as needed.
+
+InMemoryShards has the same interface over lists already in memory. Given
+the same data and shard size, the two return identical shards.
+"""
+import mmap
+import struct
+from array import array
+from itertools import islice
+
+
+MAGIC = b'DSFS'
+HEADER = struct.Struct('=4sQQQ')  # magic, num_rows, num_cols of x, shard_size
+
+
+def write_shards(path, examples, shard_size=10000):
+    """
+    write the (x_i, y_i) pairs from the iterable examples to a shard file,
+    streaming them in shard_size chunks. Values are stored as doubles in
+    native byte order. Returns the number of examples written.
+    """
+    examples = iter(examples)
+    num_rows = num_cols = 0
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0, shard_size))
+        while True:
+            chunk = list(islice(examples, shard_size))
+            if not chunk:
+                break
+            if not num_rows:
+                num_cols = len(chunk[0][0])
+            rows = array('d')
+            for x_i, y_i in chunk:
+                if len(x_i) != num_cols:
+                    raise ValueError("rows must all be the same length")
+                rows.extend(x_i)
+                rows.append(y_i)
+            rows.tofile(f)
+            num_rows += len(chunk)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, num_rows, num_cols, shard_size))
+    return num_rows
+
+
+def _split_rows(values, num_cols):
+    width = num_cols + 1
+    x = [values[i:i + num_cols] for i in range(0, len(values), width)]
+    y = values[num_cols::width]
+    return x, y
+
+
+class ShardedFile:
+    """the shards of a file written by write_shards"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, self.num_rows, self.num_cols, self.shard_size = HEADER.unpack(
+                f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("{} isn't a shard file".format(path))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.num_rows else None
+        self.num_shards = -(-self.num_rows // self.shard_size)
+
+    def __len__(self):
+        return self.num_rows
+
+    def shard(self, i):
+        """the examples in the ith shard, as lists x and y"""
+        if not 0 <= i < self.num_shards:
+            raise IndexError("shard index out of range")
+        width = self.num_cols + 1
+        start = i * self.shard_size
+        stop = min(start + self.shard_size, self.num_rows)
+        offset = HEADER.size + 8 * width * start
+        values = memoryview(self._mmap)[offset:offset + 8 * width * (stop - start)]
+        try:
+            return _split_rows(values.cast('d').tolist(), self.num_cols)
+        finally:
+            values.release()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class InMemoryShards:
+    """lists x and y split into shards the same way as a ShardedFile"""
+
+    def __init__(self, x, y, shard_size=10000):
+        self.x, self.y = x, y
+        self.num_rows = len(x)
+        self.num_cols = len(x[0]) if x else 0
+        self.shard_size = shard_size
+        self.num_shards = -(-self.num_rows // shard_size)
+
+    def __len__(self):
+        return self.num_rows
+
+    def shard(self, i):
+        if not 0 <= i < self.num_shards:
+            raise IndexError("shard index out of range")
+        start = i * self.shard_size
+        stop = min(start + self.shard_size, self.num_rows)
+        # go through doubles, as the file does, so both give the same numbers
+        values = array('d')
+        for x_i, y_i in zip(self.x[start:stop], self.y[start:stop]):
+            values.extend(x_i)
+            values.append(y_i)
+        return _split_rows(values.tolist(), self.num_cols)
@@ -0,0 +1,119 @@
+"""
+Tests for gradient descent
+"""
+import random
+from gradient_descent import *
+
+
+def approx(a, b, epsilon=1e-6):
+    return abs(a-b) < epsilon
+
+
+def quadratic(v):
+    return (v[0] - 3) ** 2 + 10 * (v[1] + 1) ** 2
+
+def quadratic_gradient(v):
+    return [2 * (v[0] - 3), 20 * (v[1] + 1)]
+
+def quadratic_value_and_gradient(v):
+    return quadratic(v), quadratic_gradient(v)
+
+
+def test_estimate_gradient():
+    v = [1.0, 2.0]
+    for method in ('central', 'forward'):
+        estimate = estimate_gradient(quadratic, v, method=method)
+        assert all(abs(a - b) < 1e-3 for a, b in zip(estimate, quadratic_gradient(v)))
+    assert v == [1.0, 2.0]
+    assert all(approx(a, b) for a, b in zip(
+        estimate_gradient(quadratic, v),
+        [partial_difference_quotient(quadratic, v, i) for i in range(2)]))
+
+
+def test_minimize_batch():
+    for line_search in ('ladder', 'armijo'):
+        theta, values = minimize_batch(quadratic, quadratic_gradient, [0, 0],
+                                       tolerance=1e-10, line_search=line_search)
+        assert abs(theta[0] - 3) < 1e-3 and abs(theta[1] + 1) < 1e-3
+        assert values == sorted(values, reverse=True)
+
+        same, _ = minimize_batch(quadratic_value_and_gradient, None, [0, 0],
+                                 tolerance=1e-10, line_search=line_search,
+                                 value_and_gradient=True)
+        assert same == theta
+
+
+def test_minimize_batch_stops_when_every_step_fails():
+    # defined only within distance 1 of the origin
+    def f(v):
+        if sum_of_squares(v) > 1:
+            raise ValueError("out of bounds")
+        return quadratic(v)
+    def f_and_gradient(v):
+        return f(v), quadratic_gradient(v)
+    for line_search in ('ladder', 'armijo'):
+        theta, values = minimize_batch(f, quadratic_gradient, [0, 0], line_search=line_search)
+        assert sum_of_squares(theta) <= 1 and values[-1] < quadratic([0, 0])
+        same, _ = minimize_batch(f_and_gradient, None, [0, 0], line_search=line_search,
+                                 value_and_gradient=True)
+        assert same == theta
+        # failing at the start too
+        theta, values = minimize_batch(f_and_gradient, None, [2, 2], line_search=line_search,
+                                       value_and_gradient=True)
+        assert theta == [2, 2] and values == [float('inf')]
+
+
+def test_minimize_batch_sum_of_squares():
+    random.seed(0)
+    v = [random.randint(-10, 10) for _ in range(3)]
+    theta, _ = minimize_batch(sum_of_squares, est_gradient_sum_of_squares, v)
+    assert all(abs(theta_i) < 0.01 for theta_i in theta)
+
+
+def test_maximize_batch():
+    def f(v):
+        return -quadratic(v)
+    def f_and_gradient(v):
+        return -quadratic(v), [-g for g in quadratic_gradient(v)]
+    theta, _ = maximize_batch(f, lambda v: [-g for g in quadratic_gradient(v)], [0, 0],
+                              line_search='armijo')
+    other, _ = maximize_batch(f_and_gradient, None, [0, 0], line_search='armijo',
+                              value_and_gradient=True)
+    assert theta == other
+    assert abs(theta[0] - 3) < 1e-2 and abs(theta[1] + 1) < 1e-2
+
+
+def squared_error(x_i, y_i, theta):
+    return (y_i - sum(a * b for a, b in zip(x_i, theta))) ** 2
+
+def squared_error_gradient(x_i, y_i, theta):
+    error = y_i - sum(a * b for a, b in zip(x_i, theta))
+    return [-2 * x_ij * error for x_ij in x_i]
+
+
+def test_minimize_minibatch():
+    random.seed(0)
+    x = [[1, random.random(), random.random()] for _ in range(500)]
+    y = [1 + 2 * x_i[1] - 3 * x_i[2] for x_i in x]
+
+    for method, alpha in [('sgd', 0.5), ('momentum', 0.05), ('adam', 0.05)]:
+        theta_0 = [0.0, 0.0, 0.0]
+        theta = minimize_minibatch(squared_error, squared_error_gradient, x, y, theta_0,
+                                   alpha, batch_size=16, method=method, seed=1)
+        assert theta_0 == [0.0, 0.0, 0.0]
+        assert all(abs(a - b) < 0.05 for a, b in zip(theta, [1, 2, -3])), method
+        assert theta == minimize_minibatch(squared_error, squared_error_gradient, x, y,
+                                           theta_0, alpha, batch_size=16, method=method,
+                                           seed=1)
+
+    theta = minimize_minibatch(squared_error, squared_error_gradient, x[100:], y[100:],
+                               [0.0, 0.0, 0.0], 0.05, method='adam',
+                               holdout=(x[:100], y[:100]), seed=1)
+    assert all(abs(a - b) < 0.05 for a, b in zip(theta, [1, 2, -3]))
+
+    # with one full batch per epoch the running loss is exactly the loss at
+    # the theta each epoch starts from; a step size that diverges never beats
+    # theta_0, so theta_0 is what comes back
+    theta = minimize_minibatch(squared_error, squared_error_gradient, x, y,
+                               [0.0, 0.0, 0.0], 10.0, batch_size=len(x), patience=3)
+    assert theta == [0.0, 0.0, 0.0]
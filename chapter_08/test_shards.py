@@ -0,0 +1,51 @@
+"""
+Tests for sharded data sets
+"""
+import random
+from shards import *
+from gradient_descent import minimize_sharded
+
+
+def make_data(n):
+    random.seed(0)
+    x = [[1, random.random(), random.random()] for _ in range(n)]
+    y = [1 + 2 * x_i[1] - 3 * x_i[2] + random.gauss(0, 0.01) for x_i in x]
+    return x, y
+
+
+def squared_error(x_i, y_i, theta):
+    return (y_i - sum(a * b for a, b in zip(x_i, theta))) ** 2
+
+def squared_error_gradient(x_i, y_i, theta):
+    error = y_i - sum(a * b for a, b in zip(x_i, theta))
+    return [-2 * x_ij * error for x_ij in x_i]
+
+
+def test_shard_file_round_trip(tmp_path):
+    x, y = make_data(250)
+    path = tmp_path / 'data.shards'
+    assert write_shards(path, zip(x, y), shard_size=100) == 250
+
+    in_memory = InMemoryShards(x, y, shard_size=100)
+    with ShardedFile(path) as on_disk:
+        assert len(on_disk) == 250 and on_disk.num_cols == 3
+        assert on_disk.num_shards == in_memory.num_shards == 3
+        for i in range(3):
+            assert on_disk.shard(i) == in_memory.shard(i)
+        x_2, y_2 = on_disk.shard(2)
+        assert x_2 == x[200:] and y_2 == y[200:]
+
+
+def test_minimize_sharded_matches_in_memory(tmp_path):
+    x, y = make_data(1000)
+    path = tmp_path / 'data.shards'
+    write_shards(path, zip(x, y), shard_size=300)
+
+    def fit(shards):
+        return minimize_sharded(squared_error, squared_error_gradient, shards,
+                                [0.0, 0.0, 0.0], 0.05, method='adam', seed=2)
+
+    with ShardedFile(path) as on_disk:
+        theta = fit(on_disk)
+    assert theta == fit(InMemoryShards(x, y, shard_size=300))
+    assert all(abs(a - b) < 0.05 for a, b in zip(theta, [1, 2, -3]))
@@ -0,0 +1,247 @@
+"""
+Spatial indexes for nearest neighbor search
+
+Supports k-nearest neighbors from Chapter 12 and cluster assignment from
+Chapter 19 of Data Science from Scratch.
+"""
+import heapq
+import math
+from bisect import bisect_left
+from collections import Counter
+from itertools import count, repeat
+
+
+# Four ways to find the k points nearest a query point. They all have the
+# same interface: build from a list of points, then query(point, k) returns
+# a list of (distance, index) pairs, nearest first.
+#
+# ScanIndex measures the distance to every point and keeps the k smallest
+# with heapq.nsmallest. It has nothing to prune, and nothing to pay for
+# pruning either.
+#
+# BruteForceIndex sorts the points by their distance to a pivot. By the
+# triangle inequality a point can't be nearer the query than the difference
+# of their distances to the pivot, so the scan works outwards from the
+# query's position in that order and stops once that bound passes the kth
+# best distance found.
+#
+# KDTree splits the points in half on the coordinate with the widest spread,
+# recursively, and skips any half that's further across the splitting plane
+# than the kth best distance.
+#
+# BallTree splits the same way but bounds each node by a ball around its
+# centroid, which keeps pruning in more dimensions than the planes of a k-d
+# tree do.
+#
+# As the curse of dimensionality notebook shows, distances between random
+# points bunch up as the dimension grows, and then no bound prunes much.
+# The benchmarks in benchmarks/run_benchmarks.py show where each one wins:
+# the trees in a few dimensions, the plain scan from about 8 on. For
+# uniform random points the pivot ordering of BruteForceIndex costs more
+# than it saves at every dimension.
+
+class _Neighbors:
+    """the k best (distance, index) pairs seen so far, ties going to the lower index"""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []      # (-distance, -index), worst on top
+
+    def worst(self):
+        return -self.heap[0][0] if len(self.heap) == self.k else math.inf
+
+    def push(self, distance, i):
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (-distance, -i))
+        elif (-distance, -i) > self.heap[0]:
+            heapq.heapreplace(self.heap, (-distance, -i))
+
+    def sorted(self):
+        return sorted((-d, -i) for d, i in self.heap)
+
+
+class ScanIndex:
+    """all the points, measured one by one"""
+
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points]
+        if not self.points:
+            raise ValueError("no points to index")
+
+    def query(self, point, k=1):
+        distances = map(math.dist, repeat(point), self.points)
+        return heapq.nsmallest(k, zip(distances, count()))
+
+
+class BruteForceIndex:
+    """all the points, scanned in order of distance to a pivot"""
+
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points]
+        if not self.points:
+            raise ValueError("no points to index")
+        dim = len(self.points[0])
+        self.pivot = [sum(p[j] for p in self.points) / len(self.points) for j in range(dim)]
+        ranked = sorted((math.dist(p, self.pivot), i) for i, p in enumerate(self.points))
+        self.radii = [r for r, _ in ranked]
+        self.order = [i for _, i in ranked]
+
+    def query(self, point, k=1):
+        points, radii, order = self.points, self.radii, self.order
+        dist = math.dist
+        neighbors = _Neighbors(k)
+        r = dist(point, self.pivot)
+        below = bisect_left(radii, r) - 1
+        above = below + 1
+        n = len(radii)
+        while below >= 0 or above < n:
+            # visit whichever side is nearer in radius
+            if above >= n or (below >= 0 and r - radii[below] <= radii[above] - r):
+                bound, j = r - radii[below], below
+                below -= 1
+            else:
+                bound, j = radii[above] - r, above
+                above += 1
+            if bound > neighbors.worst():
+                # everything left is at least this far away
+                break
+            i = order[j]
+            neighbors.push(dist(point, points[i]), i)
+        return neighbors.sorted()
+
+
+def _widest_dimension(points, indices):
+    dim = len(points[indices[0]])
+    spreads = []
+    for j in range(dim):
+        values = [points[i][j] for i in indices]
+        spreads.append(max(values) - min(values))
+    return max(range(dim), key=spreads.__getitem__)
+
+
+class KDTree:
+    """a k-d tree with leaves of up to leaf_size points"""
+
+    def __init__(self, points, leaf_size=16):
+        self.points = [tuple(p) for p in points]
+        if not self.points:
+            raise ValueError("no points to index")
+        self.leaf_size = leaf_size
+        self.root = self._build(list(range(len(self.points))))
+
+    def _build(self, indices):
+        """a leaf is a list of indices, an inner node (dim, split, left, right)"""
+        if len(indices) <= self.leaf_size:
+            return indices
+        points = self.points
+        dim = _widest_dimension(points, indices)
+        indices.sort(key=lambda i: points[i][dim])
+        middle = len(indices) // 2
+        split = points[indices[middle]][dim]
+        return (dim, split, self._build(indices[:middle]), self._build(indices[middle:]))
+
+    def query(self, point, k=1):
+        points, dist = self.points, math.dist
+        neighbors = _Neighbors(k)
+
+        def search(node):
+            if isinstance(node, list):
+                for i in node:
+                    neighbors.push(dist(point, points[i]), i)
+                return
+            dim, split, left, right = node
+            diff = point[dim] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            search(near)
+            if abs(diff) <= neighbors.worst():
+                search(far)
+
+        search(self.root)
+        return neighbors.sorted()
+
+
+class BallTree:
+    """a ball tree with leaves of up to leaf_size points"""
+
+    def __init__(self, points, leaf_size=16):
+        self.points = [tuple(p) for p in points]
+        if not self.points:
+            raise ValueError("no points to index")
+        self.leaf_size = leaf_size
+        self.root = self._build(list(range(len(self.points))))
+
+    def _build(self, indices):
+        """a node is (center, radius, indices or None, children)"""
+        points = self.points
+        dim = len(points[indices[0]])
+        center = tuple(sum(points[i][j] for i in indices) / len(indices) for j in range(dim))
+        radius = max(math.dist(center, points[i]) for i in indices)
+        if len(indices) <= self.leaf_size:
+            return (center, radius, indices, ())
+        split_dim = _widest_dimension(points, indices)
+        indices.sort(key=lambda i: points[i][split_dim])
+        middle = len(indices) // 2
+        return (center, radius, None,
+                (self._build(indices[:middle]), self._build(indices[middle:])))
+
+    def query(self, point, k=1):
+        points, dist = self.points, math.dist
+        neighbors = _Neighbors(k)
+
+        def search(node, distance_to_center):
+            center, radius, indices, children = node
+            if distance_to_center - radius > neighbors.worst():
+                return
+            if indices is not None:
+                for i in indices:
+                    neighbors.push(dist(point, points[i]), i)
+                return
+            # nearer child first, so the bound tightens sooner
+            ranked = sorted((dist(point, child[0]), n, child)
+                            for n, child in enumerate(children))
+            for d, _, child in ranked:
+                search(child, d)
+
+        search(self.root, dist(point, self.root[0]))
+        return neighbors.sorted()
+
+
+INDEXES = {'scan': ScanIndex, 'brute': BruteForceIndex, 'kd': KDTree, 'ball': BallTree}
+
+def make_index(points, backend='kd', **kwargs):
+    """build the spatial index named backend over points"""
+    if backend not in INDEXES:
+        raise ValueError("Unknown backend {}, choose from {}".format(
+            backend, ', '.join(sorted(INDEXES))))
+    return INDEXES[backend](points, **kwargs)
+
+
+def nearest(index, point):
+    """the index of the point nearest to point"""
+    return index.query(point, 1)[0][1]
+
+
+def assign(index, points):
+    """the index of the nearest indexed point for each of points, as for k-means"""
+    return [index.query(point, 1)[0][1] for point in points]
+
+
+def majority_vote(labels):
+    """assumes that labels are ordered from nearest to farthest"""
+    vote_counts = Counter(labels)
+    winner, winner_count = vote_counts.most_common(1)[0]
+    num_winners = len([count for count in vote_counts.values()
+                       if count == winner_count])
+
+    if num_winners == 1:
+        return winner                     # unique winner, so return it
+    else:
+        return majority_vote(labels[:-1]) # try again without the farthest
+
+
+def knn_classify(k, index, labels, new_point):
+    """
+    the majority label of the k indexed points nearest new_point, where
+    labels[i] is the label of the ith indexed point
+    """
+    return majority_vote([labels[i] for _, i in index.query(new_point, k)])
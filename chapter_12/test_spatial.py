@@ -0,0 +1,54 @@
+"""
+Tests for spatial indexes
+"""
+import math
+import random
+from spatial import *
+
+
+def brute_force(points, point, k):
+    return sorted((math.dist(point, p), i) for i, p in enumerate(points))[:k]
+
+
+def test_backends_agree_with_brute_force():
+    random.seed(0)
+    for dim in [1, 2, 5, 20]:
+        points = [[random.random() for _ in range(dim)] for _ in range(300)]
+        # repeated points and ties shouldn't confuse anything
+        points += points[:20]
+        queries = [[random.random() for _ in range(dim)] for _ in range(20)] + points[:5]
+        for backend in INDEXES:
+            index = make_index(points, backend)
+            for q in queries:
+                for k in [1, 7]:
+                    assert index.query(q, k) == brute_force(points, q, k), backend
+
+
+def test_small_leaves_and_few_points():
+    points = [[0, 0], [1, 0], [0, 1]]
+    for backend in ['kd', 'ball']:
+        index = make_index(points, backend, leaf_size=1)
+        assert [i for _, i in index.query([0.9, 0.1], 3)] == [1, 0, 2]
+    # asking for more neighbors than there are points returns all of them
+    assert len(make_index(points, 'brute').query([0, 0], 10)) == 3
+
+
+def test_knn_classify_and_assign():
+    points = [[0, 0], [0, 1], [1, 0], [10, 10], [10, 11], [11, 10]]
+    labels = ['a', 'a', 'a', 'b', 'b', 'b']
+    for backend in INDEXES:
+        index = make_index(points, backend)
+        assert knn_classify(3, index, labels, [1, 1]) == 'a'
+        assert knn_classify(3, index, labels, [9, 9]) == 'b'
+
+    means = make_index([[0, 0], [10, 10]])
+    assert nearest(means, [2, 3]) == 0
+    assert assign(means, points) == [0, 0, 0, 1, 1, 1]
+
+
+def test_unknown_backend():
+    try:
+        make_index([[0, 0]], 'octree')
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,156 @@
+"""
+Naive Bayes
+
+Code from Chapter 13 of Data Science from Scratch, reworked to score a
+message in time proportional to its length rather than the vocabulary's.
+"""
+import math
+import re
+from multiprocessing import Pool
+
+
+TOKEN = re.compile("[a-z0-9']+")
+
+def tokenize(message):
+    message = message.lower()
+    all_words = TOKEN.findall(message)
+    return set(all_words)
+
+
+def count_words(training_set, counts=None):
+    """
+    training set consists of pairs (message, is_spam). Adds to counts, a
+    dict from word to [spam count, non-spam count], if given.
+    """
+    if counts is None:
+        counts = {}
+    for message, is_spam in training_set:
+        for word in tokenize(message):
+            counts.setdefault(word, [0, 0])[0 if is_spam else 1] += 1
+    return counts
+
+
+def word_probabilities(counts, total_spams, total_non_spams, k=0.5):
+    """
+    turn the word_counts into a list of triplets
+    w, p(w | spam) and p(w | ~spam)
+    """
+    return [(w,
+             (spam + k) / (total_spams + 2 * k),
+             (non_spam + k) / (total_non_spams + 2 * k))
+            for w, (spam, non_spam) in counts.items()]
+
+
+def p_spam_given_word(word_prob):
+    word, prob_if_spam, prob_if_not_spam = word_prob
+    return prob_if_spam / (prob_if_spam + prob_if_not_spam)
+
+
+# The notebook's spam_probability went through the whole vocabulary for
+# every message, adding log p(word) for the words in the message and
+# log(1 - p(word)) for all the rest. Most words are in the rest, so here
+# the log probability of a message with none of the words is summed once,
+# and scoring a message starts from that and adjusts for just the words in
+# it, adding log p(word) - log(1 - p(word)) for each.
+#
+# The model is recomputed from the counts, lazily, on the first classify
+# after training. The final probability comes from the difference of the
+# two log probabilities, so it doesn't underflow to 0 / 0 when both are
+# tiny, as the notebook's did for long messages and big vocabularies.
+
+def _spam_probability(log_prob_if_spam, log_prob_if_not_spam):
+    """p(spam) from the two log likelihoods, without overflow"""
+    x = log_prob_if_spam - log_prob_if_not_spam
+    if x >= 0:
+        return 1 / (1 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1 + z)
+
+
+def _score(model, message):
+    (log_prob_if_spam, log_prob_if_not_spam), adjustments = model
+    for word in tokenize(message):
+        adjustment = adjustments.get(word)
+        if adjustment is not None:
+            log_prob_if_spam += adjustment[0]
+            log_prob_if_not_spam += adjustment[1]
+    return _spam_probability(log_prob_if_spam, log_prob_if_not_spam)
+
+
+# state of a worker process, set up by _init_worker
+_model = None
+
+def _init_worker(model):
+    global _model
+    _model = model
+
+def _worker_score(message):
+    return _score(_model, message)
+
+
+class NaiveBayesClassifier:
+
+    def __init__(self, k=0.5):
+        self.k = k
+        self.counts = {}
+        self.num_spams = self.num_non_spams = 0
+        self._model = None
+
+    def partial_fit(self, training_set):
+        """add the (message, is_spam) pairs, from any iterable, to the counts"""
+        counts = self.counts
+        num_spams = num_messages = 0
+        for message, is_spam in training_set:
+            num_messages += 1
+            i = 0 if is_spam else 1
+            num_spams += 1 - i
+            for word in tokenize(message):
+                counts.setdefault(word, [0, 0])[i] += 1
+        self.num_spams += num_spams
+        self.num_non_spams += num_messages - num_spams
+        self._model = None
+        return self
+
+    def train(self, training_set):
+        """forget any previous training and train on the (message, is_spam) pairs"""
+        self.counts = {}
+        self.num_spams = self.num_non_spams = 0
+        return self.partial_fit(training_set)
+
+    @property
+    def word_probs(self):
+        return word_probabilities(self.counts, self.num_spams, self.num_non_spams, self.k)
+
+    def model(self):
+        """
+        the log probabilities of a message with none of the words, and for
+        each word, what its presence adds to them
+        """
+        if self._model is None:
+            baseline_if_spam, baseline_if_not_spam = [], []
+            adjustments = {}
+            for word, prob_if_spam, prob_if_not_spam in self.word_probs:
+                log_absent_if_spam = math.log(1.0 - prob_if_spam)
+                log_absent_if_not_spam = math.log(1.0 - prob_if_not_spam)
+                baseline_if_spam.append(log_absent_if_spam)
+                baseline_if_not_spam.append(log_absent_if_not_spam)
+                adjustments[word] = (math.log(prob_if_spam) - log_absent_if_spam,
+                                     math.log(prob_if_not_spam) - log_absent_if_not_spam)
+            self._model = ((math.fsum(baseline_if_spam), math.fsum(baseline_if_not_spam)),
+                           adjustments)
+        return self._model
+
+    def classify(self, message):
+        return _score(self.model(), message)
+
+    def classify_many(self, messages, processes=None, chunk_size=1000):
+        """
+        classify each of the messages, tokenizing and scoring chunks of
+        them in a pool of processes if processes is more than 1
+        """
+        messages = list(messages)
+        model = self.model()
+        if processes and processes > 1 and len(messages) > chunk_size:
+            with Pool(processes, initializer=_init_worker, initargs=(model,)) as pool:
+                return pool.map(_worker_score, messages, chunksize=chunk_size)
+        return [_score(model, message) for message in messages]
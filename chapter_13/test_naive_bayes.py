@@ -0,0 +1,78 @@
+"""
+Tests for naive Bayes
+"""
+import math
+import random
+from naive_bayes import *
+
+
+def spam_probability(word_probs, message):
+    """the notebook's version, to compare against"""
+    message_words = tokenize(message)
+    log_prob_if_spam = log_prob_if_not_spam = 0.0
+    for word, prob_if_spam, prob_if_not_spam in word_probs:
+        if word in message_words:
+            log_prob_if_spam += math.log(prob_if_spam)
+            log_prob_if_not_spam += math.log(prob_if_not_spam)
+        else:
+            log_prob_if_spam += math.log(1.0 - prob_if_spam)
+            log_prob_if_not_spam += math.log(1.0 - prob_if_not_spam)
+    prob_if_spam = math.exp(log_prob_if_spam)
+    prob_if_not_spam = math.exp(log_prob_if_not_spam)
+    return prob_if_spam / (prob_if_spam + prob_if_not_spam)
+
+
+def random_messages(n, vocabulary_size=200, words_per_message=8):
+    vocabulary = ['w{}'.format(i) for i in range(vocabulary_size)]
+    spam_words = vocabulary[:vocabulary_size // 10]
+    messages = []
+    for _ in range(n):
+        is_spam = random.random() < 0.3
+        source = spam_words if is_spam and random.random() < 0.5 else vocabulary
+        messages.append((' '.join(random.choice(source) for _ in range(words_per_message)), is_spam))
+    return messages
+
+
+def test_tokenize():
+    assert tokenize('The quick brown fox jumped over R2-D2, C3PO and 1729 lazy dogs!!!!!') == \
+        {'the', 'quick', 'brown', 'fox', 'jumped', 'over', 'r2', 'd2', 'c3po', 'and', '1729', 'lazy', 'dogs'}
+
+
+def test_same_probabilities_as_the_notebook():
+    random.seed(0)
+    training_set = random_messages(500)
+    classifier = NaiveBayesClassifier().train(training_set)
+    for message, _ in random_messages(50) + [('nothing known here', False), ('', True)]:
+        assert math.isclose(classifier.classify(message),
+                            spam_probability(classifier.word_probs, message), rel_tol=1e-9)
+
+
+def test_partial_fit():
+    random.seed(1)
+    training_set = random_messages(300)
+    whole = NaiveBayesClassifier().train(training_set)
+    streamed = NaiveBayesClassifier()
+    for start in range(0, 300, 70):
+        streamed.partial_fit(iter(training_set[start:start + 70]))
+        streamed.classify('w1 w2')
+    assert streamed.counts == whole.counts
+    assert streamed.model() == whole.model()
+    # train starts over
+    assert NaiveBayesClassifier().train(training_set[:10]).train(training_set).counts == whole.counts
+
+
+def test_classify_many():
+    random.seed(2)
+    classifier = NaiveBayesClassifier().train(random_messages(300))
+    messages = [message for message, _ in random_messages(100)]
+    serial = classifier.classify_many(messages)
+    assert serial == [classifier.classify(message) for message in messages]
+    assert serial == classifier.classify_many(messages, processes=2, chunk_size=10)
+
+
+def test_big_vocabularies_dont_underflow():
+    training_set = [(' '.join('s{}'.format(i) for i in range(2000)), True),
+                    (' '.join('h{}'.format(i) for i in range(2000)), False)]
+    classifier = NaiveBayesClassifier().train(training_set)
+    assert classifier.classify('s1 s2 s3') > 0.9
+    assert classifier.classify('h1 h2 h3') < 0.1
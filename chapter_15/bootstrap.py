@@ -0,0 +1,204 @@
+"""
+Bootstrapping
+
+Code from Chapter 15 of Data Science from Scratch, reworked to fit many
+resamples quickly.
+"""
+import random
+from functools import partial
+from multiprocessing import Pool
+from operator import add
+
+from stats import standard_deviation
+from normal import normal_cdf
+from gradient_descent import minimize_batch, minimize_stochastic
+from logistic_regression import (NormalEquations, squared_error, squared_error_gradient,
+                                 squared_error_ridge, squared_error_ridge_gradient)
+
+
+# The notebook's bootstrap_statistic copied the data for every resample and
+# fit each one in turn. Here a resample is just a list of indices into the
+# data, and fit functions get the indices along with the data itself, so
+# fits that can work from the indices never copy any rows. The exact
+# regression fit, for one, weights each original row by how many times it
+# was drawn. Resamples are handed out in chunks to a pool of worker
+# processes, each of which gets the data once when it starts. Each chunk
+# draws its indices from its own generator, seeded from the overall seed
+# and the chunk's index, and results come back in chunk order, so the
+# output for a given seed is the same however many processes do the work.
+#
+# A fit function takes (data, indices, init, rng): the data, the indices
+# of a resample, a starting point, and a random number generator for fits
+# that need one. Iterative fits can start from init, the fit to the full
+# data set, which is usually close to the fit to a resample.
+#
+# With a tolerance, bootstrapping stops early once the standard errors
+# change by less than that fraction from one chunk to the next.
+
+CHUNK_SIZE = 10
+
+
+def bootstrap_indices(n, rng=random):
+    """the indices of a sample of size n, drawn with replacement"""
+    return rng.choices(range(n), k=n)
+
+
+def bootstrap_sample(data, rng=random):
+    """randomly samples len(data) elements with replacement"""
+    return [data[i] for i in bootstrap_indices(len(data), rng)]
+
+
+def _fit_chunk(fit, data, init, seed, chunk, num_samples):
+    rng = random.Random('{}:{}'.format(seed, chunk))
+    results = []
+    for _ in range(num_samples):
+        results.append(fit(data, bootstrap_indices(len(data), rng), init, rng))
+    return results
+
+
+# state of a worker process, set up by _init_worker
+_fit = _data = _init = None
+
+def _init_worker(fit, data, init):
+    global _fit, _data, _init
+    _fit, _data, _init = fit, data, init
+
+def _worker_chunk(args):
+    return _fit_chunk(_fit, _data, _init, *args)
+
+
+def standard_errors(results):
+    """the standard deviation of each coordinate of the bootstrap results"""
+    if not isinstance(results[0], (list, tuple)):
+        return standard_deviation(results)
+    return [standard_deviation(column) for column in zip(*results)]
+
+
+def _stable(previous, current, tolerance):
+    if not isinstance(current, list):
+        previous, current = [previous], [current]
+    return all(abs(c - p) <= tolerance * abs(p) for p, c in zip(previous, current))
+
+
+def bootstrap(fit, data, num_samples, init=None, seed=0, processes=None,
+              chunk_size=CHUNK_SIZE, progress=None, tolerance=None, min_samples=20):
+    """
+    fit num_samples bootstrap resamples of data, returning the list of
+    results. progress, if given, is called with (samples done, num_samples)
+    after each chunk. With a tolerance, stops early once at least
+    min_samples are done and the standard errors have stabilized.
+    """
+    data = list(data)
+    tasks = [(seed, chunk, min(chunk_size, num_samples - start))
+             for chunk, start in enumerate(range(0, num_samples, chunk_size))]
+
+    if processes and processes > 1 and len(tasks) > 1:
+        pool = Pool(processes, initializer=_init_worker, initargs=(fit, data, init))
+        chunks = pool.imap(_worker_chunk, tasks)
+    else:
+        pool = None
+        chunks = (_fit_chunk(fit, data, init, *task) for task in tasks)
+
+    results = []
+    previous = None
+    try:
+        for chunk_results in chunks:
+            results.extend(chunk_results)
+            if progress:
+                progress(len(results), num_samples)
+            if tolerance is not None and len(results) >= max(min_samples, 2):
+                current = standard_errors(results)
+                if previous is not None and _stable(previous, current, tolerance):
+                    break
+                previous = current
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return results
+
+
+def _call_statistic(stats_fn, data, indices, init, rng):
+    return stats_fn([data[i] for i in indices])
+
+
+def bootstrap_statistic(data, stats_fn, num_samples, **kwargs):
+    """
+    evaluates stats_fn on num_samples bootstrap samples from data. Takes
+    the keyword arguments of bootstrap.
+    """
+    return bootstrap(partial(_call_statistic, stats_fn), data, num_samples, **kwargs)
+
+
+# Bootstrapping regression coefficients
+
+def _counts(indices, n):
+    """how many times each of n rows was drawn"""
+    counts = [0] * n
+    for i in indices:
+        counts[i] += 1
+    return counts
+
+
+def fit_sample_beta(x, indices, init, rng, y, method='exact', alpha=0.0):
+    """
+    fit beta to the rows of x and y picked by indices, or to all of them if
+    indices is None. method 'exact' solves the normal equations, 'batch'
+    and 'stochastic' run gradient descent starting from init.
+    """
+    if alpha:
+        target_fn = partial(squared_error_ridge, alpha=alpha)
+        gradient_fn = partial(squared_error_ridge_gradient, alpha=alpha)
+    else:
+        target_fn, gradient_fn = squared_error, squared_error_gradient
+    if method == 'stochastic':
+        # the only fit that needs the resample itself, in the order it was drawn
+        if indices is not None:
+            x, y = [x[i] for i in indices], [y[i] for i in indices]
+        return minimize_stochastic(target_fn, gradient_fn, x, y, init, 0.001)
+
+    counts = [1] * len(x) if indices is None else _counts(indices, len(x))
+    if method == 'exact':
+        return NormalEquations().partial_fit(x, y, weights=counts).solve(alpha)
+    if method == 'batch':
+        drawn = [i for i, count in enumerate(counts) if count]
+
+        def value_and_gradient(beta):
+            value, gradient = 0.0, [0.0] * len(beta)
+            for i in drawn:
+                count = counts[i]
+                value += count * target_fn(x[i], y[i], beta)
+                gradient[:] = map(add, gradient,
+                                  [count * g for g in gradient_fn(x[i], y[i], beta)])
+            return value, gradient
+        beta, _ = minimize_batch(value_and_gradient, None, init, tolerance=1e-10,
+                                 line_search='armijo', value_and_gradient=True)
+        return beta
+    raise ValueError("Unknown method {}, choose exact, batch or stochastic".format(method))
+
+
+def bootstrap_beta(x, y, num_samples, method='exact', alpha=0.0, **kwargs):
+    """
+    fit beta to all of the data, then to num_samples bootstrap resamples,
+    warm starting the iterative methods from the full fit. Returns beta,
+    the resampled betas and their standard errors. Takes the keyword
+    arguments of bootstrap.
+    """
+    x, y = list(x), list(y)
+    rng = random.Random(kwargs.get('seed', 0))
+    init = [rng.random() for _ in x[0]]
+    beta = fit_sample_beta(x, None, init, rng, y, method, alpha)
+    # the rows go to the workers as the data, the targets with the fit
+    fit = partial(fit_sample_beta, y=y, method=method, alpha=alpha)
+    betas = bootstrap(fit, x, num_samples, init=beta, **kwargs)
+    return beta, betas, standard_errors(betas)
+
+
+def p_value(beta_hat_j, sigma_hat_j):
+    if beta_hat_j > 0:
+        # if the coefficient is positive, we need to compute twice the
+        # probability of seeing an even *larger* value
+        return 2 * (1 - normal_cdf(beta_hat_j / sigma_hat_j))
+    else:
+        # otherwise twice the probability of seeing a *smaller* value
+        return 2 * normal_cdf(beta_hat_j / sigma_hat_j)
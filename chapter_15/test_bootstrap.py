@@ -0,0 +1,56 @@
+"""
+Tests for bootstrapping
+"""
+import random
+from bootstrap import *
+from stats import median
+
+
+def make_data(n=200):
+    random.seed(0)
+    x = [[1, random.random(), random.random()] for _ in range(n)]
+    y = [1 + 2 * x_i[1] + random.gauss(0, 0.5) for x_i in x]
+    return x, y
+
+
+def test_bootstrap_statistic_is_seed_stable():
+    random.seed(0)
+    data = [random.random() for _ in range(101)]
+    serial = bootstrap_statistic(data, median, 30, seed=5, chunk_size=4)
+    assert len(serial) == 30
+    assert all(x in data for x in serial)
+    assert serial == bootstrap_statistic(data, median, 30, seed=5, chunk_size=4, processes=2)
+    assert serial != bootstrap_statistic(data, median, 30, seed=6, chunk_size=4)
+
+
+def test_bootstrap_beta():
+    x, y = make_data()
+    progress = []
+    beta, betas, errors = bootstrap_beta(x, y, 100, progress=lambda done, total: progress.append(done))
+    assert len(betas) == 100 and progress[-1] == 100
+    assert abs(beta[1] - 2) < 5 * errors[1]
+    # x_2 doesn't matter
+    assert p_value(beta[2], errors[2]) > 0.01
+    assert p_value(beta[1], errors[1]) < 0.001
+
+
+def test_bootstrap_warm_start_and_early_stop():
+    x, y = make_data(100)
+    beta, betas, _ = bootstrap_beta(x, y, 1000, chunk_size=10, tolerance=0.05)
+    assert 20 <= len(betas) < 1000
+
+    _, warm, _ = bootstrap_beta(x, y, 4, method='batch', chunk_size=2)
+    _, exact, _ = bootstrap_beta(x, y, 4, chunk_size=2)
+    assert all(abs(a - b) < 1e-3 for w, e in zip(warm, exact) for a, b in zip(w, e))
+
+
+def test_weights_count_rows():
+    x, y = make_data(50)
+    indices = random.Random(1).choices(range(50), k=50)
+    resample = NormalEquations().partial_fit([x[i] for i in indices], [y[i] for i in indices])
+    weighted = NormalEquations().partial_fit(x, y, weights=[indices.count(i) for i in range(50)])
+    assert weighted.n == resample.n
+    assert all(abs(a - b) < 1e-9 for a, b in zip(weighted.solve(), resample.solve()))
+    for method in ['exact', 'batch']:
+        beta = fit_sample_beta(x, indices, resample.solve(), None, y, method)
+        assert all(abs(a - b) < 1e-6 for a, b in zip(beta, resample.solve()))
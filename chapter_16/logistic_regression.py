@@ -1,33 +1,159 @@
+import json
+import math
 import random
+from collections import defaultdict
+from collections.abc import Sequence
+from functools import partial, reduce
+from itertools import compress, islice
+from operator import add, mul, sub, truediv
 
-from stats import mean, median, de_mean, standard_deviation, correlation
-from gradient_descent import minimize_stochastic
-from vector import dot, vector_add
+from stats import median, de_mean, correlation, RunningMoments
+from gradient_descent import (minimize_stochastic, minimize_minibatch,
+                              minimize_sharded, maximize_sharded)
+from vector import dot, vector_add, batch_dot
 from normal import normal_cdf
-from matrix import make_matrix, get_column, shape, matrix_multiply
+from matrix import matrix_multiply, solve_spd
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the batch functions below work through their rows a chunk at a time
+SCORING_CHUNK_SIZE = 4096
+
+def _row_chunks(x, chunk_size):
+    if isinstance(x, (list, tuple)) or (np is not None and isinstance(x, np.ndarray)):
+        for start in range(0, len(x), chunk_size):
+            yield x[start:start + chunk_size]
+    else:
+        rows = iter(x)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+# Scaling
+#
+# StandardScaler learns the mean and standard deviation of every column in
+# a single pass over the rows, feeding a chunk of rows at a time to one
+# RunningMoments per column, so the data can be an iterator. Fitted
+# statistics can be saved and loaded, so new data is scaled exactly the
+# same way as the training data. The saved counts and sums of squared
+# deviations let a loaded scaler carry on fitting with partial_fit. Columns
+# with no deviation are left alone.
+
+SCALER_CHUNK_SIZE = 1024
+
+class StandardScaler:
+    """rescales columns to mean 0 and standard deviation 1"""
+
+    def __init__(self, means=None, stdevs=None):
+        self.means = means
+        self.stdevs = stdevs
+        self._moments = None
+        if means is not None:
+            self._set_offsets()
+
+    def partial_fit(self, rows):
+        """update the column statistics with more rows"""
+        if self._moments is None and self.means is not None:
+            raise ValueError("a scaler made from just means and stdevs can't be updated, "
+                             "use fit to start over")
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, SCALER_CHUNK_SIZE))
+            if not chunk:
+                break
+            if self._moments is None:
+                self._moments = [RunningMoments() for _ in chunk[0]]
+            for moments, column in zip(self._moments, zip(*chunk)):
+                moments.update(column)
+
+        if self._moments is not None:
+            self.means = [m.mean for m in self._moments]
+            self.stdevs = [m.standard_deviation if m.n > 1 else 0.0
+                           for m in self._moments]
+            self._set_offsets()
+        return self
+
+    def fit(self, rows):
+        self._moments = self.means = self.stdevs = None
+        return self.partial_fit(rows)
+
+    def _set_offsets(self):
+        # (x - 0) / 1 leaves a column with no deviation exactly as it was
+        self._offsets = [m if sd > 0 else 0.0 for m, sd in zip(self.means, self.stdevs)]
+        self._divisors = [sd if sd > 0 else 1.0 for sd in self.stdevs]
+
+    def transform_row(self, row):
+        return list(map(truediv, map(sub, row, self._offsets), self._divisors))
+
+    def transform(self, rows, in_place=False):
+        """
+        the rescaled rows as a new list of lists, or with in_place=True,
+        overwrite the rows (which must be lists) and return them
+        """
+        if in_place:
+            for row in rows:
+                row[:] = self.transform_row(row)
+            return rows
+        return [self.transform_row(row) for row in rows]
+
+    def iter_transform(self, rows):
+        """lazily rescale rows one at a time"""
+        return map(self.transform_row, rows)
+
+    def fit_transform(self, rows, in_place=False):
+        # fitting and transforming are two passes, so an iterator is read once
+        if not isinstance(rows, Sequence):
+            rows = list(rows)
+        return self.fit(rows).transform(rows, in_place)
+
+    def to_dict(self):
+        d = {'means': self.means, 'stdevs': self.stdevs}
+        if self._moments is not None:
+            d['counts'] = [m.n for m in self._moments]
+            d['m2s'] = [m.m2 for m in self._moments]
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        scaler = cls(d['means'], d['stdevs'])
+        if 'counts' in d:
+            scaler._moments = []
+            for n, mean, m2 in zip(d['counts'], d['means'], d['m2s']):
+                moments = RunningMoments()
+                moments.n, moments.mean, moments.m2 = n, mean, m2
+                scaler._moments.append(moments)
+        return scaler
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def __repr__(self):
+        return 'StandardScaler(means={}, stdevs={})'.format(self.means, self.stdevs)
 
 
 def scale(data):
-    num_rows, num_cols = shape(data)
-    means = [mean(get_column(data, j)) for j in range(num_cols)]
-    stdevs = [standard_deviation(get_column(data, j)) for j in range(num_cols)]
-    return means, stdevs
+    scaler = StandardScaler().fit(data)
+    return scaler.means, scaler.stdevs
 
 def rescale(data):
     """
     rescales the input data so that each column has mean 0 and standard deviation 1
     leaves alone columns with no deviation
     """
-    means, stdevs = scale(data)
-    
-    def rescaled(i, j):
-        if stdevs[j] > 0:
-            return (data[i][j] - means[j]) / stdevs[j]
-        else:
-            return data[i][j]
-
-    num_rows, num_cols = shape(data)
-    return make_matrix(num_rows, num_cols, rescaled)
+    return StandardScaler().fit_transform(data)
 
 
 def error(x_i, y_i, beta):
@@ -49,30 +175,475 @@ def predict(x_i, beta):
     return dot(x_i, beta)
 
 
-def estimate_beta(x, y):
+# Least squares by the normal equations
+#
+# The least squares beta solves (X^T X) beta = X^T y. NormalEquations sums
+# X^T X and X^T y a chunk of rows at a time, one dot product per pair of
+# columns per chunk, so the rows can be streamed and only d x d numbers are
+# kept. Solving is a Cholesky factorization of the d x d system. The ridge
+# penalty of estimate_beta_ridge, alpha * |beta[1:]|^2 per example, adds
+# n * alpha to the diagonal for every coefficient but the intercept. The
+# normal equations square the condition number of X, which is fine for
+# reasonably scaled features but loses accuracy for nearly collinear ones.
+
+class NormalEquations:
+    """accumulates X^T X and X^T y for least squares"""
+
+    def __init__(self, num_cols=None):
+        self.n = 0
+        self.xtx = None
+        self.xty = None
+        if num_cols is not None:
+            self._allocate(num_cols)
+
+    def _allocate(self, num_cols):
+        self.xtx = [[0.0] * num_cols for _ in range(num_cols)]
+        self.xty = [0.0] * num_cols
+
+    def partial_fit(self, x, y, chunk_size=SCORING_CHUNK_SIZE, weights=None):
+        """
+        add rows x with targets y, both of which can be iterators. weights,
+        if given, counts each row that many times, so a bootstrap resample
+        can be fit from how often it drew each row.
+        """
+        ys = iter(y)
+        ws = iter(weights) if weights is not None else None
+        for chunk in _row_chunks(x, chunk_size):
+            y_chunk = list(islice(ys, len(chunk)))
+            w_chunk = list(islice(ws, len(chunk))) if ws is not None else None
+            if len(y_chunk) != len(chunk) or (w_chunk is not None and
+                                              len(w_chunk) != len(chunk)):
+                raise ValueError("x, y and weights must be the same length")
+            if self.xtx is None:
+                self._allocate(len(chunk[0]))
+
+            if np is not None and isinstance(chunk, np.ndarray):
+                weighted = chunk if w_chunk is None else chunk * np.asarray(w_chunk)[:, None]
+                xtx = (weighted.T @ chunk).tolist()
+                xty = (weighted.T @ np.asarray(y_chunk)).tolist()
+                for row, new_row in zip(self.xtx, xtx):
+                    row[:] = map(add, row, new_row)
+                self.xty[:] = map(add, self.xty, xty)
+            else:
+                if w_chunk is not None:
+                    # rows with weight 0 add nothing, a third of a bootstrap resample's
+                    chunk = list(compress(chunk, w_chunk))
+                    y_chunk = list(compress(y_chunk, w_chunk))
+                    w_chunk = [w for w in w_chunk if w]
+                columns = list(zip(*chunk))
+                weighted = (columns if w_chunk is None else
+                            [list(map(mul, column, w_chunk)) for column in columns])
+                for j, column_j in enumerate(weighted):
+                    self.xty[j] += sum(map(mul, column_j, y_chunk))
+                    for k in range(j + 1):
+                        self.xtx[j][k] += sum(map(mul, column_j, columns[k]))
+                # only the lower triangle was summed
+                for j in range(len(columns)):
+                    for k in range(j):
+                        self.xtx[k][j] = self.xtx[j][k]
+            self.n += len(chunk) if w_chunk is None else sum(w_chunk)
+        return self
+
+    def merge(self, other):
+        """add in the sums from another NormalEquations, from another process say"""
+        if other.xtx is not None:
+            if self.xtx is None:
+                self._allocate(len(other.xty))
+            for row, other_row in zip(self.xtx, other.xtx):
+                row[:] = map(add, row, other_row)
+            self.xty[:] = map(add, self.xty, other.xty)
+            self.n += other.n
+        return self
+
+    def solve(self, alpha=0.0):
+        """
+        the beta minimizing squared error plus alpha * |beta[1:]|^2 per
+        example. Raises ValueError if the columns are linearly dependent
+        and alpha is 0.
+        """
+        if self.xtx is None:
+            raise ValueError("no data")
+        A = [list(row) for row in self.xtx]
+        for j in range(1, len(A)):
+            A[j][j] += self.n * alpha
+        return solve_spd(A, self.xty)
+
+
+def _squared_error_fns(alpha):
+    """the per-row target and gradient, with the ridge penalty when alpha is set"""
+    if alpha:
+        return (partial(squared_error_ridge, alpha=alpha),
+                partial(squared_error_ridge_gradient, alpha=alpha))
+    return squared_error, squared_error_gradient
+
+
+def estimate_beta(x, y, method='exact', update='sgd', alpha=0.0, **kwargs):
+    """
+    fit beta by minimizing squared error plus a ridge penalty alpha.
+    'exact' solves the normal equations, 'stochastic' uses
+    minimize_stochastic and 'minibatch' uses minimize_minibatch with the
+    given update ('sgd', 'momentum' or 'adam'), passing on any other
+    keyword arguments (batch_size, holdout, seed...). The gradient methods
+    are there for when d is too big for a d x d solve.
+    """
+    if method == 'exact':
+        if kwargs:
+            raise ValueError("method exact takes no {}".format(", ".join(sorted(kwargs))))
+        return NormalEquations().partial_fit(x, y).solve(alpha)
+    target_fn, gradient_fn = _squared_error_fns(alpha)
     beta_initial = [random.random() for x_i in x[0]]
-    return minimize_stochastic(squared_error,
-                               squared_error_gradient,
+    if method == 'stochastic':
+        if kwargs:
+            raise ValueError("method stochastic takes no {}".format(", ".join(sorted(kwargs))))
+        return minimize_stochastic(target_fn,
+                                   gradient_fn,
+                                   x, y,
+                                   beta_initial,
+                                   0.001)
+    if method == 'minibatch':
+        kwargs.setdefault('alpha_0', 0.001)
+        return minimize_minibatch(target_fn,
+                                  gradient_fn,
+                                  x, y,
+                                  beta_initial,
+                                  method=update,
+                                  **kwargs)
+    raise ValueError("Unknown method {}, choose exact, stochastic or minibatch".format(method))
+
+
+def ridge_penalty(beta, alpha):
+    return alpha * dot(beta[1:], beta[1:])
+
+
+def squared_error_ridge(x_i, y_i, beta, alpha):
+    """estimate error plus ridge penalty on beta"""
+    return error(x_i, y_i, beta) ** 2 + ridge_penalty(beta, alpha)
+
+
+def ridge_penalty_gradient(beta, alpha):
+    """gradient of just the ridge penalty"""
+    return [0] + [2 * alpha * beta_j for beta_j in beta[1:]]
+
+
+def squared_error_ridge_gradient(x_i, y_i, beta, alpha):
+    """the gradient corresponding to the ith squared error term including the ridge penalty"""
+    return vector_add(squared_error_gradient(x_i, y_i, beta),
+                          ridge_penalty_gradient(beta, alpha))
+
+
+def estimate_beta_ridge(x, y, alpha, method='exact'):
+    """fit a ridge regression with penalty alpha, exactly or by gradient descent"""
+    if method == 'exact':
+        return estimate_beta(x, y, alpha=alpha)
+    if method != 'stochastic':
+        raise ValueError("Unknown method {}, choose exact or stochastic".format(method))
+    beta_initial = [random.random() for x_i in x[0]]
+    return minimize_stochastic(partial(squared_error_ridge, alpha=alpha),
+                               partial(squared_error_ridge_gradient, alpha=alpha),
                                x, y,
                                beta_initial,
                                0.001)
 
-def split_data(data, prob):
+
+def _initial_beta(num_cols, seed=None):
+    rng = random.Random(seed) if seed is not None else random
+    return [rng.random() for _ in range(num_cols)]
+
+
+def estimate_beta_sharded(shards, method='exact', update='sgd', alpha=0.0, **kwargs):
     """
-    split data into fractions [prob, 1 - prob]
+    estimate_beta for data streamed from shards (see chapter_08/shards.py).
+    'exact' accumulates the normal equations a shard at a time, 'minibatch'
+    minimizes squared error with minimize_sharded. With a seed, the
+    starting point is drawn from it too, so the result is reproducible.
+    """
+    if method == 'exact':
+        if kwargs:
+            raise ValueError("method exact takes no {}".format(", ".join(sorted(kwargs))))
+        equations = NormalEquations(shards.num_cols)
+        for i in range(shards.num_shards):
+            equations.partial_fit(*shards.shard(i))
+        return equations.solve(alpha)
+    if method != 'minibatch':
+        raise ValueError("Unknown method {}, choose exact or minibatch".format(method))
+    kwargs.setdefault('alpha_0', 0.001)
+    target_fn, gradient_fn = _squared_error_fns(alpha)
+    beta_initial = _initial_beta(shards.num_cols, kwargs.get('seed'))
+    return minimize_sharded(target_fn,
+                            gradient_fn,
+                            shards,
+                            beta_initial,
+                            method=update,
+                            **kwargs)
+
+
+def logistic(x):
+    # written so that exp never overflows
+    if x >= 0:
+        return 1.0 / (1 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1 + z)
+
+
+def log_logistic(x):
+    """log(logistic(x)), without underflowing to log(0)"""
+    if x >= 0:
+        return -math.log1p(math.exp(-x))
+    return x - math.log1p(math.exp(x))
+
+
+def logistic_log_likelihood_i(x_i, y_i, beta):
+    # log(1 - logistic(z)) == log_logistic(-z)
+    if y_i==1:
+        return log_logistic(dot(x_i, beta))
+    else:
+        return log_logistic(-dot(x_i, beta))
+
+
+def logistic_log_likelihood(x, y, beta):
+    return sum(logistic_log_likelihood_i(x_i, y_i, beta)
+        for x_i, y_i in zip(x, y))
+
+
+def logistic_log_partial_ij(x_i, y_i, beta, j):
+    """here i is the index of the data point, j the index of the derivative"""
+    return (y_i - logistic(dot(x_i, beta))) * x_i[j]
+
+
+def logistic_log_gradient_i(x_i, y_i, beta):
+    """the gradient of the log likelihood corresponding to the ith data point"""
+    return [logistic_log_partial_ij(x_i, y_i, beta, j) for j, _ in enumerate(beta)]
+
+
+def logistic_log_gradient(x, y, beta):
+    return reduce(vector_add,
+        [logistic_log_gradient_i(x_i, y_i, beta) for x_i, y_i in zip(x,y)])
+
+
+# Batch scoring
+#
+# These score many rows at once: one matrix-vector product per chunk of
+# rows through batch_dot (numpy's @ for arrays), then the logistic or log
+# likelihood of the whole chunk. They take any iterable of rows and work
+# through it chunk_size rows at a time, so memory use stays bounded. The
+# iter_ versions yield one list of results per chunk.
+
+def iter_predict(x, beta, chunk_size=SCORING_CHUNK_SIZE):
+    for chunk in _row_chunks(x, chunk_size):
+        yield list(batch_dot(chunk, beta))
+
+def predict_many(x, beta, chunk_size=SCORING_CHUNK_SIZE):
+    """[predict(x_i, beta) for x_i in x]"""
+    return [z for chunk in iter_predict(x, beta, chunk_size) for z in chunk]
+
+def logistic_many(zs):
+    """[logistic(z) for z in zs], inlined to save a function call per value"""
+    exp = math.exp
+    return [1.0 / (1 + exp(-z)) if z >= 0 else (e := exp(z)) / (1 + e) for z in zs]
+
+def log_logistic_many(zs):
+    """[log_logistic(z) for z in zs]"""
+    exp, log1p = math.exp, math.log1p
+    return [-log1p(exp(-z)) if z >= 0 else z - log1p(exp(z)) for z in zs]
+
+def iter_predict_proba(x, beta, chunk_size=SCORING_CHUNK_SIZE):
+    for zs in iter_predict(x, beta, chunk_size):
+        yield logistic_many(zs)
+
+def predict_proba_many(x, beta, chunk_size=SCORING_CHUNK_SIZE):
+    """[logistic(dot(x_i, beta)) for x_i in x]"""
+    return [p for chunk in iter_predict_proba(x, beta, chunk_size) for p in chunk]
+
+def logistic_log_likelihood_many(x, y, beta, chunk_size=SCORING_CHUNK_SIZE):
+    """logistic_log_likelihood(x, y, beta), a chunk of rows at a time"""
+    total = 0.0
+    ys = iter(y)
+    for zs in iter_predict(x, beta, chunk_size):
+        total += math.fsum(log_logistic_many(
+            [z_i if y_i == 1 else -z_i for z_i, y_i in zip(zs, ys)]))
+    return total
+
+def logistic_log_gradient_many(x, y, beta, chunk_size=SCORING_CHUNK_SIZE):
+    """
+    logistic_log_gradient(x, y, beta), a chunk of rows at a time. The
+    residuals y_i - logistic(z_i) of a chunk are dotted with each of its
+    columns instead of computing a partial derivative per row and feature.
+    """
+    gradient = [0.0] * len(beta)
+    ys = iter(y)
+    for chunk in _row_chunks(x, chunk_size):
+        residuals = list(map(sub, islice(ys, len(chunk)), logistic_many(batch_dot(chunk, beta))))
+        if np is not None and isinstance(chunk, np.ndarray):
+            gradient[:] = map(add, gradient, (chunk.T @ np.array(residuals)).tolist())
+            continue
+        for j, column in enumerate(zip(*chunk)):
+            gradient[j] += sum(map(mul, column, residuals))
+    return gradient
+
+
+def estimate_logistic_beta_sharded(shards, update='sgd', **kwargs):
+    """
+    fit logistic regression to data streamed from shards by maximizing the
+    log likelihood with maximize_sharded
+    """
+    beta_initial = _initial_beta(shards.num_cols, kwargs.get('seed'))
+    return maximize_sharded(logistic_log_likelihood_i,
+                            logistic_log_gradient_i,
+                            shards,
+                            beta_initial,
+                            method=update,
+                            **kwargs)
+
+
+# Splitting data
+#
+# Splits are made on row indices, and the pieces are IndexViews: sequences
+# that look up rows of the original data through a list of indices rather
+# than copying them. Folds for cross-validation are generated one at a time.
+
+class IndexView(Sequence):
+    """a read-only view of the rows of data at the given indices"""
+
+    def __init__(self, data, indices):
+        self.data = data
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return IndexView(self.data, self.indices[i])
+        return self.data[self.indices[i]]
+
+    def __iter__(self):
+        data = self.data
+        return (data[i] for i in self.indices)
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return 'IndexView({})'.format(list(self))
+
+
+def _as_rows(data):
+    if isinstance(data, Sequence) or (np is not None and isinstance(data, np.ndarray)):
+        return data
+    return list(data)
+
+
+def split_indices(n, prob, rng=random):
+    """
+    split range(n) into fractions [prob, 1 - prob], each index going into
+    the first part with probability prob
     """
     results = [], []
-    for row in data:
-        results[0 if random.random() < prob else 1].append(row)
+    for i in range(n):
+        results[0 if rng.random() < prob else 1].append(i)
     return results
 
-def train_test_split(x, y, test_pct):
+
+def stratified_split_indices(labels, prob, rng=random):
     """
-    Make train/test split.
+    split indices so that each label's rows are divided in the ratio
+    prob : 1 - prob, as nearly as rounding allows
     """
-    data = zip(x, y)
-    train, test = split_data(data, 1 - test_pct)
-    x_train, y_train = zip(*train)
-    x_test, y_test = zip(*test)
-    return x_train, x_test, y_train, y_test
+    by_label = defaultdict(list)
+    for i, label in enumerate(labels):
+        by_label[label].append(i)
+    first, second = [], []
+    for label in sorted(by_label, key=repr):
+        indices = by_label[label]
+        rng.shuffle(indices)
+        cut = round(prob * len(indices))
+        first.extend(indices[:cut])
+        second.extend(indices[cut:])
+    return sorted(first), sorted(second)
+
 
+def grouped_split_indices(groups, prob, rng=random):
+    """
+    split indices so rows in the same group end up in the same part, each
+    group going into the first part with probability prob
+    """
+    group_ids = sorted(set(groups), key=repr)
+    first_groups = {g for g in group_ids if rng.random() < prob}
+    first, second = [], []
+    for i, g in enumerate(groups):
+        (first if g in first_groups else second).append(i)
+    return first, second
+
+
+def split_data(data, prob, rng=random):
+    """
+    split data into fractions [prob, 1 - prob]
+    """
+    data = _as_rows(data)
+    first, second = split_indices(len(data), prob, rng)
+    return IndexView(data, first), IndexView(data, second)
+
+def train_test_split(x, y, test_pct, stratify=False, groups=None, rng=random):
+    """
+    Make train/test split. With stratify=True, each value of y is split in
+    the same proportions. With groups, a sequence with a group id per row,
+    rows from the same group are kept together. Returns views of x and y.
+    """
+    x, y = _as_rows(x), _as_rows(y)
+    if groups is not None:
+        train, test = grouped_split_indices(groups, 1 - test_pct, rng)
+    elif stratify:
+        train, test = stratified_split_indices(y, 1 - test_pct, rng)
+    else:
+        train, test = split_indices(len(x), 1 - test_pct, rng)
+    return IndexView(x, train), IndexView(x, test), IndexView(y, train), IndexView(y, test)
+
+
+def k_fold_indices(n, k, shuffle=True, stratify=None, groups=None, rng=random):
+    """
+    lazily generate (train indices, test indices) for each of k folds.
+    stratify, a label per row, deals each label's rows round the folds in
+    turn. groups, a group id per row, keeps each group within one fold.
+    """
+    if groups is not None:
+        group_ids = sorted(set(groups), key=repr)
+        if shuffle:
+            rng.shuffle(group_ids)
+        fold_of_group = {g: j % k for j, g in enumerate(group_ids)}
+        fold_of = [fold_of_group[g] for g in groups]
+    elif stratify is not None:
+        by_label = defaultdict(list)
+        for i, label in enumerate(stratify):
+            by_label[label].append(i)
+        fold_of = [0] * n
+        dealt = 0
+        for label in sorted(by_label, key=repr):
+            indices = by_label[label]
+            if shuffle:
+                rng.shuffle(indices)
+            for j, i in enumerate(indices, dealt):
+                fold_of[i] = j % k
+            dealt += len(indices)
+    else:
+        order = list(range(n))
+        if shuffle:
+            rng.shuffle(order)
+        fold_of = [0] * n
+        for j, i in enumerate(order):
+            fold_of[i] = j * k // n
+
+    for fold in range(k):
+        train, test = [], []
+        for i, f in enumerate(fold_of):
+            (test if f == fold else train).append(i)
+        yield train, test
+
+
+def k_fold(x, y, k, **kwargs):
+    """
+    lazily generate (x_train, x_test, y_train, y_test) views for each of k
+    folds. Takes the keyword arguments of k_fold_indices.
+    """
+    x, y = _as_rows(x), _as_rows(y)
+    for train, test in k_fold_indices(len(x), k, **kwargs):
+        yield IndexView(x, train), IndexView(x, test), IndexView(y, train), IndexView(y, test)
@@ -0,0 +1,192 @@
+"""
+Tests for logistic regression
+"""
+import random
+from logistic_regression import *
+from stats import mean, standard_deviation
+from shards import InMemoryShards, ShardedFile, write_shards
+
+
+def test_logistic():
+    assert logistic(0) == 0.5
+    assert abs(logistic(2) + logistic(-2) - 1) < 1e-12
+
+
+def test_estimate_logistic_beta_sharded(tmp_path):
+    random.seed(0)
+    x = [[1, random.gauss(0, 1), random.gauss(0, 1)] for _ in range(600)]
+    y = [1 if random.random() < logistic(dot(x_i, [0.5, 2, -1])) else 0 for x_i in x]
+    path = tmp_path / 'logistic.shards'
+    write_shards(path, zip(x, y), shard_size=200)
+
+    with ShardedFile(path) as shards:
+        beta = estimate_logistic_beta_sharded(shards, update='adam', alpha_0=0.05, seed=1,
+                                              tolerance=1e-4)
+    assert beta == estimate_logistic_beta_sharded(InMemoryShards(x, y, 200), update='adam',
+                                                  alpha_0=0.05, seed=1, tolerance=1e-4)
+    # 600 examples only pin beta down roughly
+    assert all(abs(a - b) < 0.5 for a, b in zip(beta, [0.5, 2, -1]))
+
+
+def test_standard_scaler(tmp_path):
+    random.seed(0)
+    data = [[1, random.gauss(5, 2), random.uniform(0, 100)] for _ in range(3000)]
+
+    scaler = StandardScaler().fit(iter(data))
+    for j in range(3):
+        column = [row[j] for row in data]
+        assert abs(scaler.means[j] - mean(column)) < 1e-9
+        assert abs(scaler.stdevs[j] - standard_deviation(column)) < 1e-9
+
+    rescaled = rescale(data)
+    assert StandardScaler().fit_transform(iter(data)) == rescaled
+    assert all(row[0] == 1 for row in rescaled)
+    assert abs(mean([row[1] for row in rescaled])) < 1e-9
+    assert abs(standard_deviation([row[2] for row in rescaled]) - 1) < 1e-9
+    assert list(scaler.iter_transform(data)) == rescaled
+
+    path = tmp_path / 'scaler.json'
+    scaler.save(path)
+    loaded = StandardScaler.load(path)
+    copy = [list(row) for row in data]
+    assert loaded.transform(copy, in_place=True) is copy
+    assert copy == rescaled
+
+    halves = StandardScaler().partial_fit(data[:1000]).partial_fit(data[1000:])
+    assert all(abs(a - b) < 1e-9 for a, b in zip(halves.stdevs, scaler.stdevs))
+
+    # a loaded scaler carries on fitting where it left off
+    StandardScaler().fit(data[:1000]).save(path)
+    resumed = StandardScaler.load(path).partial_fit(data[1000:])
+    assert all(abs(a - b) < 1e-9 for a, b in zip(resumed.means, scaler.means))
+    assert all(abs(a - b) < 1e-9 for a, b in zip(resumed.stdevs, scaler.stdevs))
+    # but one made from just the statistics can't
+    try:
+        StandardScaler(scaler.means, scaler.stdevs).partial_fit(data)
+    except ValueError:
+        pass
+    else:
+        assert False, "expected ValueError"
+    assert StandardScaler(scaler.means, scaler.stdevs).fit(data).means == scaler.means
+
+
+def test_logistic_is_stable():
+    assert logistic(-1000) == 0.0
+    assert logistic(1000) == 1.0
+    assert log_logistic(-1000) == -1000
+    assert log_logistic(1000) == 0.0
+    assert logistic_log_likelihood_i([1, 100], 0, [0, 10]) == -1000
+
+
+def test_batch_scoring_matches_row_at_a_time():
+    random.seed(0)
+    beta = [0.5, 2, -1]
+    x = [[1, random.gauss(0, 1), random.gauss(0, 1)] for _ in range(1000)]
+    y = [random.randint(0, 1) for _ in x]
+
+    assert predict_many(x, beta, chunk_size=64) == [predict(x_i, beta) for x_i in x]
+    assert predict_proba_many(iter(x), beta, chunk_size=64) == \
+        [logistic(dot(x_i, beta)) for x_i in x]
+    assert [len(chunk) for chunk in iter_predict(x, beta, chunk_size=400)] == [400, 400, 200]
+
+    assert abs(logistic_log_likelihood_many(x, y, beta, chunk_size=64) -
+               logistic_log_likelihood(x, y, beta)) < 1e-9
+    assert all(abs(a - b) < 1e-9 for a, b in zip(
+        logistic_log_gradient_many(iter(x), iter(y), beta, chunk_size=64),
+        logistic_log_gradient(x, y, beta)))
+
+
+def test_estimate_beta_exact():
+    random.seed(0)
+    x = [[1, random.random(), random.random(), random.random()] for _ in range(500)]
+    y = [1 + 2 * x_i[1] - 3 * x_i[2] + 0.5 * x_i[3] for x_i in x]
+    beta = estimate_beta(x, y)
+    assert all(abs(a - b) < 1e-9 for a, b in zip(beta, [1, 2, -3, 0.5]))
+
+    # streaming in chunks, or merging partial sums, gives the same fit
+    halves = NormalEquations().partial_fit(x[:200], y[:200]).merge(
+        NormalEquations().partial_fit(iter(x[200:]), iter(y[200:]), chunk_size=7))
+    assert all(abs(a - b) < 1e-9 for a, b in zip(halves.solve(), beta))
+    assert estimate_beta_sharded(InMemoryShards(x, y, 64)) == \
+        NormalEquations().partial_fit(x, y, chunk_size=64).solve()
+
+
+def test_estimate_beta_ridge_exact():
+    random.seed(0)
+    x = [[1, random.gauss(0, 1), random.gauss(0, 1)] for _ in range(200)]
+    y = [3 + x_i[1] - x_i[2] + random.gauss(0, 0.1) for x_i in x]
+    alpha = 0.1
+    beta = estimate_beta_ridge(x, y, alpha)
+
+    # the gradient of the total ridge objective vanishes at beta
+    gradient = reduce(vector_add, [squared_error_ridge_gradient(x_i, y_i, beta, alpha)
+                                   for x_i, y_i in zip(x, y)])
+    assert all(abs(g) < 1e-8 for g in gradient)
+    assert sum(b * b for b in beta[1:]) < sum(b * b for b in estimate_beta(x, y)[1:])
+
+
+def test_estimate_beta_penalizes_every_method():
+    random.seed(0)
+    x = [[1, random.gauss(0, 1), random.gauss(0, 1)] for _ in range(200)]
+    y = [3 + x_i[1] - x_i[2] + random.gauss(0, 0.1) for x_i in x]
+    shards = InMemoryShards(x, y, 50)
+
+    def size(beta):
+        return sum(b * b for b in beta[1:])
+
+    for fit in (lambda alpha: estimate_beta(x, y, 'minibatch', alpha=alpha, alpha_0=0.01,
+                                            seed=0, max_epochs=50),
+                lambda alpha: estimate_beta_sharded(shards, 'minibatch', alpha=alpha,
+                                                    alpha_0=0.01, seed=0, max_epochs=50)):
+        assert size(fit(0.5)) < 0.5 * size(fit(0.0))
+
+    # keyword arguments the method can't use are an error, not ignored
+    for bad in (lambda: estimate_beta(x, y, batch_size=10),
+                lambda: estimate_beta(x, y, 'stochastic', seed=0),
+                lambda: estimate_beta_sharded(shards, seed=0)):
+        try:
+            bad()
+            assert False
+        except ValueError:
+            pass
+
+
+def test_train_test_split_views():
+    x = [[1, i] for i in range(1000)]
+    y = [i % 4 == 0 for i in range(1000)]
+    random.seed(0)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, 0.25)
+    assert len(x_train) + len(x_test) == 1000
+    assert 150 < len(x_test) < 350
+    assert x_train[0] is x[x_train.indices[0]]
+    assert all(y_i == (x_i[1] % 4 == 0) for x_i, y_i in zip(x_test, y_test))
+    assert sorted(row[1] for row in list(x_train) + list(x_test)) == list(range(1000))
+
+    # split_data draws the same split for the same seed
+    random.seed(0)
+    train, test = split_data(zip(x, y), 0.75)
+    assert list(train) == list(zip(x_train, y_train))
+
+    _, x_test, _, y_test = train_test_split(x, y, 0.25, stratify=True)
+    assert len(x_test) == 250 and sum(y_test) == 62
+
+
+def test_grouped_split_and_k_fold():
+    groups = [i // 10 for i in range(200)]
+    x = list(range(200))
+    y = [i % 3 for i in range(200)]
+    x_train, x_test, _, _ = train_test_split(x, y, 0.3, groups=groups)
+    assert not {i // 10 for i in x_train} & {i // 10 for i in x_test}
+
+    folds = k_fold(x, y, 5)
+    assert not isinstance(folds, list)
+    seen = []
+    for x_train, x_test, y_train, y_test in folds:
+        assert len(x_test) == 40 and len(x_train) == 160
+        seen.extend(x_test)
+    assert sorted(seen) == x
+
+    for train, test in k_fold_indices(200, 4, stratify=y):
+        assert abs(sum(1 for i in test if y[i] == 0) - 17) <= 1
+    for train, test in k_fold_indices(200, 4, groups=groups):
+        assert not {groups[i] for i in train} & {groups[i] for i in test}
@@ -0,0 +1,220 @@
+"""
+Decision trees and random forests
+
+Code from Chapter 17 of Data Science from Scratch, reworked to build trees
+from integer coded data and to grow forests in parallel.
+"""
+import math
+import random
+from array import array
+from collections import Counter
+from multiprocessing import Pool
+
+
+def entropy(class_probabilities):
+    """given a list of class probabilities, compute the entropy"""
+    return sum(-p * math.log(p, 2)
+               for p in class_probabilities
+               if p)
+
+
+def class_probabilities(labels):
+    total_count = len(labels)
+    return [count / total_count for count in Counter(labels).values()]
+
+
+# The notebook's build_tree_id3 regrouped the inputs, dicts and all, for
+# every candidate attribute at every node, and counted the labels in each
+# group from scratch. Here each attribute's values are coded as small
+# integers once, up front, into a column per attribute, and a node is just
+# a list of row numbers. Scoring a candidate split is one pass over the
+# node's rows counting (value, label) pairs into a flat histogram, and the
+# chosen split is another pass.
+#
+# The trees built are the notebook's: an attribute name and a dict from
+# its values, plus None for the default, to subtrees, with True and False
+# as the leaves. Given the same random numbers they're the same trees, so
+# classify works on either.
+
+class EncodedData:
+    """labeled inputs, with each attribute's values coded as 0, 1, 2, ..."""
+
+    def __init__(self, inputs, attributes=None):
+        if attributes is None:
+            attributes = inputs[0][0].keys()
+        self.attributes = list(attributes)
+        self.values = []        # for each attribute, the value of each code
+        self.columns = []       # for each attribute, the code in each row
+        for attribute in self.attributes:
+            codes = {}
+            self.columns.append(array('l', [codes.setdefault(x.get(attribute), len(codes))
+                                            for x, _ in inputs]))
+            self.values.append(list(codes))
+        self.labels = array('b', [bool(label) for _, label in inputs])
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def split_entropy(data, attribute, rows):
+    """the entropy of splitting the rows on the attribute, given by its position"""
+    column, labels = data.columns[attribute], data.labels
+    counts = [0] * (2 * len(data.values[attribute]))
+    for r in rows:
+        counts[2 * column[r] + labels[r]] += 1
+    total_count = len(rows)
+    result = 0.0
+    for i in range(0, len(counts), 2):
+        count = counts[i] + counts[i + 1]
+        if count:
+            result += entropy([counts[i] / count, counts[i + 1] / count]) * count / total_count
+    return result
+
+
+def _build(data, rows, split_candidates, num_split_candidates, rng):
+    labels = data.labels
+    num_trues = sum(labels[r] for r in rows)
+    num_falses = len(rows) - num_trues
+
+    if num_trues == 0:
+        return False
+
+    if num_falses == 0:
+        return True
+
+    if not split_candidates:
+        return num_trues >= num_falses
+
+    if num_split_candidates is None or len(split_candidates) <= num_split_candidates:
+        sampled_split_candidates = split_candidates
+    else:
+        sampled_split_candidates = rng.sample(split_candidates, num_split_candidates)
+
+    best = min(sampled_split_candidates, key=lambda a: split_entropy(data, a, rows))
+
+    partitions = {}
+    column = data.columns[best]
+    for r in rows:
+        partitions.setdefault(column[r], []).append(r)
+    new_candidates = [a for a in split_candidates if a != best]
+
+    values = data.values[best]
+    subtrees = {values[code]: _build(data, subset, new_candidates, num_split_candidates, rng)
+                for code, subset in partitions.items()}
+
+    subtrees[None] = num_trues > num_falses # default case
+
+    return (data.attributes[best], subtrees)
+
+
+def build_tree_id3(inputs, split_candidates=None, num_split_candidates=None, rng=random):
+    """
+    build an ID3 decision tree from the labeled inputs, a list of pairs
+    (attribute_dict, label) or EncodedData. With num_split_candidates,
+    each node chooses its split from a random sample of that many of the
+    remaining attributes, as for a random forest.
+    """
+    data = inputs if isinstance(inputs, EncodedData) else EncodedData(inputs, split_candidates)
+    if split_candidates is None:
+        candidates = list(range(len(data.attributes)))
+    else:
+        candidates = [data.attributes.index(a) for a in split_candidates]
+    return _build(data, list(range(len(data))), candidates, num_split_candidates, rng)
+
+
+def classify(tree, input):
+    """classify the input using the given decision tree"""
+
+    # until we reach a leaf, take the subtree for the input's value of the
+    # attribute, or the None subtree if there isn't one
+    while tree not in [True, False]:
+        attribute, subtree_dict = tree
+        subtree_key = input.get(attribute)
+        if subtree_key not in subtree_dict:
+            subtree_key = None
+        tree = subtree_dict[subtree_key]
+    return tree
+
+
+# Random forests. Each tree draws its random numbers from its own
+# generator, seeded from the overall seed and the tree's index, so the
+# forest for a given seed is the same however many processes build it.
+# Workers get the encoded data once, when they start.
+
+def _build_forest_tree(data, num_split_candidates, seed, t):
+    rng = random.Random('{}:{}'.format(seed, t))
+    return build_tree_id3(data, num_split_candidates=num_split_candidates, rng=rng)
+
+
+# state of a worker process, set up by _init_worker
+_data = _num_split_candidates = _seed = None
+
+def _init_worker(data, num_split_candidates, seed):
+    global _data, _num_split_candidates, _seed
+    _data, _num_split_candidates, _seed = data, num_split_candidates, seed
+
+def _worker_tree(t):
+    return _build_forest_tree(_data, _num_split_candidates, _seed, t)
+
+
+def build_forest(inputs, n=3, num_split_candidates=3, seed=0, processes=None):
+    """build n randomized trees from the labeled inputs"""
+    data = inputs if isinstance(inputs, EncodedData) else EncodedData(inputs)
+    if processes and processes > 1 and n > 1:
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(data, num_split_candidates, seed)) as pool:
+            return pool.map(_worker_tree, range(n), chunksize=1)
+    return [_build_forest_tree(data, num_split_candidates, seed, t) for t in range(n)]
+
+
+def forest_classify(trees, input):
+    votes = [classify(tree, input) for tree in trees]
+    vote_counts = Counter(votes)
+    return vote_counts.most_common(1)[0][0]
+
+
+def _compile(tree):
+    """
+    the tree as nested (attribute, subtrees, default) triples, so each step
+    down is a single dict lookup
+    """
+    if tree in [True, False]:
+        return tree
+    attribute, subtree_dict = tree
+    subtrees = {key: _compile(subtree) for key, subtree in subtree_dict.items()}
+    return (attribute, subtrees, subtrees[None])
+
+
+class CompiledForest:
+    """
+    trees compiled for forest_classify_many, to keep and reuse when the
+    same forest classifies many batches of inputs
+    """
+
+    def __init__(self, trees):
+        self.trees = [_compile(tree) for tree in trees]
+
+
+def compile_forest(trees):
+    return CompiledForest(trees)
+
+
+def forest_classify_many(trees, inputs):
+    """
+    forest_classify each of the inputs, running them all through each tree
+    in turn and tallying the votes as they come. trees can be a
+    CompiledForest from compile_forest, or else they're compiled for this
+    call.
+    """
+    if not isinstance(trees, CompiledForest):
+        trees = compile_forest(trees)
+    tallies = [{} for _ in inputs]
+    for tree in trees.trees:
+        for tally, input in zip(tallies, inputs):
+            node = tree
+            while type(node) is tuple:
+                attribute, subtrees, default = node
+                node = subtrees.get(input.get(attribute), default)
+            tally[node] = tally.get(node, 0) + 1
+    # ties go to the vote seen first, as with Counter.most_common
+    return [max(tally, key=tally.get) for tally in tallies]
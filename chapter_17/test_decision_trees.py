@@ -0,0 +1,102 @@
+"""
+Tests for decision trees
+"""
+import random
+from collections import defaultdict
+from functools import partial
+from decision_trees import *
+
+
+inputs = [
+    ({'level':'Senior','lang':'Java','tweets':'no','phd':'no'},   False),
+    ({'level':'Senior','lang':'Java','tweets':'no','phd':'yes'},  False),
+    ({'level':'Mid','lang':'Python','tweets':'no','phd':'no'},     True),
+    ({'level':'Junior','lang':'Python','tweets':'no','phd':'no'},  True),
+    ({'level':'Junior','lang':'R','tweets':'yes','phd':'no'},      True),
+    ({'level':'Junior','lang':'R','tweets':'yes','phd':'yes'},    False),
+    ({'level':'Mid','lang':'R','tweets':'yes','phd':'yes'},        True),
+    ({'level':'Senior','lang':'Python','tweets':'no','phd':'no'}, False),
+    ({'level':'Senior','lang':'R','tweets':'yes','phd':'no'},      True),
+    ({'level':'Junior','lang':'Python','tweets':'yes','phd':'no'}, True),
+    ({'level':'Senior','lang':'Python','tweets':'yes','phd':'yes'},True),
+    ({'level':'Mid','lang':'Python','tweets':'no','phd':'yes'},    True),
+    ({'level':'Mid','lang':'Java','tweets':'yes','phd':'no'},      True),
+    ({'level':'Junior','lang':'Python','tweets':'no','phd':'yes'},False)
+]
+
+
+# the notebook's version, to compare against
+
+def partition_by(inputs, attribute):
+    groups = defaultdict(list)
+    for item in inputs:
+        groups[item[0][attribute]].append(item)
+    return groups
+
+def partition_entropy_by(inputs, attribute):
+    subsets = partition_by(inputs, attribute).values()
+    total_count = sum(len(subset) for subset in subsets)
+    return sum(entropy(class_probabilities([label for _, label in subset])) * len(subset) / total_count
+               for subset in subsets)
+
+def notebook_tree(inputs, split_candidates=None, num_split_candidates=None, rng=random):
+    if split_candidates is None:
+        split_candidates = list(inputs[0][0].keys())
+    num_trues = len([label for item, label in inputs if label])
+    num_falses = len(inputs) - num_trues
+    if num_trues == 0:
+        return False
+    if num_falses == 0:
+        return True
+    if not split_candidates:
+        return num_trues >= num_falses
+    if num_split_candidates is None or len(split_candidates) <= num_split_candidates:
+        sampled_split_candidates = split_candidates
+    else:
+        sampled_split_candidates = rng.sample(split_candidates, num_split_candidates)
+    best_attribute = min(sampled_split_candidates, key=partial(partition_entropy_by, inputs))
+    partitions = partition_by(inputs, best_attribute)
+    new_candidates = [a for a in split_candidates if a != best_attribute]
+    subtrees = {attribute: notebook_tree(subset, new_candidates, num_split_candidates, rng)
+                for attribute, subset in partitions.items()}
+    subtrees[None] = num_trues > num_falses
+    return (best_attribute, subtrees)
+
+
+def random_inputs(n, num_attributes=8):
+    rows = []
+    for _ in range(n):
+        x = {'a{}'.format(j): random.choice('abcd'[:2 + j % 3]) for j in range(num_attributes)}
+        label = (x['a0'] == 'a') != (x['a3'] in 'ab') or random.random() < 0.1
+        rows.append((x, label))
+    return rows
+
+
+def test_same_trees_as_the_notebook():
+    assert build_tree_id3(inputs) == notebook_tree(inputs)
+    random.seed(0)
+    data = random_inputs(300)
+    assert build_tree_id3(data) == notebook_tree(data)
+    for seed in range(5):
+        assert build_tree_id3(data, num_split_candidates=3, rng=random.Random(seed)) == \
+            notebook_tree(data, num_split_candidates=3, rng=random.Random(seed))
+
+
+def test_classify():
+    tree = build_tree_id3(inputs)
+    assert classify(tree, {'level':'Junior','lang':'Java','tweets':'yes','phd':'no'}) == True
+    assert classify(tree, {'level':'Junior','lang':'Java','tweets':'yes','phd':'yes'}) == False
+    assert classify(tree, {'level':'Intern'}) == True
+    assert classify(tree, {'level':'Senior'}) == False
+
+
+def test_forest():
+    random.seed(1)
+    data = random_inputs(200)
+    trees = build_forest(data, n=6, seed=2)
+    assert trees == build_forest(data, n=6, seed=2, processes=2)
+    queries = [x for x, _ in random_inputs(100)] + [{}, {'a0': 'z'}]
+    assert forest_classify_many(trees, queries) == [forest_classify(trees, x) for x in queries]
+
+    forest = compile_forest(trees)
+    assert forest_classify_many(forest, queries) == forest_classify_many(trees, queries)
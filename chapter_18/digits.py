@@ -0,0 +1,123 @@
+"""
+Recognize digits drawn in a 5 x 5 grid, the example from Chapter 18
+
+By default this trains just as the notebook did, one example at a time
+for 10,000 epochs from weights drawn after random.seed(0), and ends up
+with the same network, so the same predictions. Pass a batch_size to
+train on mini-batches instead. Each step follows the mean gradient of a
+batch, so the learning rate defaults to batch_size, which moves the
+weights as far per example as training one at a time does. With that,
+batch_size=2 classifies all ten digits after 4,000 epochs, as the
+notebook's training does. A single batch of all ten digits is less
+reliable with 5 hidden neurons: it gets some of them wrong even after
+10,000 epochs.
+"""
+import random
+
+from neural_network import NeuralNetwork
+
+
+raw_digits = [
+      """11111
+         1...1
+         1...1
+         1...1
+         11111""",
+
+      """..1..
+         ..1..
+         ..1..
+         ..1..
+         ..1..""",
+
+      """11111
+         ....1
+         11111
+         1....
+         11111""",
+
+      """11111
+         ....1
+         11111
+         ....1
+         11111""",
+
+      """1...1
+         1...1
+         11111
+         ....1
+         ....1""",
+
+      """11111
+         1....
+         11111
+         ....1
+         11111""",
+
+      """11111
+         1....
+         11111
+         1...1
+         11111""",
+
+      """11111
+         ....1
+         ....1
+         ....1
+         ....1""",
+
+      """11111
+         1...1
+         11111
+         1...1
+         11111""",
+
+      """11111
+         1...1
+         11111
+         ....1
+         11111"""]
+
+
+def make_digit(raw_digit):
+    return [1 if c == '1' else 0
+            for row in raw_digit.split("\n")
+            for c in row.strip()]
+
+
+inputs = [make_digit(digit) for digit in raw_digits]
+
+# one-hot encode digits 0-9
+targets = [[1 if i == j else 0 for i in range(10)] for j in range(10)]
+
+
+def train_digits(epochs=10000, batch_size=1, learning_rate=None, num_hidden=5, seed=0,
+                 **kwargs):
+    """
+    a network with num_hidden hidden neurons, trained on the ten digits.
+    learning_rate defaults to batch_size.
+    """
+    if learning_rate is None:
+        learning_rate = batch_size
+    rng = random.Random(seed)
+    network = NeuralNetwork.random([25, num_hidden, 10], rng=rng, **kwargs)
+    return network.train(inputs, targets, epochs, batch_size=batch_size,
+                         learning_rate=learning_rate)
+
+
+def classify(network, input):
+    outputs = network.predict(input)
+    return max(range(len(outputs)), key=outputs.__getitem__)
+
+
+if __name__ == '__main__':
+    network = train_digits()
+    for digit, input in enumerate(inputs):
+        print(digit, classify(network, input))
+
+    # a stylized 3
+    print(classify(network, [0,1,1,1,0,
+                             0,0,0,1,1,
+                             0,0,1,1,0,
+                             0,0,0,1,1,
+                             0,1,1,1,0]))
@@ -0,0 +1,254 @@
+"""
+Neural networks
+
+Code from Chapter 18 of Data Science from Scratch, reworked to train on
+mini-batches with each layer's weights in one contiguous matrix.
+"""
+import math
+import random
+from array import array
+from itertools import repeat
+from operator import add, mul, sub
+
+from matrix import Matrix
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# The notebook's feed_forward called neuron_output, and so dot and sigmoid,
+# once per neuron, building a new input list with the bias appended for
+# every layer, and backpropagate adjusted the weights one number at a time
+# for one example at a time.
+#
+# Here each layer keeps its weights in a Matrix, a row per neuron with the
+# bias weight last as in the notebook's lists. Activations go in buffers
+# allocated once per batch size and reused on every step, each row ending
+# with a 1 for the bias so a layer's outputs are one matrix product.
+#
+# Training on a mini-batch runs the whole batch forward, then works from
+# the top layer down: each layer's gradient is its deltas times its
+# inputs, summed over the batch, the layer takes one step, and the deltas
+# go back through its updated weights. That's the order the notebook's
+# backpropagate worked in, so with a batch of one example and a learning
+# rate of 1 it takes the same steps.
+#
+# With numpy the batch is a matrix and each of those is a matrix product
+# on views of the same buffers. Without it the same arithmetic happens an
+# example and a neuron at a time, with sums and maps done in C.
+
+def sigmoid(t):
+    try:
+        return 1 / (1 + math.exp(-t))
+    except OverflowError:
+        return 0.0
+
+
+def _sigmoid_in_place(z):
+    # the same formula on a numpy array, where exp overflowing to inf is fine
+    with np.errstate(over='ignore'):
+        np.negative(z, out=z)
+        np.exp(z, out=z)
+        z += 1
+        np.reciprocal(z, out=z)
+    return z
+
+
+class Layer:
+    """a fully connected layer of sigmoid neurons"""
+
+    def __init__(self, weights):
+        """weights is a list with a list of weights for each neuron, bias last"""
+        self.weights = weights if isinstance(weights, Matrix) else Matrix(weights)
+        self.num_outputs, width = self.weights.shape
+        self.num_inputs = width - 1
+        self.neurons = list(self.weights)
+
+    def to_lists(self):
+        return self.weights.tolist()
+
+    def forward(self, x, out):
+        """fill out with the outputs for input x, both ending with the bias input 1"""
+        for i, neuron in enumerate(self.neurons):
+            out[i] = sigmoid(sum(map(mul, neuron, x)))
+        return out
+
+    def backward(self, delta, inputs, out):
+        """fill out with the deltas of the layer below, given the deltas of this one"""
+        data, width = self.weights.data, self.num_inputs + 1
+        for j in range(self.num_inputs):
+            h = inputs[j]
+            out[j] = h * (1 - h) * sum(map(mul, delta, data[j::width]))
+        return out
+
+    def gradient(self, deltas, inputs):
+        """
+        the gradient for each weight, summed over a batch, from each example's
+        deltas and inputs
+        """
+        width = self.num_inputs + 1
+        if len(inputs) >= width:
+            # one sum over the batch per weight
+            input_columns = list(zip(*inputs))
+            return [sum(map(mul, d, x)) for d in zip(*deltas) for x in input_columns]
+        # or, for small batches, add up each neuron's row one example at a time
+        gradient = []
+        for i in range(self.num_outputs):
+            row = None
+            for delta, x in zip(deltas, inputs):
+                terms = map(mul, x, repeat(delta[i]))
+                row = list(terms) if row is None else list(map(add, row, terms))
+            gradient.extend(row)
+        return gradient
+
+    def update(self, gradient, learning_rate):
+        """take a step of learning_rate down the gradient, in place"""
+        data = self.weights.data
+        if learning_rate != 1:
+            gradient = map(mul, gradient, repeat(learning_rate))
+        data[:] = array('d', map(sub, data, gradient))
+
+
+class NeuralNetwork:
+    """a feed forward network of sigmoid layers"""
+
+    def __init__(self, layers, use_numpy=None):
+        self.layers = layers
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ImportError("use_numpy requires numpy")
+        self._buffers = {}
+
+    @classmethod
+    def from_weights(cls, network, **kwargs):
+        """
+        a network from the notebook's representation, a list of layers, each
+        a list of neurons, each a list of weights
+        """
+        return cls([Layer(layer) for layer in network], **kwargs)
+
+    @classmethod
+    def random(cls, sizes, rng=random, **kwargs):
+        """
+        a network with layers of the given sizes, starting with the inputs,
+        and weights drawn as in the notebook's digit example
+        """
+        return cls([Layer([[rng.random() for _ in range(num_inputs + 1)]
+                           for _ in range(num_outputs)])
+                    for num_inputs, num_outputs in zip(sizes, sizes[1:])], **kwargs)
+
+    def to_weights(self):
+        """the weights in the notebook's representation"""
+        return [layer.to_lists() for layer in self.layers]
+
+    def _batch_buffers(self, batch_size):
+        """
+        activation and delta buffers for each layer, for batch_size examples.
+        With numpy, these are matrices with a row per example, plus scratch
+        space for the gradients and the pre-activations.
+        """
+        if batch_size not in self._buffers:
+            sizes = [self.layers[0].num_inputs] + [layer.num_outputs for layer in self.layers]
+            if self.use_numpy:
+                activations = [np.ones((batch_size, n + 1)) for n in sizes]
+                deltas = [np.empty((batch_size, n)) for n in sizes[1:]]
+                scratch = ([np.empty((batch_size, n)) for n in sizes[1:]],
+                           [np.empty(layer.weights.shape) for layer in self.layers])
+                self._buffers[batch_size] = activations, deltas, scratch
+            else:
+                activations = [[array('d', [0.0] * n + [1.0]) for _ in range(batch_size)]
+                               for n in sizes]
+                deltas = [[array('d', [0.0] * n) for _ in range(batch_size)]
+                          for n in sizes[1:]]
+                self._buffers[batch_size] = activations, deltas, None
+        return self._buffers[batch_size]
+
+    def _forward(self, inputs):
+        """run the batch of inputs through the network, returning the activations"""
+        activations, _, scratch = self._batch_buffers(len(inputs))
+        if self.use_numpy:
+            activations[0][:, :-1] = inputs
+            for layer, x, out, z in zip(self.layers, activations, activations[1:], scratch[0]):
+                np.matmul(x, layer.weights.as_numpy().T, out=z)
+                out[:, :-1] = _sigmoid_in_place(z)
+        else:
+            for b, input_vector in enumerate(inputs):
+                x = activations[0][b]
+                x[:-1] = array('d', input_vector)
+                for layer, out in zip(self.layers, activations[1:]):
+                    x = layer.forward(x, out[b])
+        return activations
+
+    def feed_forward(self, input_vector):
+        """the outputs of every layer, as in the notebook"""
+        activations = self._forward([input_vector])
+        return [out[0][:-1].tolist() for out in activations[1:]]
+
+    def predict(self, input_vector):
+        """the outputs of the last layer"""
+        return self._forward([input_vector])[-1][0][:-1].tolist()
+
+    def predict_many(self, inputs, batch_size=256):
+        """the outputs of the last layer for each of the inputs, a batch at a time"""
+        predictions = []
+        for start in range(0, len(inputs), batch_size):
+            outputs = self._forward(inputs[start:start + batch_size])[-1]
+            predictions.extend(out[:-1].tolist() for out in outputs)
+        return predictions
+
+    def train_batch(self, inputs, targets, learning_rate=1.0):
+        """one step of gradient descent on the squared error of a batch"""
+        batch_size = len(inputs)
+        activations = self._forward(inputs)
+        _, deltas, scratch = self._batch_buffers(batch_size)
+        scale = learning_rate / batch_size
+
+        if self.use_numpy:
+            # output * (1 - output) is from the derivative of sigmoid
+            outputs, delta = activations[-1][:, :-1], deltas[-1]
+            np.subtract(outputs, targets, out=delta)
+            delta *= outputs
+            delta *= 1 - outputs
+            # from the top down, update each layer and then back-propagate its
+            # deltas through the new weights, in the notebook's order
+            for l in range(len(self.layers) - 1, -1, -1):
+                weights, gradient = self.layers[l].weights.as_numpy(), scratch[1][l]
+                np.matmul(deltas[l].T, activations[l], out=gradient)
+                gradient *= scale
+                weights -= gradient
+                if l:
+                    hidden = activations[l][:, :-1]
+                    np.matmul(deltas[l], weights[:, :-1], out=deltas[l - 1])
+                    deltas[l - 1] *= hidden
+                    deltas[l - 1] *= 1 - hidden
+            return self
+
+        for b, target_vector in enumerate(targets):
+            outputs, delta = activations[-1][b], deltas[-1][b]
+            for i, target in enumerate(target_vector):
+                output = outputs[i]
+                delta[i] = output * (1 - output) * (output - target)
+        for l in range(len(self.layers) - 1, -1, -1):
+            layer = self.layers[l]
+            layer.update(layer.gradient(deltas[l], activations[l]), scale)
+            if l:
+                for b in range(batch_size):
+                    layer.backward(deltas[l][b], activations[l][b], deltas[l - 1][b])
+        return self
+
+    def train(self, inputs, targets, epochs, batch_size=1, learning_rate=1.0,
+              shuffle=False, rng=random):
+        """
+        train on the inputs and targets for a number of epochs, in batches of
+        batch_size, in order unless shuffle is set
+        """
+        examples = list(zip(inputs, targets))
+        for _ in range(epochs):
+            if shuffle:
+                rng.shuffle(examples)
+            for start in range(0, len(examples), batch_size):
+                batch_inputs, batch_targets = zip(*examples[start:start + batch_size])
+                self.train_batch(batch_inputs, batch_targets, learning_rate)
+        return self
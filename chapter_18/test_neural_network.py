@@ -0,0 +1,102 @@
+"""
+Tests for neural networks
+"""
+import copy
+import math
+import random
+import pytest
+from neural_network import *
+from digits import inputs, targets, train_digits, classify
+
+
+# the notebook's version, to compare against
+
+def feed_forward(neural_network, input_vector):
+    outputs = []
+    for layer in neural_network:
+        input_with_bias = input_vector + [1]
+        output = [sigmoid(sum(w * x for w, x in zip(neuron, input_with_bias))) for neuron in layer]
+        outputs.append(output)
+        input_vector = output
+    return outputs
+
+def backpropagate(network, input_vector, targets):
+    hidden_outputs, outputs = feed_forward(network, input_vector)
+    output_deltas = [output * (1 - output) * (output - target)
+                     for output, target in zip(outputs, targets)]
+    for i, output_neuron in enumerate(network[-1]):
+        for j, hidden_output in enumerate(hidden_outputs + [1]):
+            output_neuron[j] -= output_deltas[i] * hidden_output
+    hidden_deltas = [hidden_output * (1 - hidden_output) *
+                     sum(d * n[i] for d, n in zip(output_deltas, network[-1]))
+                     for i, hidden_output in enumerate(hidden_outputs)]
+    for i, hidden_neuron in enumerate(network[0]):
+        for j, input in enumerate(input_vector + [1]):
+            hidden_neuron[j] -= hidden_deltas[i] * input
+
+
+def random_weights(sizes, seed=0):
+    rng = random.Random(seed)
+    return [[[rng.random() for _ in range(n_in + 1)] for _ in range(n_out)]
+            for n_in, n_out in zip(sizes, sizes[1:])]
+
+
+def test_xor_network():
+    network = NeuralNetwork.from_weights([[[20, 20, -30], [20, 20, -10]], [[-60, 60, -30]]])
+    for x in [0, 1]:
+        for y in [0, 1]:
+            assert round(network.predict([x, y])[0]) == (x != y)
+    assert network.feed_forward([0, 1]) == feed_forward(network.to_weights(), [0, 1])
+
+
+def test_same_steps_as_the_notebook():
+    weights = random_weights([25, 5, 10])
+    network = NeuralNetwork.from_weights(copy.deepcopy(weights), use_numpy=False)
+    for _ in range(20):
+        for input_vector, target_vector in zip(inputs, targets):
+            backpropagate(weights, input_vector, target_vector)
+    network.train(inputs, targets, 20)
+    assert network.to_weights() == weights
+
+    if np is not None:
+        network = NeuralNetwork.from_weights(random_weights([25, 5, 10]), use_numpy=True)
+        network.train(inputs, targets, 20)
+        assert all(math.isclose(a, b, abs_tol=1e-9)
+                   for got, want in zip(network.to_weights(), weights)
+                   for row, expected in zip(got, want)
+                   for a, b in zip(row, expected))
+
+
+@pytest.mark.parametrize('use_numpy', [
+    False, pytest.param(True, marks=pytest.mark.skipif(np is None, reason="needs numpy"))])
+def test_mini_batches(use_numpy):
+    # the gradient of a batch is the sum of the gradients of its examples
+    sizes = [4, 3, 2]
+    rng = random.Random(1)
+    batch = [[rng.random() for _ in range(4)] for _ in range(8)]
+    batch_targets = [[rng.random() for _ in range(2)] for _ in range(8)]
+    one_layer = NeuralNetwork.from_weights(random_weights(sizes)[:1], use_numpy=use_numpy)
+    one_layer.train_batch(batch, [t + [0.5] for t in batch_targets], learning_rate=0.5)
+    expected = random_weights(sizes)[:1]
+    for x, t in zip(batch, batch_targets):
+        outputs = feed_forward(random_weights(sizes)[:1], x)[-1]
+        for neuron, output, target in zip(expected[0], outputs, t + [0.5]):
+            delta = output * (1 - output) * (output - target)
+            for j, x_j in enumerate(x + [1]):
+                neuron[j] -= 0.5 / len(batch) * delta * x_j
+    assert all(math.isclose(a, b) for row, want in zip(one_layer.to_weights()[0], expected[0])
+               for a, b in zip(row, want))
+
+
+def test_digits():
+    network = train_digits(epochs=4000)
+    assert [classify(network, x) for x in inputs] == list(range(10))
+    assert all(math.isclose(a, b)
+               for many, one in zip(network.predict_many(inputs), map(network.predict, inputs))
+               for a, b in zip(many, one))
+    assert train_digits(epochs=50).to_weights() == train_digits(epochs=50).to_weights()
+
+
+def test_digits_in_batches():
+    network = train_digits(epochs=4000, batch_size=2)
+    assert [classify(network, x) for x in inputs] == list(range(10))
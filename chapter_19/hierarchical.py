@@ -0,0 +1,239 @@
+"""
+Bottom-up hierarchical clustering
+
+Code from Chapter 19 of Data Science from Scratch, reworked to cluster
+thousands of points instead of hundreds.
+"""
+import heapq
+import math
+from array import array
+from bisect import bisect_right
+
+
+# The notebook's bottom_up_cluster tried every pair of clusters at every
+# merge, measuring each pair from scratch over all the points in both, so
+# it took something like O(n^4) time. Here the distances between points
+# are computed once, into a matrix, and after a merge the distance from
+# the new cluster to each other cluster k comes from the old ones by the
+# Lance-Williams formulas:
+#
+#   single (min)      d(k, i+j) = min(d(k, i), d(k, j))
+#   complete (max)    d(k, i+j) = max(d(k, i), d(k, j))
+#   average (mean)    d(k, i+j) = (n_i d(k, i) + n_j d(k, j)) / (n_i + n_j)
+#
+# which give the same cluster distances as the notebook's distance_agg of
+# min, max or the mean of the pairwise distances.
+#
+# The closest pair is found with Mullner's "generic" algorithm: each
+# cluster remembers its nearest neighbor among the clusters in later
+# slots, and a heap keyed by those distances yields the next merge. A
+# neighbor that's been merged away, or whose distance has grown, is only
+# noticed, and recomputed, when it comes off the heap. That takes
+# O(n^2 log n) time at worst and O(n^2) memory for the matrix.
+#
+# The result is a merge table like scipy's: merge m joins clusters left[m]
+# and right[m] at distance height[m] into a cluster of size[m] points,
+# which gets id n + m, the points themselves being clusters 0 to n - 1.
+
+def _single(d_ki, d_kj, n_i, n_j):
+    return min(d_ki, d_kj)
+
+def _complete(d_ki, d_kj, n_i, n_j):
+    return max(d_ki, d_kj)
+
+def _average(d_ki, d_kj, n_i, n_j):
+    return (n_i * d_ki + n_j * d_kj) / (n_i + n_j)
+
+LINKAGES = {'single': _single, 'complete': _complete, 'average': _average}
+
+# the notebook chose a linkage by passing an aggregate function
+AGGREGATES = {'min': 'single', 'max': 'complete', 'mean': 'average'}
+
+
+def _linkage_update(method):
+    if callable(method):
+        method = AGGREGATES.get(getattr(method, '__name__', None), method)
+    if method not in LINKAGES:
+        raise ValueError("Unknown linkage {}, choose from {} or the functions min, max or mean"
+                         .format(method, ', '.join(sorted(LINKAGES))))
+    return LINKAGES[method]
+
+
+class Dendrogram:
+    """the n - 1 merges that cluster n points, as parallel arrays"""
+
+    def __init__(self, n):
+        self.n = n
+        self.left = array('q')
+        self.right = array('q')
+        self.height = array('d')
+        self.size = array('q')
+
+    def __len__(self):
+        return len(self.left)
+
+    def add_merge(self, left, right, height, size):
+        self.left.append(left)
+        self.right.append(right)
+        self.height.append(height)
+        self.size.append(size)
+        return self.n + len(self.left) - 1
+
+    def labels(self, num_clusters):
+        """
+        the cluster, from 0 to num_clusters - 1, of each point after undoing
+        the last num_clusters - 1 merges, in one pass down the table
+        """
+        n = self.n
+        if not 1 <= num_clusters <= n:
+            raise ValueError("can't cut {} points into {} clusters".format(n, num_clusters))
+        first_undone = n - num_clusters
+        label = [-1] * (2 * n - 1)
+        next_label = 0
+        if num_clusters == 1:
+            label[-1], next_label = 0, 1
+        # children have smaller ids than their parents, so walking down from
+        # the last merge labels every parent before its children
+        for m in range(n - 2, -1, -1):
+            for child in (self.left[m], self.right[m]):
+                if m >= first_undone:
+                    # an undone merge, each kept child starts a cluster
+                    if child < n or child - n < first_undone:
+                        label[child], next_label = next_label, next_label + 1
+                else:
+                    label[child] = label[n + m]
+        return label[:n]
+
+    def clusters(self, num_clusters):
+        """the indices of the points in each of num_clusters clusters"""
+        clusters = [[] for _ in range(num_clusters)]
+        for i, c in enumerate(self.labels(num_clusters)):
+            clusters[c].append(i)
+        return clusters
+
+    def to_nested(self, inputs):
+        """
+        the clustering in the notebook's format: a point is the leaf cluster
+        (input,) and a merge is (merge_order, [child1, child2]) where
+        merge_order is the number of clusters left after it
+        """
+        nodes = [(input,) for input in inputs]
+        for m in range(len(self)):
+            nodes.append((self.n - 2 - m, [nodes[self.left[m]], nodes[self.right[m]]]))
+        return nodes[-1]
+
+
+def linkage(inputs, method='single'):
+    """
+    cluster the inputs bottom up, where method is single, complete or
+    average, or equivalently min, max or mean as in the notebook's
+    distance_agg. Returns a Dendrogram.
+    """
+    update = _linkage_update(method)
+    n = len(inputs)
+    if n == 0:
+        raise ValueError("no inputs to cluster")
+    dist = math.dist
+    d = [array('d', [dist(x, y) for y in inputs]) for x in inputs]
+
+    dendrogram = Dendrogram(n)
+    cluster_id = list(range(n))
+    sizes = [1] * n
+    active = list(range(n))     # slots of the current clusters, sorted
+
+    def nearest_later(i):
+        row = d[i]
+        return min(((row[k], k) for k in active[bisect_right(active, i):]),
+                   default=(math.inf, None))
+
+    mindist, nn = [0.0] * n, [None] * n
+    heap = []
+    for i in range(n - 1):
+        mindist[i], nn[i] = nearest_later(i)
+        heap.append((mindist[i], i))
+    heapq.heapify(heap)
+
+    while len(active) > 1:
+        distance, i = heapq.heappop(heap)
+        if nn[i] is None or distance != mindist[i] or sizes[i] == 0:
+            # merged away, or a stale entry
+            continue
+        j = nn[i]
+        if sizes[j] == 0 or d[i][j] != distance:
+            # the neighbor was merged away or moved, so look again
+            mindist[i], nn[i] = nearest_later(i)
+            if nn[i] is not None:
+                heapq.heappush(heap, (mindist[i], i))
+            continue
+
+        # merge i into j, which now holds the new cluster
+        left, right = sorted((cluster_id[i], cluster_id[j]))
+        cluster_id[j] = dendrogram.add_merge(left, right, distance, sizes[i] + sizes[j])
+        n_i, n_j = sizes[i], sizes[j]
+        sizes[j], sizes[i] = n_i + n_j, 0
+        active.remove(i)
+        nn[i] = None
+
+        row_i, row_j = d[i], d[j]
+        for k in active:
+            if k != j:
+                row_j[k] = d[k][j] = update(row_i[k], row_j[k], n_i, n_j)
+                if k < j and row_j[k] < mindist[k]:
+                    mindist[k], nn[k] = row_j[k], j
+                    heapq.heappush(heap, (mindist[k], k))
+        mindist[j], nn[j] = nearest_later(j)
+        if nn[j] is not None:
+            heapq.heappush(heap, (mindist[j], j))
+
+    return dendrogram
+
+
+# The notebook's interface
+
+def is_leaf(cluster):
+    """a cluster is a leaf if it has length 1"""
+    return len(cluster) == 1
+
+def get_children(cluster):
+    """
+    returns the two children of this cluster if it's a merged
+    cluster; raises an exception if this is a leaf cluster
+    """
+    if is_leaf(cluster):
+        raise TypeError("a leaf cluster has no children")
+    else:
+        return cluster[1]
+
+def get_values(cluster):
+    """returns the value in this cluster (if it's a leaf cluster)
+    or all the values in the leaf clusters below it (if it's not)"""
+    values, stack = [], [cluster]
+    while stack:
+        cluster = stack.pop()
+        if is_leaf(cluster):
+            values.append(cluster[0])
+        else:
+            stack.extend(reversed(get_children(cluster)))
+    return values
+
+def get_merge_order(cluster):
+    if is_leaf(cluster):
+        return float('inf')
+    else:
+        return cluster[0]
+
+
+def bottom_up_cluster(inputs, distance_agg=min):
+    """the notebook's nested tuple clustering of the inputs"""
+    return linkage(inputs, distance_agg).to_nested(inputs)
+
+
+def generate_clusters(dendrogram, num_clusters, inputs=None):
+    """
+    cut a Dendrogram into num_clusters clusters, each a list of the inputs,
+    or of their indices if inputs isn't given
+    """
+    clusters = dendrogram.clusters(num_clusters)
+    if inputs is None:
+        return clusters
+    return [[inputs[i] for i in cluster] for cluster in clusters]
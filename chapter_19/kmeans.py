@@ -0,0 +1,232 @@
+"""
+k-means clustering
+
+Code from Chapter 19 of Data Science from Scratch, reworked to skip most
+distance computations, with k-means++ seeding, a mini-batch mode for data
+that arrives in pieces and clustering errors for many k in parallel.
+"""
+import math
+import random
+from multiprocessing import Pool
+
+from vector import iadd, isub
+
+
+# The notebook's KMeans.train measured the distance from every point to
+# every mean on every iteration, then found each cluster's points with
+# another pass over the data per cluster. This version gives the same
+# clusters as that one, starting from the same means, using Hamerly's
+# bounds:
+#
+#  - upper[i] is at least the distance from point i to its own mean
+#  - lower[i] is at most the distance from point i to any other mean
+#
+# When a mean moves by some drift, the triangle inequality says the upper
+# bound grows and the lower bound shrinks by at most that much. A point
+# can't have changed cluster if its upper bound is below its lower bound,
+# or below half the distance from its mean to the nearest other mean, and
+# once the means settle that's true for nearly every point.
+#
+# The means are kept as running sums and counts, so a point changing
+# cluster costs one subtraction and one addition instead of a pass over
+# all the points, and training stops when an iteration moves no points.
+
+def _two_nearest(point, means):
+    """the index of the nearest mean, its distance and the second nearest distance"""
+    dist = math.dist
+    best, best_distance, second = 0, math.inf, math.inf
+    for j, mean in enumerate(means):
+        d = dist(point, mean)
+        if d < best_distance:
+            best, best_distance, second = j, d, best_distance
+        elif d < second:
+            second = d
+    return best, best_distance, second
+
+
+def kmeans_plus_plus(inputs, k, rng=random):
+    """
+    choose k of the inputs as initial means, each one picked with probability
+    proportional to its squared distance from the nearest already chosen
+    """
+    if not 0 < k <= len(inputs):
+        raise ValueError("need between 1 and {} means, not {}".format(len(inputs), k))
+    dist = math.dist
+    centers = [inputs[rng.randrange(len(inputs))]]
+    d2 = [dist(x, centers[0]) ** 2 for x in inputs]
+    while len(centers) < k:
+        if sum(d2) > 0:
+            i = rng.choices(range(len(inputs)), weights=d2)[0]
+        else:
+            # every input sits on a center already
+            i = rng.randrange(len(inputs))
+        centers.append(inputs[i])
+        d2 = [min(d, dist(x, inputs[i]) ** 2) for d, x in zip(d2, inputs)]
+    return centers
+
+
+def initial_means(inputs, k, init='random', rng=random):
+    """k starting means, a random sample of the inputs as in the book, or k-means++"""
+    if init == 'random':
+        return rng.sample(inputs, k)
+    if init == 'k-means++':
+        return kmeans_plus_plus(inputs, k, rng)
+    raise ValueError("Unknown init {}, choose random or k-means++".format(init))
+
+
+class KMeans:
+    """performs k-means clustering"""
+
+    def __init__(self, k):
+        self.k = k
+        self.means = None
+        self.counts = None
+
+    def classify(self, input):
+        """return the index of the cluster closest to the input"""
+        return min(range(self.k),
+                   key=lambda i: math.dist(input, self.means[i]))
+
+    def train(self, inputs, init='random', max_iters=None, rng=random):
+        """
+        cluster the inputs, starting from means chosen by init, until no
+        point changes cluster or after max_iters updates of the means.
+        Leaves each input's cluster in self.assignments.
+        """
+        points = [tuple(x) for x in inputs]
+        k, dist = self.k, math.dist
+        means = [list(m) for m in initial_means(points, k, init, rng)]
+        sums = [[0.0] * len(points[0]) for _ in range(k)]
+        counts = [0] * k
+
+        assignments, upper, lower = [], [], []
+        for point in points:
+            a, u, l = _two_nearest(point, means)
+            assignments.append(a)
+            upper.append(u)
+            lower.append(l)
+            counts[a] += 1
+            iadd(sums[a], point)
+
+        iterations = 0
+        while max_iters is None or iterations < max_iters:
+            iterations += 1
+
+            # move the means, keeping the old one for an empty cluster
+            drifts = []
+            for j in range(k):
+                if counts[j]:
+                    new_mean = [s / counts[j] for s in sums[j]]
+                    drifts.append(dist(means[j], new_mean))
+                    means[j] = new_mean
+                else:
+                    drifts.append(0.0)
+
+            # and loosen the bounds by how far they moved
+            ranked = sorted(range(k), key=drifts.__getitem__, reverse=True)
+            largest = ranked[0]
+            runner_up = drifts[ranked[1]] if k > 1 else 0.0
+            for i, a in enumerate(assignments):
+                upper[i] += drifts[a]
+                lower[i] -= runner_up if a == largest else drifts[largest]
+
+            # half the distance from each mean to the nearest other mean
+            half_gaps = [0.5 * min((dist(m, other) for j, other in enumerate(means) if j != i),
+                                   default=math.inf)
+                         for i, m in enumerate(means)]
+
+            moved = 0
+            for i, point in enumerate(points):
+                a = assignments[i]
+                bound = max(half_gaps[a], lower[i])
+                if upper[i] <= bound:
+                    continue
+                # tighten the upper bound and try again before checking every mean
+                upper[i] = dist(point, means[a])
+                if upper[i] <= bound:
+                    continue
+                b, upper[i], lower[i] = _two_nearest(point, means)
+                if b != a:
+                    assignments[i] = b
+                    counts[a] -= 1
+                    counts[b] += 1
+                    isub(sums[a], point)
+                    iadd(sums[b], point)
+                    moved += 1
+
+            if not moved:
+                break
+
+        self.means = means
+        self.counts = counts
+        self.assignments = assignments
+        self.iterations = iterations
+        return self
+
+    # Mini-batch k-means, after Sculley's "Web-scale k-means clustering".
+    # Each batch is assigned to the current means, then each mean moves
+    # toward its new points by a step that shrinks with the number of
+    # points it has seen, so it ends up the mean of everything assigned to
+    # it. Batches can come from a stream that never fits in memory.
+
+    def partial_fit(self, batch, init='k-means++', rng=random):
+        """update the means with one batch of inputs, seeding them from the first"""
+        if self.means is None:
+            self.means = [list(m) for m in initial_means(batch, self.k, init, rng)]
+            self.counts = [0] * self.k
+        means, counts = self.means, self.counts
+        for x, j in [(x, self.classify(x)) for x in batch]:
+            counts[j] += 1
+            eta = 1 / counts[j]
+            means[j][:] = [m + eta * (x_i - m) for m, x_i in zip(means[j], x)]
+        return self
+
+    def train_minibatch(self, inputs, batch_size=100, num_iters=100,
+                        init='k-means++', rng=random):
+        """
+        cluster the inputs with num_iters mini-batches of batch_size inputs
+        sampled at random, seeding the means from all of the inputs
+        """
+        self.means = [list(m) for m in initial_means(inputs, self.k, init, rng)]
+        self.counts = [0] * self.k
+        batch_size = min(batch_size, len(inputs))
+        for _ in range(num_iters):
+            self.partial_fit(rng.sample(inputs, batch_size), rng=rng)
+        return self
+
+
+def squared_clustering_errors(inputs, k, init='random', rng=random):
+    """finds the total squared error from k-means clustering the inputs"""
+    clusterer = KMeans(k).train(inputs, init=init, rng=rng)
+    means = clusterer.means
+    return sum(math.dist(input, means[cluster]) ** 2
+               for input, cluster in zip(inputs, clusterer.assignments))
+
+
+# Errors for an elbow plot. Each k gets its own generator, seeded from
+# the overall seed and k, so the errors are the same however many
+# processes compute them. Workers get the inputs once, when they start.
+
+def _errors_for_k(inputs, init, seed, k):
+    return squared_clustering_errors(inputs, k, init, random.Random('{}:{}'.format(seed, k)))
+
+
+# state of a worker process, set up by _init_worker
+_inputs = _init = _seed = None
+
+def _init_worker(inputs, init, seed):
+    global _inputs, _init, _seed
+    _inputs, _init, _seed = inputs, init, seed
+
+def _worker_errors(k):
+    return _errors_for_k(_inputs, _init, _seed, k)
+
+
+def clustering_errors(inputs, ks, init='k-means++', seed=0, processes=None):
+    """the total squared error from clustering the inputs into k clusters, for each of ks"""
+    inputs = [tuple(x) for x in inputs]
+    ks = list(ks)
+    if processes and processes > 1 and len(ks) > 1:
+        with Pool(processes, initializer=_init_worker, initargs=(inputs, init, seed)) as pool:
+            return pool.map(_worker_errors, ks, chunksize=1)
+    return [_errors_for_k(inputs, init, seed, k) for k in ks]
@@ -0,0 +1,58 @@
+"""
+Tests for hierarchical clustering
+"""
+import math
+import random
+from statistics import mean
+from hierarchical import *
+
+
+def notebook_heights(inputs, distance_agg):
+    """merge distances from the notebook's algorithm, on clusters of indices"""
+    clusters = [[i] for i in range(len(inputs))]
+    heights = []
+    while len(clusters) > 1:
+        c1, c2 = min(((c1, c2) for i, c1 in enumerate(clusters) for c2 in clusters[:i]),
+                     key=lambda p: distance_agg([math.dist(inputs[a], inputs[b])
+                                                 for a in p[0] for b in p[1]]))
+        heights.append(distance_agg([math.dist(inputs[a], inputs[b]) for a in c1 for b in c2]))
+        clusters = [c for c in clusters if c is not c1 and c is not c2] + [c1 + c2]
+    return heights
+
+
+def test_matches_the_notebook():
+    random.seed(0)
+    inputs = [[random.random(), random.random()] for _ in range(40)]
+    for method, agg in [('single', min), ('complete', max), ('average', mean)]:
+        dendrogram = linkage(inputs, agg)
+        assert len(dendrogram) == len(inputs) - 1
+        assert dendrogram.size[-1] == len(inputs)
+        expected = notebook_heights(inputs, agg)
+        assert all(math.isclose(a, b) for a, b in zip(dendrogram.height, expected)), method
+
+
+def test_cut():
+    inputs = [[0, 0], [0, 1], [10, 0], [10, 1], [30, 0]]
+    dendrogram = linkage(inputs, 'complete')
+    assert dendrogram.labels(1) == [0] * 5
+    assert sorted(dendrogram.clusters(3)) == [[0, 1], [2, 3], [4]]
+    assert sorted(map(sorted, generate_clusters(dendrogram, 2, inputs))) == \
+        [[[0, 0], [0, 1], [10, 0], [10, 1]], [[30, 0]]]
+    assert sorted(dendrogram.clusters(5)) == [[0], [1], [2], [3], [4]]
+
+
+def test_nested_format():
+    inputs = [[0, 0], [0, 1], [10, 0]]
+    base_cluster = bottom_up_cluster(inputs)
+    assert get_merge_order(base_cluster) == 0
+    assert sorted(get_values(base_cluster)) == sorted(inputs)
+    first, second = get_children(base_cluster)
+    assert sorted([get_merge_order(first), get_merge_order(second)]) == [1, float('inf')]
+
+
+def test_unknown_linkage():
+    try:
+        linkage([[0], [1]], 'ward')
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,65 @@
+"""
+Tests for k-means clustering
+"""
+import math
+import random
+from kmeans import *
+
+
+inputs = [[-14,-5],[13,13],[20,23],[-19,-11],[-9,-16],[21,27],[-49,15],[26,13],[-46,5],[-34,-1],[11,15],[-49,0],[-22,-16],[19,28],[-12,-8],[-13,-19],[-41,8],[-11,-6],[-25,-9],[-18,-3]]
+
+
+def lloyd(inputs, means):
+    """the notebook's k-means, from the given means"""
+    k = len(means)
+    assignments = None
+    while True:
+        new_assignments = [min(range(k), key=lambda j: math.dist(x, means[j])) for x in inputs]
+        if assignments == new_assignments:
+            return means, assignments
+        assignments = new_assignments
+        for j in range(k):
+            points = [p for p, a in zip(inputs, assignments) if a == j]
+            if points:
+                means[j] = [sum(column) / len(points) for column in zip(*points)]
+
+
+def clustered_points(n, dim, k):
+    centers = [[random.uniform(-50, 50) for _ in range(dim)] for _ in range(k)]
+    return [[c + random.gauss(0, 5) for c in random.choice(centers)] for _ in range(n)]
+
+
+def test_matches_the_notebook():
+    random.seed(0)
+    for data, k in [(inputs, 3), (clustered_points(500, 3, 6), 6), (clustered_points(300, 2, 10), 4)]:
+        for seed in range(3):
+            clusterer = KMeans(k).train(data, rng=random.Random(seed))
+            means, assignments = lloyd(data, [list(m) for m in random.Random(seed).sample(data, k)])
+            assert clusterer.assignments == assignments
+            assert all(math.dist(m1, m2) < 1e-9 for m1, m2 in zip(clusterer.means, means))
+            assert [clusterer.classify(x) for x in data] == assignments
+
+
+def test_kmeans_plus_plus_spreads_out():
+    random.seed(0)
+    points = [[100 * c + random.random(), 0] for c in range(5) for _ in range(50)]
+    centers = kmeans_plus_plus(points, 5, random.Random(1))
+    assert sorted(round(x / 100) for x, _ in centers) == [0, 1, 2, 3, 4]
+    # all the same point
+    assert kmeans_plus_plus([[1, 1]] * 5, 3) == [[1, 1]] * 3
+
+
+def test_minibatch_finds_clusters():
+    random.seed(0)
+    centers = [[0, 0], [20, 0], [0, 20]]
+    data = [[c + random.gauss(0, 1) for c in random.choice(centers)] for _ in range(3000)]
+    clusterer = KMeans(3).train_minibatch(data, batch_size=50, num_iters=40, rng=random.Random(0))
+    for center in centers:
+        assert min(math.dist(center, m) for m in clusterer.means) < 0.5
+
+
+def test_clustering_errors_in_parallel():
+    serial = clustering_errors(inputs, range(1, 8), seed=3)
+    assert serial == clustering_errors(inputs, range(1, 8), seed=3, processes=2)
+    assert serial[0] > serial[2] > serial[-1]
+    assert clustering_errors(inputs, [len(inputs)]) == [0]
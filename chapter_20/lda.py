@@ -0,0 +1,331 @@
+"""
+Latent Dirichlet allocation
+
+Code from Chapter 20 of Data Science from Scratch, reworked to keep the
+topic counts in integer arrays and to sample in parallel.
+"""
+import random
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate, compress, repeat
+from multiprocessing import Pool
+from operator import add, mul, sub, truediv
+
+
+# The notebook's Gibbs sampler went word by word, calling topic_weight for
+# each topic, which looked counts up in Counters and recomputed both
+# denominators, and then sample_from walked the weights in Python.
+#
+# Here words are interned as ids, and the counts are arrays of ints: the
+# topic counts of each word in one flat array, a row of K per word, and
+# likewise a row per document. The denominator of p(topic | document) is
+# the same for every word of a document, so it's computed once per
+# document, and the denominators of p(word | topic) are kept in a list and
+# updated as the topic counts change. The dense sampler then builds the
+# weights for a word with maps over a row, and picks a topic from running
+# sums in C, doing the notebook's arithmetic in the notebook's order, so
+# with the same random numbers it picks the same topics.
+#
+# The sparse sampler is SparseLDA (Yao, Mimno and McCallum, 2009). The
+# weight of topic k splits into
+#
+#   alpha beta / (n_k + W beta)                 s, the same for every word
+#   n_dk beta / (n_k + W beta)                  r, for the document's topics
+#   n_wk (n_dk + alpha) / (n_k + W beta)        q, for the word's topics
+#
+# where n_k, n_dk and n_wk count the words in topic k, in document d and
+# topic k, and of word w and topic k. s and r are kept up to date as the
+# counts change, so each word costs time in the number of topics it and
+# its document have, not K. It samples from the same distribution as the
+# dense sampler, only not with the same random numbers.
+
+def _dense_sweep(documents, topics, doc_topic, word_topic, topic_counts, params,
+                 iterations, rng):
+    """
+    Gibbs sample new topics for each word of the documents, in place, with
+    doc_topic the documents' rows of counts
+    """
+    K, W, alpha, beta = params
+    W_beta, K_alpha = W * beta, K * alpha
+    alphas, betas = repeat(alpha), repeat(beta)
+    denominators = [n + W_beta for n in topic_counts]
+    uniform = rng.random
+    for _ in range(iterations):
+        for d, (document, document_topics) in enumerate(zip(documents, topics)):
+            row = d * K
+            counts = doc_topic[row:row + K]
+            # the document's length without the word being sampled
+            doc_denominator = repeat(len(document) - 1 + K_alpha)
+            for i, (w, topic) in enumerate(zip(document, document_topics)):
+                start = w * K
+                counts[topic] -= 1
+                word_topic[start + topic] -= 1
+                topic_counts[topic] -= 1
+                denominators[topic] = topic_counts[topic] + W_beta
+
+                # p(word | topic) * p(topic | document) for each topic
+                weights = list(map(mul,
+                                   map(truediv, map(add, word_topic[start:start + K], betas),
+                                       denominators),
+                                   map(truediv, map(add, counts, alphas), doc_denominator)))
+                # the notebook's sample_from subtracted weights from a random
+                # fraction of the total until it got to 0
+                remaining = list(accumulate(weights, sub, initial=sum(weights) * uniform()))
+                new_topic = min(K - bisect_right(remaining[:0:-1], 0.0), K - 1)
+
+                document_topics[i] = new_topic
+                counts[new_topic] += 1
+                word_topic[start + new_topic] += 1
+                topic_counts[new_topic] += 1
+                denominators[new_topic] = topic_counts[new_topic] + W_beta
+            doc_topic[row:row + K] = counts
+
+
+def _row(counts, K):
+    """a dict of nonzero counts as a row of K"""
+    row = array('l', [0]) * K
+    for k, n in counts.items():
+        row[k] = n
+    return row
+
+
+def _sparse_sweep(documents, topics, doc_topic, word_topic, topic_counts, params,
+                  iterations, rng):
+    """the same as _dense_sweep, sampling by SparseLDA's buckets"""
+    K, W, alpha, beta = params
+    W_beta, alpha_beta = W * beta, alpha * beta
+    uniform = rng.random
+
+    # the nonzero topic counts of each word in the documents
+    word_counts = {}
+    for document in documents:
+        for w in document:
+            if w not in word_counts:
+                row = word_topic[w * K:(w + 1) * K]
+                word_counts[w] = dict(compress(enumerate(row), row))
+    denominators = [n + W_beta for n in topic_counts]
+    s = r = 0.0
+
+    def move(k, change, topic_words):
+        """add change to the counts of topic k, and update the buckets to match"""
+        nonlocal s, r
+        n_dk = counts.get(k, 0)
+        s -= s_terms[k]
+        r -= n_dk * beta / denominators[k]
+        topic_counts[k] += change
+        denominator = denominators[k] = topic_counts[k] + W_beta
+        n_dk += change
+        if n_dk:
+            counts[k] = n_dk
+        else:
+            del counts[k]
+        n_wk = topic_words.get(k, 0) + change
+        if n_wk:
+            topic_words[k] = n_wk
+        else:
+            del topic_words[k]
+        s_terms[k] = alpha_beta / denominator
+        s += s_terms[k]
+        r += n_dk * beta / denominator
+        coefficients[k] = (n_dk + alpha) / denominator
+
+    for _ in range(iterations):
+        # s is summed afresh each sweep, and r each document, so rounding
+        # errors from updating them don't pile up
+        s_terms = [alpha_beta / x for x in denominators]
+        s = sum(s_terms)
+        for d, (document, document_topics) in enumerate(zip(documents, topics)):
+            row = d * K
+            counts = doc_topic[row:row + K]
+            counts = dict(compress(enumerate(counts), counts))
+            r = sum(n * beta / denominators[k] for k, n in counts.items())
+            # (n_dk + alpha) / (n_k + W beta), the q bucket's factor for each topic
+            coefficients = [alpha / x for x in denominators]
+            for k, n in counts.items():
+                coefficients[k] = (n + alpha) / denominators[k]
+
+            for i, (w, topic) in enumerate(zip(document, document_topics)):
+                topic_words = word_counts[w]
+                move(topic, -1, topic_words)
+
+                # work out q, then pick a bucket and a topic within it
+                q_topics = list(topic_words)
+                q_terms = list(map(mul, topic_words.values(),
+                                   map(coefficients.__getitem__, q_topics)))
+                q = sum(q_terms)
+                u = uniform() * (s + r + q)
+                new_topic = topic
+                if u < q:
+                    for new_topic, term in zip(q_topics, q_terms):
+                        u -= term
+                        if u <= 0:
+                            break
+                elif u < q + r:
+                    u -= q
+                    for new_topic, n in counts.items():
+                        u -= n * beta / denominators[new_topic]
+                        if u <= 0:
+                            break
+                else:
+                    u -= q + r
+                    for new_topic, term in enumerate(s_terms):
+                        u -= term
+                        if u <= 0:
+                            break
+
+                document_topics[i] = new_topic
+                move(new_topic, 1, topic_words)
+            doc_topic[row:row + K] = _row(counts, K)
+
+    for w, topic_words in word_counts.items():
+        word_topic[w * K:(w + 1) * K] = _row(topic_words, K)
+
+
+SAMPLERS = {'dense': _dense_sweep, 'sparse': _sparse_sweep}
+
+
+def _sampler_sweep(name):
+    if name not in SAMPLERS:
+        raise ValueError("Unknown sampler {}, choose from {}"
+                         .format(name, ', '.join(sorted(SAMPLERS))))
+    return SAMPLERS[name]
+
+
+# Approximate distributed LDA (Newman et al., 2009). The documents are
+# split into shards, and in each iteration every shard is swept against
+# its own copy of the word and topic counts as they were at the start of
+# the iteration, so the shards can be swept at once in separate
+# processes. Then the changes each shard made to the counts are added up.
+# Each shard's sweep draws its random numbers from its own generator,
+# seeded from the overall seed, the iteration and the shard, so the topics
+# for a given seed and number of shards are the same however many
+# processes sample them. Workers get the documents once, when they start.
+
+def _sweep_shard(documents, params, sampler, seed, task):
+    shard, (start, stop), iteration, topics, doc_topic, word_topic, topic_counts = task
+    rng = random.Random('{}:{}:{}'.format(seed, iteration, shard))
+    new_word_topic, new_topic_counts = array('l', word_topic), array('l', topic_counts)
+    SAMPLERS[sampler](documents[start:stop], topics, doc_topic,
+                      new_word_topic, new_topic_counts, params, 1, rng)
+    return (topics, doc_topic,
+            array('l', map(sub, new_word_topic, word_topic)),
+            array('l', map(sub, new_topic_counts, topic_counts)))
+
+
+# state of a worker process, set up by _init_worker
+_documents = _params = _sampler = _seed = None
+
+def _init_worker(documents, params, sampler, seed):
+    global _documents, _params, _sampler, _seed
+    _documents, _params, _sampler, _seed = documents, params, sampler, seed
+
+def _worker_sweep(task):
+    return _sweep_shard(_documents, _params, _sampler, _seed, task)
+
+
+class LDA:
+    """a topic model of K topics, fit by Gibbs sampling"""
+
+    def __init__(self, K=4, alpha=0.1, beta=0.1):
+        self.K = K
+        self.alpha = alpha
+        self.beta = beta
+        self.words = []         # word of each id
+        self.ids = {}           # id of each word
+        self.documents = []     # for each document, an array of word ids
+        self.topics = []        # for each document, an array of its words' topics
+        self.doc_topic = array('l')     # a row of K topic counts per document
+        self.word_topic = array('l')    # a row of K topic counts per word
+        self.topic_counts = array('l')
+
+    def _setup(self, documents, rng):
+        """intern the documents' words and give each a random topic, as in the notebook"""
+        K = self.K
+        self.topics = [array('l', [rng.randrange(K) for _ in document]) for document in documents]
+        self.words, self.ids = [], {}
+        for document in documents:
+            for word in document:
+                if word not in self.ids:
+                    self.ids[word] = len(self.words)
+                    self.words.append(word)
+        self.documents = [array('l', map(self.ids.__getitem__, document))
+                          for document in documents]
+        self.doc_topic = array('l', [0] * (len(documents) * K))
+        self.word_topic = array('l', [0] * (len(self.words) * K))
+        self.topic_counts = array('l', [0] * K)
+        for d, (document, topics) in enumerate(zip(self.documents, self.topics)):
+            for w, topic in zip(document, topics):
+                self.doc_topic[d * K + topic] += 1
+                self.word_topic[w * K + topic] += 1
+                self.topic_counts[topic] += 1
+
+    @property
+    def params(self):
+        return self.K, len(self.words), self.alpha, self.beta
+
+    def fit(self, documents, iterations=1000, sampler='dense', rng=random):
+        """
+        fit topics to the documents, lists of words, by iterations sweeps of
+        Gibbs sampling with the dense or sparse sampler
+        """
+        sweep = _sampler_sweep(sampler)
+        self._setup(documents, rng)
+        sweep(self.documents, self.topics, self.doc_topic, self.word_topic,
+              self.topic_counts, self.params, iterations, rng)
+        return self
+
+    def fit_parallel(self, documents, iterations=1000, num_shards=None, processes=None,
+                     seed=0, sampler='dense'):
+        """
+        fit topics to the documents by approximate distributed Gibbs sampling
+        over num_shards shards of them, by default one per process, sweeping
+        the shards in a pool of processes if processes is more than 1
+        """
+        _sampler_sweep(sampler)
+        self._setup(documents, random.Random(seed))
+        K, D = self.K, len(self.documents)
+        num_shards = min(num_shards or processes or 1, max(D, 1))
+        bounds = [(D * s // num_shards, D * (s + 1) // num_shards) for s in range(num_shards)]
+
+        def run(sweep):
+            for iteration in range(iterations):
+                tasks = [(s, (start, stop), iteration, self.topics[start:stop],
+                          self.doc_topic[start * K:stop * K], self.word_topic, self.topic_counts)
+                         for s, (start, stop) in enumerate(bounds)]
+                for (start, stop), (topics, doc_topic, word_change, topic_change) \
+                        in zip(bounds, sweep(tasks)):
+                    self.topics[start:stop] = topics
+                    self.doc_topic[start * K:stop * K] = doc_topic
+                    self.word_topic = array('l', map(add, self.word_topic, word_change))
+                    self.topic_counts = array('l', map(add, self.topic_counts, topic_change))
+
+        if processes and processes > 1 and num_shards > 1:
+            with Pool(processes, initializer=_init_worker,
+                      initargs=(self.documents, self.params, sampler, seed)) as pool:
+                run(lambda tasks: pool.map(_worker_sweep, tasks, chunksize=1))
+        else:
+            run(lambda tasks: [_sweep_shard(self.documents, self.params, sampler, seed, task)
+                               for task in tasks])
+        return self
+
+    # The notebook's views of the counts
+
+    def document_topics(self):
+        """the topic of each word of each document"""
+        return [topics.tolist() for topics in self.topics]
+
+    def document_topic_counts(self):
+        """for each document, a Counter of its words' topics"""
+        K = self.K
+        return [Counter({k: n for k, n in enumerate(self.doc_topic[d * K:(d + 1) * K]) if n})
+                for d in range(len(self.documents))]
+
+    def topic_word_counts(self):
+        """for each topic, a Counter of the words assigned to it"""
+        K, counts = self.K, [Counter() for _ in range(self.K)]
+        for w, word in enumerate(self.words):
+            for k, n in enumerate(self.word_topic[w * K:(w + 1) * K]):
+                if n:
+                    counts[k][word] = n
+        return counts
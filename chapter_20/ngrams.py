@@ -0,0 +1,277 @@
+"""
+n-gram language models
+
+Code from Chapter 20 of Data Science from Scratch, reworked to store
+distinct transitions compactly instead of every token of the corpus.
+"""
+import random
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate, chain, compress, islice, repeat
+from operator import add, floordiv, itemgetter, mul, ne
+
+
+TOKEN = re.compile(r"[\w']+|[\.]")
+
+def tokenize(text):
+    return TOKEN.findall(text)
+
+
+# The notebook's transitions were dicts from a word, or a pair of words,
+# to a list of every word that ever followed it, repeats and all, and
+# random.choice on that list picked the next word with probability
+# proportional to its count. Here words are interned as integer ids and
+# each distinct n-gram of ids is counted, chunk by chunk, in a Counter.
+#
+# To generate, the counts are frozen into flat arrays sorted by n-gram.
+# A context, the n - 1 words before the next one, has its ids and a run of
+# next word ids with their counts. totals holds the running total of all
+# the counts, so picking a next word is a random number between the totals
+# at either end of its context's run and a bisect, O(log k) for k distinct
+# next words. A context is looked up by its key, its ids read as the
+# digits of a number in base len(words). Keys are Python ints, kept only in
+# memory, since they need (n - 1) * log2(len(words)) bits: more than 64
+# for a 5-gram model of 70,000 words.
+#
+# Sentences start after a '.', and the contexts that begin with one are
+# a single block of the sorted keys, so a sentence starts with a bisect
+# over that block, which picks a whole n-gram after a '.' in proportion
+# to its count. For trigrams that's the notebook's choice of a start
+# from starts and then a next word.
+#
+# A saved model is a header, the words as UTF-8 separated by newlines,
+# which tokens never contain, then the arrays, written and read whole.
+# The keys aren't saved; loading recomputes them from the contexts' ids.
+
+MAGIC = b'DSNG'
+# magic, n, words' length in bytes, and the numbers of words, contexts and
+# transitions, and of ids carried over for the next chunk
+HEADER = struct.Struct('=4sQQQQQQ')
+
+
+def _context_keys(contexts, n, num_words):
+    """each context's key, from the ids of all the contexts one after another"""
+    keys = [0] * (len(contexts) // (n - 1))
+    for k in range(n - 1):
+        keys = list(map(add, map(mul, keys, repeat(num_words)), contexts[k::n - 1]))
+    return keys
+
+
+def _index(tables, keys):
+    """add the contexts' keys, in order, and the position of each key"""
+    tables['keys'] = keys
+    tables['index'] = dict(zip(keys, range(len(keys))))
+    return tables
+
+
+class NgramModel:
+    """counts of which word follows each n - 1 words"""
+
+    def __init__(self, n=2):
+        if n < 2:
+            raise ValueError("n-grams need n of at least 2")
+        self.n = n
+        self.words = []             # word of each id
+        self.ids = {}               # id of each word
+        self._counts = Counter()    # tuple of n ids -> count
+        self._tail = ()             # the last n - 1 ids seen, to carry over chunks
+        self._tables = None
+
+    def intern(self, word):
+        """the id of word, adding it if it's new"""
+        i = self.ids.get(word)
+        if i is None:
+            i = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return i
+
+    def partial_fit(self, tokens):
+        """
+        count the n-grams in tokens, which continue from the tokens of any
+        earlier call, so a corpus can be counted a chunk at a time
+        """
+        self._thaw()
+        tokens = list(tokens)
+        ids = self.ids
+        self.intern('.')
+        for token in dict.fromkeys(tokens):
+            if token not in ids:
+                self.intern(token)
+        encoded = list(self._tail)
+        encoded.extend(map(ids.__getitem__, tokens))
+        self._counts.update(zip(*[encoded[k:] for k in range(self.n)]))
+        self._tail = tuple(encoded[-(self.n - 1):])
+        return self
+
+    def fit_corpus(self, texts, chunk_size=100000):
+        """count the n-grams in an iterable of texts, chunk_size tokens at a time"""
+        tokens = (token for text in texts for token in tokenize(text))
+        while True:
+            chunk = list(islice(tokens, chunk_size))
+            if not chunk:
+                return self
+            self.partial_fit(chunk)
+
+    def transitions(self):
+        """
+        for each context, a tuple of n - 1 words, a dict of the words that
+        followed it to how many times they did
+        """
+        self._thaw()
+        words, transitions = self.words, {}
+        for gram, count in self._counts.items():
+            context = tuple(words[i] for i in gram[:-1])
+            transitions.setdefault(context, {})[words[gram[-1]]] = count
+        return transitions
+
+    # Frozen tables
+
+    def _key(self, ids):
+        key = 0
+        for i in ids:
+            key = key * len(self.words) + i
+        return key
+
+    def _freeze(self):
+        if self._tables is None:
+            num_words = len(self.words)
+            # each n-gram's key, a column of ids at a time
+            codes = [0] * len(self._counts)
+            for k in range(self.n):
+                column = map(itemgetter(k), self._counts)
+                codes = list(map(add, map(mul, codes, repeat(num_words)), column))
+            order = sorted(range(len(codes)), key=codes.__getitem__)
+            codes = list(map(codes.__getitem__, order))
+            counts = list(map(list(self._counts.values()).__getitem__, order))
+            grams = list(map(list(self._counts).__getitem__, order))
+
+            contexts = list(map(floordiv, codes, repeat(num_words)))
+            is_first = list(map(ne, contexts, [None] + contexts[:-1]))
+            offsets = array('q', compress(range(len(codes)), is_first))
+            offsets.append(len(codes))
+            totals = array('q', [0])
+            totals.extend(accumulate(counts))
+            self._tables = _index({
+                # the ids of each context, one after another
+                'contexts': array('i', chain.from_iterable(
+                    map(itemgetter(slice(0, self.n - 1)), compress(grams, is_first)))),
+                'offsets': offsets,
+                'next_ids': array('i', map(itemgetter(self.n - 1), grams)),
+                'totals': totals,
+            }, list(compress(contexts, is_first)))
+        return self._tables
+
+    def _thaw(self):
+        """rebuild the counts, for a model that was loaded from a file"""
+        if self._counts is not None:
+            self._tables = None
+            return
+        tables = self._tables
+        offsets, next_ids, totals = tables['offsets'], tables['next_ids'], tables['totals']
+        contexts, m = tables['contexts'], self.n - 1
+        self._counts = Counter()
+        for c in range(len(offsets) - 1):
+            context = tuple(contexts[c * m:(c + 1) * m])
+            for r in range(offsets[c], offsets[c + 1]):
+                self._counts[context + (next_ids[r],)] = totals[r + 1] - totals[r]
+        self._tables = None
+
+    def next_id(self, context, rng=random):
+        """
+        a random next word id after the tuple of ids context, in proportion to
+        how often it followed, or None if context was never seen
+        """
+        tables = self._freeze()
+        c = tables['index'].get(self._key(context))
+        if c is None:
+            return None
+        offsets, totals = tables['offsets'], tables['totals']
+        low, high = totals[offsets[c]], totals[offsets[c + 1]]
+        r = bisect_right(totals, low + rng.random() * (high - low),
+                         offsets[c] + 1, offsets[c + 1] + 1)
+        return tables['next_ids'][r - 1]
+
+    def generate(self, rng=random):
+        """a random sentence, ending in a '.'"""
+        tables = self._freeze()
+        keys, index, offsets = tables['keys'], tables['index'], tables['offsets']
+        next_ids, totals = tables['next_ids'], tables['totals']
+        num_words, period = len(self.words), self.ids['.']
+        place = num_words ** (self.n - 2)
+        uniform = rng.random
+
+        # the first n-gram, from the block of contexts starting with a '.'
+        first = bisect_left(keys, period * place)
+        last = bisect_left(keys, (period + 1) * place)
+        if first == last:
+            raise ValueError("no sentence starts after a '.' to generate from")
+        low, high = totals[offsets[first]], totals[offsets[last]]
+        r = bisect_right(totals, low + rng.random() * (high - low),
+                         offsets[first] + 1, offsets[last] + 1) - 1
+        c = bisect_right(offsets, r) - 1
+        key = keys[c]
+        result = tables['contexts'][c * (self.n - 1) + 1:(c + 1) * (self.n - 1)].tolist()
+        i = next_ids[r]
+
+        while True:
+            result.append(i)
+            if i == period:
+                break
+            # the next context drops the first id's digit and adds i
+            key = key % place * num_words + i
+            c = index.get(key)
+            if c is None:
+                # the corpus ran out mid sentence
+                break
+            start, stop = offsets[c], offsets[c + 1]
+            low = totals[start]
+            i = next_ids[bisect_right(totals, low + uniform() * (totals[stop] - low),
+                                      start + 1, stop + 1) - 1]
+        return ' '.join([self.words[i] for i in result])
+
+    # Persistence
+
+    def save(self, path):
+        """write the model to a binary file"""
+        tables = self._freeze()
+        words = '\n'.join(self.words).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.n, len(words), len(self.words),
+                                len(tables['offsets']) - 1, len(tables['next_ids']),
+                                len(self._tail)))
+            f.write(words)
+            for name in ['contexts', 'offsets', 'next_ids', 'totals']:
+                tables[name].tofile(f)
+            array('i', self._tail).tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """read a model written by save"""
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or header[:4] != MAGIC:
+                raise ValueError("{} isn't an n-gram model file".format(path))
+            _, n, num_bytes, num_words, num_contexts, num_transitions, tail_length = \
+                HEADER.unpack(header)
+            model = cls(n)
+            model.words = f.read(num_bytes).decode('utf-8').split('\n') if num_words else []
+            model.ids = {word: i for i, word in enumerate(model.words)}
+
+            def read(typecode, count):
+                values = array(typecode)
+                values.fromfile(f, count)
+                return values
+
+            tables = {
+                'contexts': read('i', num_contexts * (n - 1)),
+                'offsets': read('q', num_contexts + 1),
+                'next_ids': read('i', num_transitions),
+                'totals': read('q', num_transitions + 1),
+            }
+            model._tail = tuple(read('i', tail_length))
+        model._tables = _index(tables, _context_keys(tables['contexts'], n, num_words))
+        model._counts = None
+        return model
@@ -0,0 +1,177 @@
+"""
+Tests for LDA
+"""
+import random
+from array import array
+from collections import Counter
+from lda import *
+
+
+documents = [
+    ["Hadoop", "Big Data", "HBase", "Java", "Spark", "Storm", "Cassandra"],
+    ["NoSQL", "MongoDB", "Cassandra", "HBase", "Postgres"],
+    ["Python", "scikit-learn", "scipy", "numpy", "statsmodels", "pandas"],
+    ["R", "Python", "statistics", "regression", "probability"],
+    ["machine learning", "regression", "decision trees", "libsvm"],
+    ["Python", "R", "Java", "C++", "Haskell", "programming languages"],
+    ["statistics", "probability", "mathematics", "theory"],
+    ["machine learning", "scikit-learn", "Mahout", "neural networks"],
+    ["neural networks", "deep learning", "Big Data", "artificial intelligence"],
+    ["Hadoop", "Java", "MapReduce", "Big Data"],
+    ["statistics", "R", "statsmodels"],
+    ["C++", "deep learning", "artificial intelligence", "probability"],
+    ["pandas", "R", "Python"],
+    ["databases", "HBase", "Postgres", "MySQL", "MongoDB"],
+    ["libsvm", "regression", "support vector machines"]
+]
+
+
+def notebook_lda(documents, K, iterations):
+    """the notebook's version, to compare against"""
+    def sample_from(weights):
+        total = sum(weights)
+        rnd = total * random.random()
+        for i, w in enumerate(weights):
+            rnd -= w
+            if rnd <= 0: return i
+
+    document_topic_counts = [Counter() for _ in documents]
+    topic_word_counts = [Counter() for _ in range(K)]
+    topic_counts = [0 for _ in range(K)]
+    document_lengths = list(map(len, documents))
+    W = len(set(word for document in documents for word in document))
+    D = len(documents)
+
+    def p_topic_given_document(topic, d, alpha=0.1):
+        return ((document_topic_counts[d][topic] + alpha) /
+                (document_lengths[d] + K * alpha))
+
+    def p_word_given_topic(word, topic, beta=0.1):
+        return ((topic_word_counts[topic][word] + beta) /
+                (topic_counts[topic] + W * beta))
+
+    def topic_weight(d, word, k):
+        return p_word_given_topic(word, k) * p_topic_given_document(k, d)
+
+    document_topics = [[random.randrange(K) for word in document]
+                       for document in documents]
+    for d in range(D):
+        for word, topic in zip(documents[d], document_topics[d]):
+            document_topic_counts[d][topic] += 1
+            topic_word_counts[topic][word] += 1
+            topic_counts[topic] += 1
+
+    for iter in range(iterations):
+        for d in range(D):
+            for i, (word, topic) in enumerate(zip(documents[d], document_topics[d])):
+                document_topic_counts[d][topic] -= 1
+                topic_word_counts[topic][word] -= 1
+                topic_counts[topic] -= 1
+                document_lengths[d] -= 1
+                new_topic = sample_from([topic_weight(d, word, k) for k in range(K)])
+                document_topics[d][i] = new_topic
+                document_topic_counts[d][new_topic] += 1
+                topic_word_counts[new_topic][word] += 1
+                topic_counts[new_topic] += 1
+                document_lengths[d] += 1
+    return document_topics, document_topic_counts, topic_word_counts
+
+
+def planted_documents(num_documents, length=20, rng=random):
+    """documents each drawn from one of two disjoint vocabularies"""
+    vocabularies = [['a{}'.format(i) for i in range(10)], ['b{}'.format(i) for i in range(10)]]
+    return [[rng.choice(vocabularies[d % 2]) for _ in range(length)]
+            for d in range(num_documents)]
+
+
+def assert_consistent(model):
+    K = model.K
+    doc_topic = [0] * len(model.doc_topic)
+    word_topic = [0] * len(model.word_topic)
+    for d, (document, topics) in enumerate(zip(model.documents, model.topics)):
+        for w, topic in zip(document, topics):
+            doc_topic[d * K + topic] += 1
+            word_topic[w * K + topic] += 1
+    assert model.doc_topic.tolist() == doc_topic
+    assert model.word_topic.tolist() == word_topic
+    assert model.topic_counts.tolist() == [sum(word_topic[k::K]) for k in range(K)]
+
+
+def assert_separates(model, documents):
+    # every document is mostly one topic, different for the two vocabularies
+    majority = [counts.most_common(1)[0] for counts in model.document_topic_counts()]
+    for (topic, count), document in zip(majority, documents):
+        assert count >= 0.8 * len(document)
+    assert len({majority[d][0] for d in range(0, len(documents), 2)}) == 1
+    assert len({majority[d][0] for d in range(1, len(documents), 2)}) == 1
+    assert majority[0][0] != majority[1][0]
+
+
+def test_dense_same_topics_as_the_notebook():
+    random.seed(0)
+    expected_topics, expected_document_counts, expected_word_counts = \
+        notebook_lda(documents, 4, 100)
+    model = LDA(4).fit(documents, 100, rng=random.Random(0))
+    assert model.document_topics() == expected_topics
+    assert model.document_topic_counts() == [+counts for counts in expected_document_counts]
+    assert model.topic_word_counts() == [+counts for counts in expected_word_counts]
+    assert_consistent(model)
+
+
+def test_samplers_draw_from_the_same_distribution():
+    model = LDA(3).fit(documents + [['Python', 'R']], 0, rng=random.Random(3))
+    K, W, alpha, beta = model.params
+    d = len(documents)
+    w, topic = model.documents[d][0], model.topics[d][0]
+    word_topic = model.word_topic.tolist()
+    counts = model.doc_topic[d * K:(d + 1) * K].tolist()
+    topic_counts = model.topic_counts.tolist()
+    word_topic[w * K + topic] -= 1
+    counts[topic] -= 1
+    topic_counts[topic] -= 1
+    weights = [(word_topic[w * K + k] + beta) / (topic_counts[k] + W * beta) * (counts[k] + alpha)
+               for k in range(K)]
+
+    # sweep the last document from the same state, many times, and count
+    # the new topics of its first word
+    for sweep in SAMPLERS.values():
+        rng, drawn = random.Random(4), Counter()
+        for _ in range(10000):
+            topics = [array('l', model.topics[d])]
+            sweep([model.documents[d]], topics, model.doc_topic[d * K:(d + 1) * K],
+                  array('l', model.word_topic), array('l', model.topic_counts),
+                  model.params, 1, rng)
+            drawn[topics[0][0]] += 1
+        for k in range(K):
+            assert abs(drawn[k] / 10000 - weights[k] / sum(weights)) < 0.02
+
+
+def test_sparse():
+    rng = random.Random(1)
+    corpus = planted_documents(20, rng=rng)
+    model = LDA(2).fit(corpus, 50, sampler='sparse', rng=rng)
+    assert_consistent(model)
+    assert_separates(model, corpus)
+    model = LDA(10).fit(documents, 20, sampler='sparse', rng=rng)
+    assert_consistent(model)
+
+
+def test_parallel():
+    corpus = planted_documents(20, rng=random.Random(2))
+    for sampler in SAMPLERS:
+        serial = LDA(2).fit_parallel(corpus, 30, num_shards=3, seed=1, sampler=sampler)
+        assert_consistent(serial)
+        assert_separates(serial, corpus)
+        parallel = LDA(2).fit_parallel(corpus, 30, num_shards=3, processes=2, seed=1,
+                                       sampler=sampler)
+        assert parallel.document_topics() == serial.document_topics()
+        assert parallel.word_topic == serial.word_topic
+
+
+def test_unknown_sampler():
+    try:
+        LDA(2).fit(documents, 1, sampler='gibbs')
+    except ValueError:
+        pass
+    else:
+        assert False, "expected ValueError"
@@ -0,0 +1,118 @@
+"""
+Tests for n-gram models
+"""
+import random
+from collections import Counter, defaultdict
+from ngrams import *
+
+
+TEXT = """
+The cat sat on the mat. The dog sat on the cat. A dog's life isn't the cat's.
+The mat sat still. On the mat the cat and the dog sat. The end.
+"""
+
+
+def notebook_transitions(document, n):
+    """the notebook's lists of every word that followed each context"""
+    transitions = defaultdict(list)
+    for i in range(len(document) - n + 1):
+        transitions[tuple(document[i:i + n - 1])].append(document[i + n - 1])
+    return transitions
+
+
+def test_tokenize():
+    assert tokenize("A dog's life. Isn't it?") == ['A', "dog's", 'life', '.', "Isn't", 'it']
+
+
+def test_counts_match_the_notebook():
+    document = tokenize(TEXT)
+    for n in [2, 3, 4]:
+        model = NgramModel(n).partial_fit(document)
+        expected = {context: dict(Counter(following))
+                    for context, following in notebook_transitions(document, n).items()}
+        assert model.transitions() == expected
+
+
+def test_sentences_start_like_the_notebook():
+    document = tokenize(TEXT)
+    starts = Counter(current for prev, current in zip(document, document[1:]) if prev == '.')
+    model = NgramModel(3).partial_fit(document)
+    rng = random.Random(0)
+    drawn = Counter(model.generate(rng).split(' ')[0] for _ in range(20000))
+    assert set(drawn) == set(starts)
+    for word, count in starts.items():
+        assert abs(drawn[word] / 20000 - count / sum(starts.values())) < 0.02
+
+
+def test_chunks_match_whole():
+    document = tokenize(TEXT * 3)
+    whole = NgramModel(3).partial_fit(document)
+    lines = (TEXT * 3).splitlines()
+    for chunk_size in [1, 2, 7, 1000]:
+        streamed = NgramModel(3).fit_corpus(iter(lines), chunk_size=chunk_size)
+        assert streamed.words == whole.words
+        assert streamed._counts == whole._counts
+        assert streamed.generate(random.Random(0)) == whole.generate(random.Random(0))
+
+
+def test_next_id_in_proportion_to_counts():
+    model = NgramModel(2).partial_fit(tokenize(TEXT))
+    the = (model.ids['the'],)
+    rng = random.Random(0)
+    drawn = Counter(model.words[model.next_id(the, rng)] for _ in range(20000))
+    following = notebook_transitions(tokenize(TEXT), 2)[('the',)]
+    for word, count in Counter(following).items():
+        assert abs(drawn[word] / 20000 - count / len(following)) < 0.02
+    assert set(drawn) == set(following)
+    assert model.next_id((model.ids['end'] + 100,), rng) is None
+
+
+def test_generate():
+    document = tokenize(TEXT)
+    for n in [2, 3]:
+        model = NgramModel(n).partial_fit(document)
+        transitions = notebook_transitions(document, n)
+        rng = random.Random(n)
+        for _ in range(50):
+            sentence = model.generate(rng).split(' ')
+            assert sentence[-1] == '.'
+            context = ['.'] + sentence
+            for i in range(len(sentence) - n + 2):
+                assert context[i + n - 1] in transitions[tuple(context[i:i + n - 1])]
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / 'model.ngrams'
+    lines = (TEXT * 2).splitlines()
+    model = NgramModel(3).fit_corpus(lines[:3])
+    model.save(path)
+    loaded = NgramModel.load(path)
+    assert loaded.n == 3 and loaded.words == model.words
+    for seed in range(10):
+        assert loaded.generate(random.Random(seed)) == model.generate(random.Random(seed))
+    # a loaded model can keep counting where it left off
+    loaded.fit_corpus(lines[3:])
+    model.fit_corpus(lines[3:])
+    assert loaded._counts == model._counts
+    assert loaded.generate(random.Random(1)) == model.generate(random.Random(1))
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a model')
+    try:
+        NgramModel.load(path)
+    except ValueError:
+        pass
+    else:
+        assert False, "expected ValueError"
+
+
+def test_keys_past_64_bits(tmp_path):
+    # 70,000 words to the fourth power is more than 2**63
+    words = ['w{}'.format(i) for i in range(70000)]
+    model = NgramModel(5).partial_fit(['.'] + words + ['.'])
+    assert model.generate(random.Random(0)) == ' '.join(words + ['.'])
+    path = tmp_path / 'model.ngrams'
+    model.save(path)
+    assert NgramModel.load(path).generate(random.Random(0)) == ' '.join(words + ['.'])
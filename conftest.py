@@ -0,0 +1,11 @@
+"""
+Put every chapter on the path, as in the note at the bottom of the README,
+so tests can import modules from other chapters however they're run.
+"""
+import os
+import sys
+
+book_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend(os.path.join(book_dir, name)
+                for name in sorted(os.listdir(book_dir))
+                if name.startswith('chapter_'))